@@ -1,24 +1,69 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
 from app.database import engine, Base
-from app.routes import auth, user, crypto, stocks, dashboard
-from app.services.background_tasks import start_background_tasks, stop_background_tasks
+from app.routes import auth, user, crypto, stocks, dashboard, stream, market, history, alerts, risk, strategies, paper, arbitrage
+from app.services.background_tasks import start_background_tasks, stop_background_tasks, load_cache_snapshot
+from app.services.metrics import registry, MetricsMiddleware
+from app.services.rate_limit import RateLimitMiddleware
+from app.services.tracing import TracingMiddleware, install_sqlalchemy_hooks
+from app.services.recorder import market_recorder
+from app.services.backfill import stop_backfill
+from app.services.alerts import alert_engine
+from app.services.portfolio import portfolio_engine
+from app.services.risk import risk_engine
+from app.services.strategies import strategy_runner
+from app.services.paper_trading import paper_exchange
+from app.services.exchanges import exchange_registry
+from app.services.arbitrage import arbitrage_scanner
+from app.services.bars import bar_aggregator
+from app.services.fundamentals import fundamentals_cache
+from app.services.stock_service import stock_service
+from app.services.address_index import address_index
+from app.services.watchlist import watchlist
 
 # Import models to ensure they are registered with SQLAlchemy
-from app.models import User, Wallet
+from app.models import User, Wallet, PriceAlert, Holding, EquitySnapshot, Strategy, StrategySignal, PaperOrder
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# Time SQL statements as "db" spans of the request trace
+install_sqlalchemy_hooks(engine)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    # Serve from the last snapshot instead of a cold cache while prices are revalidated
+    load_cache_snapshot()
+    alert_engine.start()
+    arbitrage_scanner.start()
+    exchange_registry.start(lambda: watchlist.tracked("crypto"))
+    bar_aggregator.start(lambda: watchlist.tracked("stock") + watchlist.tracked("crypto"))
+    fundamentals_cache.start(stock_service.fetch_info, lambda: watchlist.tracked("stock"))
     start_background_tasks()
+    portfolio_engine.start()
+    risk_engine.start(lambda: watchlist.tracked("stock") + watchlist.tracked("crypto"))
+    paper_exchange.start()
+    strategy_runner.start()
+    address_index.start()
     yield
     # Shutdown
+    address_index.stop()
+    strategy_runner.stop()
+    paper_exchange.stop()
+    risk_engine.stop()
+    portfolio_engine.stop()
     stop_background_tasks()
+    fundamentals_cache.stop()
+    bar_aggregator.stop()
+    exchange_registry.stop()
+    arbitrage_scanner.stop()
+    stop_backfill()
+    alert_engine.stop()
+    market_recorder.close()
 
 app = FastAPI(
     title="CryptoBot Pro API",
@@ -27,6 +72,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Per-user/per-IP rate limits, checked before routing (inside CORS so 429s keep CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -36,12 +84,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency metrics per route
+app.add_middleware(MetricsMiddleware)
+
+# Per-request span breakdown (Server-Timing header and sampled trace log)
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(user.router, prefix="/user", tags=["User"])
 app.include_router(crypto.router, prefix="/crypto", tags=["Cryptocurrency"])
 app.include_router(stocks.router, prefix="/stocks", tags=["Stocks"])
 app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
+app.include_router(market.router, prefix="/market", tags=["Market"])
+app.include_router(history.router, prefix="/history", tags=["History"])
+app.include_router(alerts.router, prefix="/alerts", tags=["Alerts"])
+app.include_router(risk.router, prefix="/risk", tags=["Risk"])
+app.include_router(strategies.router, prefix="/strategies", tags=["Strategies"])
+app.include_router(paper.router, prefix="/paper", tags=["Paper Trading"])
+app.include_router(arbitrage.router, prefix="/arbitrage", tags=["Arbitrage"])
+app.include_router(stream.router, prefix="/stream", tags=["Streaming"])
 
 @app.get("/")
 async def root():
@@ -51,5 +113,10 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of the platform metrics."""
+    return PlainTextResponse(registry.expose(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
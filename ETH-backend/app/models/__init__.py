@@ -1,5 +1,11 @@
 # Database models
 from .user import User
 from .wallet import Wallet
+from .alert import PriceAlert
+from .holding import Holding
+from .equity_snapshot import EquitySnapshot
+from .strategy import Strategy
+from .strategy_signal import StrategySignal
+from .paper_order import PaperOrder
 
-__all__ = ["User", "Wallet"] 
\ No newline at end of file
+__all__ = ["User", "Wallet", "PriceAlert", "Holding", "EquitySnapshot", "Strategy", "StrategySignal", "PaperOrder"] 
\ No newline at end of file
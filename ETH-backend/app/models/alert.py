@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class PriceAlert(Base):
+    __tablename__ = "price_alerts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("eth_users.id"), nullable=False, index=True)
+    symbol = Column(String, nullable=False)
+    direction = Column(String, nullable=False)  # "above" or "below"
+    threshold = Column(Float, nullable=False)
+    is_active = Column(Boolean, default=True)
+    triggered_price = Column(Float, nullable=True)
+    triggered_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationship
+    user = relationship("User", back_populates="alerts")
+
+    # Startup loads every active alert
+    __table_args__ = (Index("ix_price_alerts_active_symbol", "is_active", "symbol"),)
+
+    def __repr__(self):
+        return f"<PriceAlert(id={self.id}, symbol='{self.symbol}', {self.direction} {self.threshold})>"
\ No newline at end of file
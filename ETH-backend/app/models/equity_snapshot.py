@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
+from app.database import Base
+
+class EquitySnapshot(Base):
+    __tablename__ = "equity_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("eth_users.id"), nullable=False)
+    total_value = Column(Float, nullable=False)
+    captured_at = Column(DateTime(timezone=True), nullable=False)
+
+    # History queries are per user, by time
+    __table_args__ = (Index("ix_equity_snapshots_user_time", "user_id", "captured_at"),)
+
+    def __repr__(self):
+        return f"<EquitySnapshot(user_id={self.user_id}, total_value={self.total_value}, captured_at={self.captured_at})>"
\ No newline at end of file
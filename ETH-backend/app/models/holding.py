@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class Holding(Base):
+    __tablename__ = "holdings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("eth_users.id"), nullable=False, index=True)
+    symbol = Column(String, nullable=False)
+    asset_type = Column(String, nullable=False, default="stock")  # "crypto" or "stock"
+    quantity = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationship
+    user = relationship("User", back_populates="holdings")
+
+    __table_args__ = (UniqueConstraint("user_id", "symbol", name="uq_holdings_user_symbol"),)
+
+    def __repr__(self):
+        return f"<Holding(id={self.id}, user_id={self.user_id}, symbol='{self.symbol}', quantity={self.quantity})>"
\ No newline at end of file
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class PaperOrder(Base):
+    __tablename__ = "paper_orders"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("eth_users.id"), nullable=False, index=True)
+    strategy_id = Column(Integer, ForeignKey("strategies.id", ondelete="SET NULL"), nullable=True, index=True)
+    symbol = Column(String, nullable=False)
+    side = Column(String, nullable=False)  # "buy" or "sell"
+    order_type = Column(String, nullable=False, default="market")  # "market" or "limit"
+    quantity = Column(Float, nullable=False)
+    limit_price = Column(Float, nullable=True)
+    status = Column(String, nullable=False)  # "filled", "partially_filled" or "rejected"
+    filled_quantity = Column(Float, nullable=False, default=0.0)
+    average_price = Column(Float, nullable=True)
+    notional = Column(Float, nullable=False, default=0.0)
+    fee = Column(Float, nullable=False, default=0.0)
+    slippage_bps = Column(Float, nullable=True)
+    reason = Column(String, nullable=True)
+    depth_time = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationship
+    user = relationship("User", back_populates="paper_orders")
+
+    def __repr__(self):
+        return f"<PaperOrder(id={self.id}, {self.side} {self.quantity} {self.symbol}, status='{self.status}')>"
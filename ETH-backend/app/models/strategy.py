@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, JSON, Text
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class Strategy(Base):
+    __tablename__ = "strategies"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("eth_users.id"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # "sma_cross", "rsi" or "breakout"
+    symbol = Column(String, nullable=False)
+    asset_type = Column(String, nullable=False, default="crypto")  # "crypto" or "stock"
+    params = Column(JSON, nullable=False, default=dict)
+    is_active = Column(Boolean, default=True, index=True)
+    disabled_reason = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationship
+    user = relationship("User", back_populates="strategies")
+    signals = relationship("StrategySignal", back_populates="strategy", cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<Strategy(id={self.id}, kind='{self.kind}', symbol='{self.symbol}')>"
\ No newline at end of file
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class StrategySignal(Base):
+    __tablename__ = "strategy_signals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    strategy_id = Column(Integer, ForeignKey("strategies.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("eth_users.id"), nullable=False, index=True)
+    symbol = Column(String, nullable=False)
+    side = Column(String, nullable=False)  # "buy" or "sell"
+    price = Column(Float, nullable=False)
+    quantity = Column(Float, nullable=False)
+    reason = Column(String, nullable=True)
+    bar_time = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationship
+    strategy = relationship("Strategy", back_populates="signals")
+
+    def __repr__(self):
+        return f"<StrategySignal(id={self.id}, strategy_id={self.strategy_id}, {self.side} {self.symbol})>"
\ No newline at end of file
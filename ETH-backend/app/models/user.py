@@ -17,6 +17,10 @@ class User(Base):
 
     # Relationship
     wallets = relationship("Wallet", back_populates="user")
+    alerts = relationship("PriceAlert", back_populates="user")
+    holdings = relationship("Holding", back_populates="user")
+    strategies = relationship("Strategy", back_populates="user")
+    paper_orders = relationship("PaperOrder", back_populates="user")
 
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}', email='{self.email}')>" 
\ No newline at end of file
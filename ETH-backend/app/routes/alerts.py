@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List
+from app.database import get_db
+from app.models.user import User
+from app.models.alert import PriceAlert
+from app.schemas.alert import AlertCreate, AlertResponse
+from app.services.alerts import alert_engine
+from app.utils.auth import get_current_active_user
+
+router = APIRouter()
+
+@router.post("/", response_model=AlertResponse, status_code=status.HTTP_201_CREATED)
+def create_alert(
+    alert_data: AlertCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Create a price alert that fires when the symbol crosses the threshold."""
+    alert = PriceAlert(
+        user_id=current_user.id,
+        symbol=alert_data.symbol.strip().upper(),
+        direction=alert_data.direction,
+        threshold=alert_data.threshold
+    )
+    db.add(alert)
+    db.commit()
+    db.refresh(alert)
+    
+    alert_engine.add(alert)
+    return alert
+
+@router.get("/", response_model=List[AlertResponse])
+def list_alerts(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """List the current user's alerts, newest first."""
+    return db.query(PriceAlert).filter(PriceAlert.user_id == current_user.id) \
+        .order_by(PriceAlert.id.desc()).all()
+
+@router.delete("/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_alert(
+    alert_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Delete one of the current user's alerts."""
+    alert = db.query(PriceAlert).filter(
+        PriceAlert.id == alert_id,
+        PriceAlert.user_id == current_user.id
+    ).first()
+    
+    if not alert:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Alert not found"
+        )
+    
+    if alert.is_active:
+        alert_engine.remove(alert)
+    db.delete(alert)
+    db.commit()
\ No newline at end of file
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Query
+from typing import List, Optional
+from app.schemas.arbitrage import ArbitrageCycle, ArbitrageStatus
+from app.services.arbitrage import arbitrage_scanner
+
+router = APIRouter()
+
+@router.get("/cycles", response_model=List[ArbitrageCycle])
+def get_cycles(
+    min_return: float = Query(0.0, ge=0, description="Minimum expected return after fees, e.g. 0.001 for 10 bps"),
+    venue: Optional[str] = Query(None, description="Only cycles with a leg on this exchange"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Get currently profitable conversion cycles, best expected return first."""
+    return arbitrage_scanner.cycles(min_return, venue.lower() if venue else None)[:limit]
+
+@router.get("/status", response_model=ArbitrageStatus)
+def get_status():
+    """Get the size of the cross-rate graph and the duration of the last scan."""
+    return arbitrage_scanner.status()
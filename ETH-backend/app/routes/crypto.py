@@ -1,31 +1,58 @@
-from fastapi import APIRouter
-from app.schemas.crypto import BTCPriceResponse, CryptoPriceResponse
-from app.services.background_tasks import get_cached_btc_price
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from typing import List
+from app.schemas.crypto import (
+    BestPriceResponse, BTCPriceResponse, CryptoPriceResponse, ExchangeStatus, OrderBookResponse
+)
+from app.services.background_tasks import (
+    get_rendered_btc_price,
+    get_rendered_crypto_price,
+    rendered_cache,
+    store_late_crypto_price,
+    store_crypto_prices
+)
 from app.services.crypto_service import crypto_service
+from app.services.depth import depth_cache
+from app.services.exchanges import exchange_registry
+from app.services.order_book import order_book_manager
+from app.services.tracing import span
+from app.services.serialization import RawJSONResponse
+from app.services.watchlist import watchlist
 
 router = APIRouter()
 
+MAX_ORDER_BOOK_LEVELS = 100
+
 @router.get("/btc-price", response_model=BTCPriceResponse)
-def get_btc_price():
+async def get_btc_price():
     """Get current BTC price."""
-    # Try to get from cache first
-    cached_price = get_cached_btc_price()
+    # Try to get from cache first, already encoded
+    rendered = get_rendered_btc_price()
     
-    if cached_price:
-        return BTCPriceResponse(**cached_price)
+    if rendered is not None:
+        return RawJSONResponse(rendered)
     
-    # If not in cache, fetch fresh data
-    btc_data = crypto_service.get_btc_price()
-    return BTCPriceResponse(**btc_data)
+    # If not in cache, fetch fresh data; the hedged lookup is bounded by its own SLO
+    btc_data = await run_in_threadpool(crypto_service.get_btc_price)
+    with span("serialize"):
+        return BTCPriceResponse(**btc_data)
 
 @router.get("/price/{symbol}", response_model=CryptoPriceResponse)
-def get_crypto_price(symbol: str):
+async def get_crypto_price(symbol: str):
     """Get price for a specific cryptocurrency."""
-    crypto_data = crypto_service.get_crypto_price(symbol)
+    symbol = symbol.upper()
+    watchlist.record_request(symbol, kind="crypto")
+    
+    # Served from cache; the background refresher keeps requested coins fresh
+    rendered = get_rendered_crypto_price(symbol)
+    if rendered is not None:
+        return RawJSONResponse(rendered)
+    
+    crypto_data = (await crypto_service.get_crypto_prices_async([symbol], on_late=store_late_crypto_price))[symbol]
     
     if not crypto_data:
         return CryptoPriceResponse(
-            symbol=symbol.upper(),
+            symbol=symbol,
             price_usd=0.0,
             price_btc=0.0,
             change_24h=0.0,
@@ -34,4 +61,69 @@ def get_crypto_price(symbol: str):
             last_updated=None
         )
     
-    return CryptoPriceResponse(**crypto_data) 
\ No newline at end of file
+    store_crypto_prices([crypto_data])
+    rendered = rendered_cache.get(("crypto", symbol))
+    if rendered is not None:
+        return RawJSONResponse(rendered)
+    with span("serialize"):
+        return CryptoPriceResponse(**crypto_data)
+
+@router.get("/orderbook/{symbol}", response_model=OrderBookResponse)
+def get_order_book(symbol: str, levels: int = Query(20, ge=1, le=MAX_ORDER_BOOK_LEVELS)):
+    """Get best bid/ask and the top levels of a coin's order book from memory."""
+    symbol = symbol.upper()
+    # Starts maintaining the book on first use
+    snapshot = depth_cache.get(symbol)
+    
+    top = order_book_manager.top(symbol, levels) if order_book_manager.is_synced(symbol) else None
+    if top is not None:
+        bids, asks, age = top["bids"], top["asks"], top["age_seconds"]
+    elif snapshot is not None:
+        bids = [[float(p), float(q)] for p, q in zip(snapshot.bids.prices[:levels], snapshot.bids.sizes[:levels])]
+        asks = [[float(p), float(q)] for p, q in zip(snapshot.asks.prices[:levels], snapshot.asks.sizes[:levels])]
+        age = snapshot.age()
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No order book for {symbol}"
+        )
+    
+    best_bid = bids[0][0] if bids else None
+    best_ask = asks[0][0] if asks else None
+    return {
+        "symbol": symbol,
+        "synced": top is not None,
+        "best_bid": best_bid,
+        "best_ask": best_ask,
+        "spread": best_ask - best_bid if bids and asks else None,
+        "age_seconds": round(age, 3),
+        "bids": bids,
+        "asks": asks,
+    }
+
+@router.get("/best/{symbol}", response_model=BestPriceResponse)
+def get_best_price(symbol: str):
+    """Get the consolidated best bid/ask for a coin across all configured exchanges."""
+    symbol = symbol.upper()
+    watchlist.record_request(symbol, kind="crypto")
+    
+    best = exchange_registry.best(symbol)
+    if best is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No exchange quotes for {symbol}"
+        )
+    return {
+        "symbol": symbol,
+        "price": best["price"],
+        "best_bid": best["best_bid"],
+        "bid_venue": best["bid_venue"],
+        "best_ask": best["best_ask"],
+        "ask_venue": best["ask_venue"],
+        "venues": exchange_registry.venue_quotes(symbol),
+    }
+
+@router.get("/exchanges", response_model=List[ExchangeStatus])
+def get_exchanges():
+    """Get the health of every configured exchange."""
+    return exchange_registry.status()
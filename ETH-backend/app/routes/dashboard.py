@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timedelta
 from typing import List
+import numpy as np
 from app.database import get_db
 from app.models.user import User
 from app.models.wallet import Wallet
 from app.schemas.dashboard import DashboardStatsResponse, LastUpdateResponse
 from app.utils.auth import get_current_active_user
+from app.utils.bitcoin import bitcoin_manager
 from app.services.background_tasks import get_cached_btc_price, get_cached_stock_prices
+from app.services.portfolio import (
+    portfolio_engine,
+    get_equity_history,
+    get_value_at,
+    PNL_SNAPSHOT_MAX_AGE_SECONDS
+)
+from app.schemas.portfolio import EquityHistoryResponse, EquityPoint
+from app.services.charts import CHART_MAX_POINTS
+from app.services.downsample import lttb
 
 router = APIRouter()
 
@@ -24,7 +35,6 @@ def get_dashboard_stats(
         
         if not wallet:
             # Create a default wallet if none exists
-            from app.utils.bitcoin import bitcoin_manager
             wallet_info = bitcoin_manager.create_wallet(current_user.id)
             wallet = Wallet(
                 user_id=current_user.id,
@@ -42,14 +52,21 @@ def get_dashboard_stats(
         btc_price_data = get_cached_btc_price()
         btc_price_usd = btc_price_data["price_usd"] if btc_price_data else 45000.0
         
-        # Update wallet balance with current BTC price
+        # Update wallet balance; platform addresses are answered from the local UTXO index
         wallet.balance_btc = bitcoin_manager.get_wallet_balance(wallet.wallet_address)
         wallet.balance_usd = wallet.balance_btc * btc_price_usd
         db.commit()
+        portfolio_engine.set_position(("wallet", wallet.id), current_user.id, "BTC", wallet.balance_btc)
         
-        # Calculate 24h P&L (mock calculation for now)
-        # In a real app, this would come from trade history
-        daily_pnl = wallet.balance_usd * 0.02  # 2% daily return for demo
+        # Portfolio value across all holdings, revalued on every price refresh
+        now = datetime.utcnow()
+        total_balance = portfolio_engine.value(current_user.id)
+        if total_balance is None:
+            total_balance = get_value_at(db, current_user.id, now) or 0.0
+        
+        # 24h P&L against the equity snapshot from a day ago; no change without one near that time
+        value_day_ago = get_value_at(db, current_user.id, now - timedelta(days=1), max_age=timedelta(seconds=PNL_SNAPSHOT_MAX_AGE_SECONDS))
+        daily_pnl = total_balance - value_day_ago if value_day_ago is not None else 0.0
         
         # Mock active trades count
         active_trades = 3  # This would come from a trades table
@@ -58,7 +75,7 @@ def get_dashboard_stats(
         success_rate = 87.5  # This would be calculated from trade history
         
         return DashboardStatsResponse(
-            total_balance=wallet.balance_usd,
+            total_balance=total_balance,
             daily_pnl=daily_pnl,
             active_trades=active_trades,
             success_rate=success_rate
@@ -70,6 +87,24 @@ def get_dashboard_stats(
             detail=f"Failed to fetch dashboard stats: {str(e)}"
         )
 
+@router.get("/equity-history", response_model=EquityHistoryResponse)
+def get_equity_history_route(
+    days: int = Query(30, ge=1, le=365, description="How many days of history to return"),
+    max_points: int = Query(CHART_MAX_POINTS, ge=10, le=5000, description="Longer histories are downsampled to this many points"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the user's portfolio value history from equity snapshots, downsampled with LTTB."""
+    snapshots = get_equity_history(db, current_user.id, datetime.utcnow() - timedelta(days=days))
+    if len(snapshots) > max_points:
+        x = np.array([snapshot.captured_at.timestamp() for snapshot in snapshots])
+        y = np.array([snapshot.total_value for snapshot in snapshots])
+        snapshots = [snapshots[i] for i in lttb(x, y, max_points)]
+    return EquityHistoryResponse(
+        user_id=current_user.id,
+        points=[EquityPoint.model_validate(snapshot) for snapshot in snapshots]
+    )
+
 @router.get("/last-update", response_model=LastUpdateResponse)
 def get_last_update():
     """Get the last time prices were updated."""
@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import Optional
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.models.user import User
+from app.schemas.history import BackfillRequest, BackfillStatusResponse, BarsResponse
+from app.services.backfill import start_backfill, get_backfill_job
+from app.services.bars import TIMEFRAME_SECONDS
+from app.services.charts import chart_cache, CHART_MAX_POINTS
+from app.services.serialization import RawJSONResponse, dumps
+from app.services.tracing import span
+from app.utils.auth import get_current_active_user
+
+router = APIRouter()
+
+@router.post("/backfill", response_model=BackfillStatusResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_backfill(
+    request: BackfillRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Start a historical backfill in the background (resumes from its checkpoint)."""
+    if not request.symbols:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one symbol is required"
+        )
+    job = start_backfill(request.symbols, request.start, request.end, interval=request.interval)
+    return BackfillStatusResponse(**job.status())
+
+@router.get("/backfill", response_model=BackfillStatusResponse)
+def get_backfill_status(current_user: User = Depends(get_current_active_user)):
+    """Get progress of the current or last backfill job."""
+    job = get_backfill_job()
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No backfill has been started"
+        )
+    return BackfillStatusResponse(**job.status())
+
+@router.get("/bars/{symbol}", response_model=BarsResponse)
+def get_bars(
+    symbol: str,
+    timeframe: str = "1m",
+    start: Optional[datetime] = Query(None, description="Range start; without it the last `limit` bars are returned"),
+    end: Optional[datetime] = None,
+    limit: int = Query(CHART_MAX_POINTS, ge=1, le=5000),
+    max_points: int = Query(CHART_MAX_POINTS, ge=10, le=5000, description="Larger ranges are merged into this many candles"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """OHLC candles for charts, the still open bar last; older bars come from stored history.
+
+    Ranges with more bars than max_points are downsampled server-side into
+    candles that keep each bucket's high and low.
+    """
+    if timeframe not in TIMEFRAME_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported timeframe, use one of {', '.join(TIMEFRAME_SECONDS)}"
+        )
+    symbol = symbol.upper()
+    candles, downsampled = chart_cache.candles(
+        symbol, timeframe, start=start, end=end, limit=limit, max_points=max_points
+    )
+    with span("serialize"):
+        volume = candles["volume"]
+        return RawJSONResponse(dumps({
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "downsampled": downsampled,
+            "ts": candles["ts"].tolist(),
+            "open": candles["open"].tolist(),
+            "high": candles["high"].tolist(),
+            "low": candles["low"].tolist(),
+            "close": candles["close"].tolist(),
+            "volume": np.where(np.isnan(volume), None, volume).tolist(),
+        }))
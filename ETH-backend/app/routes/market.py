@@ -0,0 +1,78 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+from app.schemas.market import MarketSnapshotResponse
+from app.services.background_tasks import (
+    get_snapshot_row, store_crypto_prices, store_stock_prices, store_late_crypto_price, store_late_stock_price
+)
+from app.services.crypto_service import crypto_service
+from app.services.stock_service import stock_service
+from app.services.serialization import RawJSONResponse, dumps
+from app.services.watchlist import watchlist
+from app.services.tracing import span
+
+router = APIRouter()
+
+SNAPSHOT_FIELDS = ("kind", "price", "change", "change_percent", "volume", "market_cap", "last_updated")
+MAX_SNAPSHOT_SYMBOLS = 200
+
+@router.get("/snapshot", response_model=MarketSnapshotResponse)
+async def get_market_snapshot(
+    symbols: str = Query(..., description="Comma-separated crypto and stock symbols, e.g. BTC,ETH,AAPL"),
+    fields: Optional[str] = Query(None, description=f"Comma-separated subset of {', '.join(SNAPSHOT_FIELDS)}")
+):
+    """Get a columnar snapshot of mixed crypto and stock quotes.
+
+    Each requested field is one array, parallel to "symbols". Quotes come
+    from the cache; symbols not cached yet are fetched with one bulk call
+    per asset class, both at once, and symbols that cannot be priced by
+    the request deadline are listed in "missing".
+    """
+    symbol_list = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not symbol_list or len(symbol_list) > MAX_SNAPSHOT_SYMBOLS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {MAX_SNAPSHOT_SYMBOLS} symbols are required"
+        )
+
+    field_list = list(SNAPSHOT_FIELDS)
+    if fields:
+        field_list = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in field_list if f not in SNAPSHOT_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+
+    def classify():
+        return {symbol: "crypto" if crypto_service.is_crypto(symbol) else "stock" for symbol in symbol_list}
+
+    # Coins outside SYMBOL_MAPPING are only known once the Binance markets are loaded
+    kinds = classify() if crypto_service.markets_loaded() else await run_in_threadpool(classify)
+    rows = {}
+    for symbol, kind in kinds.items():
+        watchlist.record_request(symbol, kind=kind)
+        rows[symbol] = get_snapshot_row(kind, symbol)
+
+    # Fetch what the refresher has not cached yet, one bulk call per asset class
+    crypto_misses = [s for s, row in rows.items() if row is None and kinds[s] == "crypto"]
+    stock_misses = [s for s, row in rows.items() if row is None and kinds[s] == "stock"]
+    crypto_quotes, stock_quotes = await asyncio.gather(
+        crypto_service.get_crypto_prices_async(crypto_misses, on_late=store_late_crypto_price),
+        stock_service.get_stock_prices_async(stock_misses, on_late=store_late_stock_price)
+    )
+    store_crypto_prices([quote for quote in crypto_quotes.values() if quote])
+    store_stock_prices([quote for quote in stock_quotes.values() if quote])
+    for symbol in crypto_misses + stock_misses:
+        rows[symbol] = get_snapshot_row(kinds[symbol], symbol)
+
+    with span("serialize"):
+        found = [symbol for symbol in symbol_list if rows[symbol] is not None]
+        found_rows = [rows[symbol] for symbol in found]
+        return RawJSONResponse(dumps({
+            "symbols": found,
+            "columns": {field: [row[field] for row in found_rows] for field in field_list},
+            "missing": [symbol for symbol in symbol_list if rows[symbol] is None],
+        }))
\ No newline at end of file
@@ -0,0 +1,96 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from typing import List
+from app.database import get_db
+from app.models.user import User
+from app.models.paper_order import PaperOrder
+from app.schemas.paper import (
+    DepthLevelsResponse, PaperOrderBatch, PaperOrderCreate, PaperOrderResponse, PaperPosition
+)
+from app.services.paper_trading import paper_exchange
+from app.utils.auth import get_current_active_user
+
+router = APIRouter()
+
+MAX_DEPTH_LEVELS = 100
+
+def _check_orders(orders: List[PaperOrderCreate]) -> List[dict]:
+    for order in orders:
+        if order.order_type == "limit" and order.limit_price is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="limit_price is required for limit orders"
+            )
+    return [order.model_dump() for order in orders]
+
+@router.post("/orders", response_model=PaperOrderResponse, status_code=status.HTTP_201_CREATED)
+def place_order(
+    order: PaperOrderCreate,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Fill a simulated order against cached order book depth."""
+    return paper_exchange.place(current_user.id, _check_orders([order]))[0]
+
+@router.post("/orders/batch", response_model=List[PaperOrderResponse], status_code=status.HTTP_201_CREATED)
+def place_orders(
+    batch: PaperOrderBatch,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Fill up to 1000 simulated orders in one request."""
+    return paper_exchange.place(current_user.id, _check_orders(batch.orders))
+
+@router.get("/orders", response_model=List[PaperOrderResponse])
+def list_orders(
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """List the current user's simulated orders, newest first."""
+    return db.query(PaperOrder).filter(PaperOrder.user_id == current_user.id) \
+        .order_by(PaperOrder.id.desc()).limit(limit).all()
+
+@router.get("/positions", response_model=List[PaperPosition])
+def get_positions(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Net simulated position and cash flow per symbol from the user's fills."""
+    is_buy = PaperOrder.side == "buy"
+    rows = db.query(
+        PaperOrder.symbol,
+        func.sum(case((is_buy, PaperOrder.filled_quantity), else_=-PaperOrder.filled_quantity)),
+        func.sum(case((is_buy, -PaperOrder.notional), else_=PaperOrder.notional) - PaperOrder.fee),
+        func.sum(PaperOrder.fee),
+        func.count(PaperOrder.id)
+    ).filter(
+        PaperOrder.user_id == current_user.id,
+        PaperOrder.filled_quantity > 0
+    ).group_by(PaperOrder.symbol).order_by(PaperOrder.symbol).all()
+    
+    return [
+        {"symbol": symbol, "quantity": quantity or 0.0, "cash_flow": cash_flow or 0.0,
+         "fees": fees or 0.0, "orders": orders}
+        for symbol, quantity, cash_flow, fees, orders in rows
+    ]
+
+@router.get("/depth/{symbol}", response_model=DepthLevelsResponse)
+def get_depth(
+    symbol: str,
+    levels: int = Query(20, ge=1, le=MAX_DEPTH_LEVELS),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the cached order book depth simulated orders are filled against."""
+    snapshot = paper_exchange.depth.get(symbol)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No order book depth for {symbol.upper()}"
+        )
+    return {
+        "symbol": snapshot.symbol,
+        "fetched_at": snapshot.fetched_at,
+        "age_seconds": round(snapshot.age(), 3),
+        "bids": [[float(p), float(q)] for p, q in zip(snapshot.bids.prices[:levels], snapshot.bids.sizes[:levels])],
+        "asks": [[float(p), float(q)] for p, q in zip(snapshot.asks.prices[:levels], snapshot.asks.sizes[:levels])],
+    }
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Dict, List, Literal, Optional
+import numpy as np
+from app.models.user import User
+from app.schemas.risk import CorrelationResponse, VaRResponse, VolatilityResponse
+from app.services.portfolio import portfolio_engine
+from app.services.risk import risk_engine
+from app.services.serialization import RawJSONResponse, dumps
+from app.utils.auth import get_current_active_user
+
+router = APIRouter()
+
+MAX_RISK_SYMBOLS = 500
+
+def _parse_symbols(symbols: str) -> List[str]:
+    symbol_list = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not symbol_list or len(symbol_list) > MAX_RISK_SYMBOLS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {MAX_RISK_SYMBOLS} symbols are required"
+        )
+    return symbol_list
+
+def _var_response(exposures: Dict[str, float], method: str, confidence: float, horizon_bars: int) -> dict:
+    return {
+        "method": method,
+        "confidence": confidence,
+        "horizon_bars": horizon_bars,
+        "exposure": sum(exposures.values()),
+        "value_at_risk": risk_engine.value_at_risk(exposures, confidence, horizon_bars, method),
+        "exposures": exposures,
+    }
+
+@router.get("/volatility", response_model=VolatilityResponse)
+def get_volatility(symbols: str = Query(..., description="Comma-separated symbols, e.g. BTC,ETH,AAPL")):
+    """Get rolling per-bar and annualized volatility of log returns."""
+    return {
+        "bar_seconds": risk_engine.bar_seconds,
+        "version": risk_engine.version,
+        "symbols": risk_engine.volatility(_parse_symbols(symbols)),
+    }
+
+@router.get("/correlation", response_model=CorrelationResponse)
+def get_correlation(symbols: str = Query(..., description="Comma-separated symbols, e.g. BTC,ETH,AAPL")):
+    """Get the correlation matrix of returns for a symbol set.
+
+    Pairs without enough common bars are null. The full matrix is computed
+    once per bar, so any subset is a single indexed read.
+    """
+    symbol_list = _parse_symbols(symbols)
+    version = risk_engine.version
+    matrix = risk_engine.correlation(symbol_list)
+    rows = np.where(np.isnan(matrix), None, matrix).tolist()
+    return RawJSONResponse(dumps({"version": version, "symbols": symbol_list, "matrix": rows}))
+
+@router.get("/var", response_model=VaRResponse)
+def get_value_at_risk(
+    symbols: str = Query(..., description="Comma-separated symbols, e.g. BTC,ETH,AAPL"),
+    weights: Optional[str] = Query(None, description="Comma-separated exposure per symbol, equal weights if omitted"),
+    value: float = Query(1.0, gt=0, description="Total exposure the weights are scaled to"),
+    confidence: float = Query(0.95, gt=0.5, lt=1),
+    horizon_bars: int = Query(1, ge=1, le=10000),
+    method: Literal["parametric", "historical"] = "parametric"
+):
+    """Get value at risk for a weighted symbol set, in units of value."""
+    symbol_list = _parse_symbols(symbols)
+    if weights:
+        try:
+            weight_list = [float(w) for w in weights.split(",")]
+        except ValueError:
+            weight_list = []
+        if len(weight_list) != len(symbol_list) or not sum(abs(w) for w in weight_list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="weights must be one non-zero number per symbol"
+            )
+    else:
+        weight_list = [1.0] * len(symbol_list)
+
+    scale = value / sum(abs(w) for w in weight_list)
+    exposures = {symbol: w * scale for symbol, w in zip(symbol_list, weight_list)}
+    return _var_response(exposures, method, confidence, horizon_bars)
+
+@router.get("/portfolio/var", response_model=VaRResponse)
+def get_portfolio_value_at_risk(
+    confidence: float = Query(0.95, gt=0.5, lt=1),
+    horizon_bars: int = Query(1, ge=1, le=10000),
+    method: Literal["parametric", "historical"] = "parametric",
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get value at risk of the current user's holdings at current prices."""
+    exposures = portfolio_engine.exposures(current_user.id)
+    return _var_response(exposures, method, confidence, horizon_bars)
\ No newline at end of file
@@ -1,51 +1,68 @@
 from fastapi import APIRouter, Query
 from typing import List
 from app.schemas.stocks import StockPriceResponse, StockPricesResponse
-from app.services.background_tasks import get_cached_stock_price, get_cached_stock_prices
+from app.services.background_tasks import (
+    get_rendered_stock_price,
+    get_cached_stock_prices,
+    rendered_cache,
+    store_late_stock_price,
+    store_stock_prices
+)
 from app.services.stock_service import stock_service
+from app.services.watchlist import watchlist
+from app.services.tracing import span
+from app.services.serialization import RawJSONResponse, dumps, join_array
 
 router = APIRouter()
 
 @router.get("/prices", response_model=StockPricesResponse)
-def get_stock_prices(tickers: str = Query(..., description="Comma-separated list of stock tickers")):
-    """Get stock prices for specified tickers."""
-    # Parse tickers from query parameter
-    ticker_list = [ticker.strip().upper() for ticker in tickers.split(",")]
-    
-    # Try to get from cache first
-    cached_prices = get_cached_stock_prices()
-    results = []
-    
+async def get_stock_prices(tickers: str = Query(..., description="Comma-separated list of stock tickers")):
+    """Get stock prices for specified tickers.
+
+    Served from quotes pre-encoded by the cache, joined into one body.
+    Misses are fetched together without holding a worker thread; tickers
+    not priced by the request deadline are listed in "missing".
+    """
+    ticker_list = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers.split(",") if ticker.strip()))
+
+    rendered = {}
     for ticker in ticker_list:
-        cached_price = cached_prices.get(ticker)
-        if cached_price:
-            results.append(StockPriceResponse(**cached_price))
-        else:
-            # Fetch fresh data if not in cache
-            stock_data = stock_service.get_stock_price(ticker)
-            if stock_data:
-                results.append(StockPriceResponse(**stock_data))
-    
-    return StockPricesResponse(
-        stocks=results,
-        last_updated=None  # Will be set by the service
-    )
+        watchlist.record_request(ticker)
+        rendered[ticker] = get_rendered_stock_price(ticker)
+
+    misses = [ticker for ticker, fragment in rendered.items() if fragment is None]
+    if misses:
+        quotes = await stock_service.get_stock_prices_async(misses, on_late=store_late_stock_price)
+        store_stock_prices([quote for quote in quotes.values() if quote])
+        for ticker in misses:
+            rendered[ticker] = rendered_cache.get(("stock", ticker))
+
+    with span("serialize"):
+        return _stock_prices_response(
+            [fragment for fragment in rendered.values() if fragment is not None],
+            missing=[ticker for ticker, fragment in rendered.items() if fragment is None]
+        )
 
 @router.get("/price/{symbol}", response_model=StockPriceResponse)
-def get_stock_price(symbol: str):
+async def get_stock_price(symbol: str):
     """Get price for a specific stock symbol."""
+    symbol = symbol.upper()
+    watchlist.record_request(symbol)
+    
     # Try cache first
-    cached_price = get_cached_stock_price(symbol.upper())
+    rendered = get_rendered_stock_price(symbol)
     
-    if cached_price:
-        return StockPriceResponse(**cached_price)
+    if rendered is not None:
+        return RawJSONResponse(rendered)
     
-    # Fetch fresh data
-    stock_data = stock_service.get_stock_price(symbol)
+    # Fetch fresh data, up to the request deadline
+    stock_data = (await stock_service.get_stock_prices_async([symbol], on_late=store_late_stock_price))[symbol]
     
-    if not stock_data:
+    if stock_data:
+        store_stock_prices([stock_data])
+    else:
         return StockPriceResponse(
-            symbol=symbol.upper(),
+            symbol=symbol,
             price=0.0,
             change=0.0,
             change_percent=0.0,
@@ -54,15 +71,30 @@ def get_stock_price(symbol: str):
             last_updated=None
         )
     
-    return StockPriceResponse(**stock_data)
+    return RawJSONResponse(rendered_cache[("stock", stock_data["symbol"])])
 
 @router.get("/popular", response_model=StockPricesResponse)
-def get_popular_stocks():
+async def get_popular_stocks():
     """Get prices for popular stocks."""
-    popular_stocks = stock_service.get_popular_stocks()
-    stock_responses = [StockPriceResponse(**stock) for stock in popular_stocks]
+    popular_symbols = watchlist.popular("stock", limit=8)
+    cached_prices = get_cached_stock_prices()
+    
+    # Serve from cache and only fetch the symbols the refresher has not seen yet
+    missing = [symbol for symbol in popular_symbols if symbol not in cached_prices]
+    if missing:
+        quotes = await stock_service.get_stock_prices_async(missing, on_late=store_late_stock_price)
+        store_stock_prices([quote for quote in quotes.values() if quote])
     
-    return StockPricesResponse(
-        stocks=stock_responses,
-        last_updated=None
-    ) 
\ No newline at end of file
+    fragments = [rendered_cache[("stock", symbol)] for symbol in popular_symbols
+                 if ("stock", symbol) in rendered_cache]
+    
+    with span("serialize"):
+        return _stock_prices_response(
+            fragments, missing=[symbol for symbol in popular_symbols if ("stock", symbol) not in rendered_cache]
+        )
+
+def _stock_prices_response(fragments: List[bytes], missing: List[str] = ()) -> RawJSONResponse:
+    """StockPricesResponse body assembled from pre-encoded quotes."""
+    return RawJSONResponse(
+        b'{"stocks":' + join_array(fragments) + b',"last_updated":null,"missing":' + dumps(list(missing)) + b'}'
+    )
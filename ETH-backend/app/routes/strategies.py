@@ -0,0 +1,130 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List
+from app.database import get_db
+from app.models.user import User
+from app.models.strategy import Strategy
+from app.models.strategy_signal import StrategySignal
+from app.schemas.strategy import RunnerStatusResponse, StrategyCreate, StrategyResponse, StrategySignalResponse
+from app.services.strategies import strategy_runner
+from app.services.strategy_worker import normalize_params
+from app.utils.auth import get_current_active_user
+
+router = APIRouter()
+
+def _get_own_strategy(strategy_id: int, current_user: User, db: Session) -> Strategy:
+    strategy = db.query(Strategy).filter(
+        Strategy.id == strategy_id,
+        Strategy.user_id == current_user.id
+    ).first()
+    
+    if not strategy:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Strategy not found"
+        )
+    return strategy
+
+@router.post("/", response_model=StrategyResponse, status_code=status.HTTP_201_CREATED)
+def create_strategy(
+    strategy_data: StrategyCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Create a strategy that is evaluated on every candle close."""
+    try:
+        params = normalize_params(strategy_data.kind, strategy_data.params, strategy_runner.window)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    strategy = Strategy(
+        user_id=current_user.id,
+        name=strategy_data.name,
+        kind=strategy_data.kind,
+        symbol=strategy_data.symbol.strip().upper(),
+        asset_type=strategy_data.asset_type,
+        params=params
+    )
+    db.add(strategy)
+    db.commit()
+    db.refresh(strategy)
+    
+    strategy_runner.add(strategy)
+    return strategy
+
+@router.get("/", response_model=List[StrategyResponse])
+def list_strategies(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """List the current user's strategies, newest first."""
+    return db.query(Strategy).filter(Strategy.user_id == current_user.id) \
+        .order_by(Strategy.id.desc()).all()
+
+@router.get("/status", response_model=RunnerStatusResponse)
+def get_runner_status():
+    """Get the strategy runner's configuration and the outcome of the last bar."""
+    return {
+        "bar_seconds": strategy_runner.bar_seconds,
+        "workers": strategy_runner.workers,
+        "active_strategies": strategy_runner.count(),
+        "last_bar": strategy_runner.last_bar,
+    }
+
+@router.get("/{strategy_id}/signals", response_model=List[StrategySignalResponse])
+def list_signals(
+    strategy_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """List the signals a strategy produced, newest first."""
+    _get_own_strategy(strategy_id, current_user, db)
+    return db.query(StrategySignal).filter(StrategySignal.strategy_id == strategy_id) \
+        .order_by(StrategySignal.id.desc()).limit(limit).all()
+
+@router.post("/{strategy_id}/activate", response_model=StrategyResponse)
+def activate_strategy(
+    strategy_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Re-enable a paused or automatically disabled strategy."""
+    strategy = _get_own_strategy(strategy_id, current_user, db)
+    strategy.is_active = True
+    strategy.disabled_reason = None
+    db.commit()
+    db.refresh(strategy)
+    
+    strategy_runner.add(strategy)
+    return strategy
+
+@router.post("/{strategy_id}/deactivate", response_model=StrategyResponse)
+def deactivate_strategy(
+    strategy_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Pause a strategy without deleting it or its signals."""
+    strategy = _get_own_strategy(strategy_id, current_user, db)
+    strategy.is_active = False
+    db.commit()
+    db.refresh(strategy)
+    
+    strategy_runner.remove(strategy.id)
+    return strategy
+
+@router.delete("/{strategy_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_strategy(
+    strategy_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Delete one of the current user's strategies and its signals."""
+    strategy = _get_own_strategy(strategy_id, current_user, db)
+    strategy_runner.remove(strategy.id)
+    db.delete(strategy)
+    db.commit()
@@ -0,0 +1,57 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from app.services.events import event_bus
+
+router = APIRouter()
+
+# Comment line sent when no price arrived for this long, keeps proxies from closing the stream
+KEEPALIVE_SECONDS = 15
+
+@router.get("/prices")
+async def stream_prices(request: Request, symbols: Optional[str] = None):
+    """Stream price updates as server-sent events.
+
+    Optionally filtered by a comma-separated list of symbols.
+    """
+    wanted = {s.strip().upper() for s in symbols.split(",") if s.strip()} if symbols else None
+    queue = event_bus.subscribe_queue("price")
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if wanted and event["symbol"] not in wanted:
+                    continue
+                payload = {key: event[key] for key in ("kind", "symbol", "price", "ts")}
+                yield f"data: {json.dumps(payload, default=str)}\n\n"
+        finally:
+            event_bus.unsubscribe_queue("price", queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+@router.get("/arbitrage")
+async def stream_arbitrage(request: Request, min_return: float = 0.0):
+    """Stream newly detected arbitrage cycles as server-sent events."""
+    queue = event_bus.subscribe_queue("arbitrage")
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event["expected_return"] < min_return:
+                    continue
+                yield f"data: {json.dumps(event, default=str)}\n\n"
+        finally:
+            event_bus.unsubscribe_queue("arbitrage", queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -7,6 +7,9 @@ from app.schemas.wallet import WalletCreate, WalletResponse, BalanceResponse
 from app.utils.auth import get_current_active_user
 from app.utils.bitcoin import bitcoin_manager
 from app.services.background_tasks import get_cached_btc_price
+from app.services.portfolio import portfolio_engine
+from app.models.holding import Holding
+from app.schemas.portfolio import HoldingUpdate, HoldingResponse
 
 router = APIRouter()
 
@@ -56,6 +59,7 @@ def get_user_balance(
     wallet.balance_btc = bitcoin_manager.get_wallet_balance(wallet.wallet_address)
     wallet.balance_usd = wallet.balance_btc * btc_price_usd
     db.commit()
+    portfolio_engine.set_position(("wallet", wallet.id), user_id, "BTC", wallet.balance_btc)
     
     return BalanceResponse(
         user_id=user_id,
@@ -94,6 +98,7 @@ def create_wallet(
         db.add(wallet)
         db.commit()
         db.refresh(wallet)
+        portfolio_engine.set_position(("wallet", wallet.id), user_id, "BTC", wallet.balance_btc)
         
         return wallet
         
@@ -118,4 +123,68 @@ def get_user_wallets(
         )
     
     wallets = db.query(Wallet).filter(Wallet.user_id == user_id).all()
-    return wallets 
\ No newline at end of file
+    return wallets 
+
+def _ensure_own_user(user_id: int, current_user: User):
+    if current_user.id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this user's holdings"
+        )
+
+@router.get("/{user_id}/holdings", response_model=list[HoldingResponse])
+def get_user_holdings(
+    user_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get all asset holdings for a user."""
+    _ensure_own_user(user_id, current_user)
+    return db.query(Holding).filter(Holding.user_id == user_id).order_by(Holding.symbol).all()
+
+@router.put("/{user_id}/holdings/{symbol}", response_model=HoldingResponse)
+def set_user_holding(
+    user_id: int,
+    symbol: str,
+    holding_data: HoldingUpdate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Set the quantity held of an asset."""
+    _ensure_own_user(user_id, current_user)
+    symbol = symbol.strip().upper()
+    
+    holding = db.query(Holding).filter(Holding.user_id == user_id, Holding.symbol == symbol).first()
+    if not holding:
+        holding = Holding(user_id=user_id, symbol=symbol)
+        db.add(holding)
+    holding.asset_type = holding_data.asset_type
+    holding.quantity = holding_data.quantity
+    db.commit()
+    db.refresh(holding)
+    
+    portfolio_engine.set_position(("holding", holding.id), user_id, symbol, holding.quantity,
+                                  kind=holding.asset_type)
+    return holding
+
+@router.delete("/{user_id}/holdings/{symbol}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_user_holding(
+    user_id: int,
+    symbol: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Remove an asset from the user's holdings."""
+    _ensure_own_user(user_id, current_user)
+    
+    holding = db.query(Holding).filter(Holding.user_id == user_id,
+                                       Holding.symbol == symbol.strip().upper()).first()
+    if not holding:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Holding not found"
+        )
+    
+    portfolio_engine.remove_position(("holding", holding.id))
+    db.delete(holding)
+    db.commit()
\ No newline at end of file
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from datetime import datetime
+
+class AlertCreate(BaseModel):
+    symbol: str
+    direction: Literal["above", "below"]
+    threshold: float = Field(..., gt=0)
+
+class AlertResponse(BaseModel):
+    id: int
+    symbol: str
+    direction: str
+    threshold: float
+    is_active: bool
+    triggered_price: Optional[float] = None
+    triggered_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
\ No newline at end of file
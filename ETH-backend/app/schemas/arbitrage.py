@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from datetime import datetime
+
+class ArbitrageLeg(BaseModel):
+    action: Literal["trade", "transfer"]
+    venue: str
+    from_asset: str
+    to_asset: str
+    rate: float
+
+class ArbitrageCycle(BaseModel):
+    id: str
+    legs: List[ArbitrageLeg]
+    expected_return: float
+    venues: List[str]
+    detected_at: datetime
+    updated_at: datetime
+
+class ArbitrageStatus(BaseModel):
+    nodes: int
+    edges: int
+    venues: int
+    scans: int
+    last_scan_ms: Optional[float] = None
+    cycles: int
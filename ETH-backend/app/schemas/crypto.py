@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class CryptoPriceResponse(BaseModel):
@@ -9,7 +9,11 @@ class CryptoPriceResponse(BaseModel):
     change_24h: Optional[float] = None
     volume_24h: Optional[float] = None
     market_cap: Optional[float] = None
-    last_updated: datetime
+    best_bid: Optional[float] = None
+    best_ask: Optional[float] = None
+    bid_venue: Optional[str] = None
+    ask_venue: Optional[str] = None
+    last_updated: Optional[datetime] = None
 
 class BTCPriceResponse(BaseModel):
     price_usd: float
@@ -17,4 +21,36 @@ class BTCPriceResponse(BaseModel):
     change_24h: Optional[float] = None
     volume_24h: Optional[float] = None
     market_cap: Optional[float] = None
-    last_updated: datetime 
\ No newline at end of file
+    last_updated: datetime
+
+class OrderBookResponse(BaseModel):
+    symbol: str
+    synced: bool
+    best_bid: Optional[float] = None
+    best_ask: Optional[float] = None
+    spread: Optional[float] = None
+    age_seconds: float
+    bids: List[List[float]]
+    asks: List[List[float]]
+
+class VenueQuote(BaseModel):
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    last: Optional[float] = None
+    age_seconds: float
+
+class BestPriceResponse(BaseModel):
+    symbol: str
+    price: Optional[float] = None
+    best_bid: Optional[float] = None
+    bid_venue: Optional[str] = None
+    best_ask: Optional[float] = None
+    ask_venue: Optional[str] = None
+    venues: Dict[str, VenueQuote]
+
+class ExchangeStatus(BaseModel):
+    name: str
+    available: bool
+    polling: bool
+    p95_latency_ms: Optional[float] = None
+    symbols: int
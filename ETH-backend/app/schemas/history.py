@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class BackfillRequest(BaseModel):
+    symbols: List[str]
+    start: datetime
+    end: Optional[datetime] = None
+    interval: str = "1d"
+
+class BackfillStatusResponse(BaseModel):
+    symbols: int
+    interval: str
+    start: datetime
+    end: datetime
+    total_chunks: int
+    done_chunks: int
+    failed: int
+    bars_written: int
+    running: bool
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+class BarsResponse(BaseModel):
+    """Columnar candles; ts is the bar start in epoch seconds (UTC)."""
+    symbol: str
+    timeframe: str
+    downsampled: bool
+    ts: List[int]
+    open: List[float]
+    high: List[float]
+    low: List[float]
+    close: List[float]
+    volume: List[Optional[float]]
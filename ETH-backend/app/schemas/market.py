@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List
+
+class MarketSnapshotResponse(BaseModel):
+    symbols: List[str]
+    columns: Dict[str, List[Any]]
+    missing: List[str] = []
\ No newline at end of file
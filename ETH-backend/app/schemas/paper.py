@@ -0,0 +1,48 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import datetime
+
+class PaperOrderCreate(BaseModel):
+    symbol: str
+    side: Literal["buy", "sell"]
+    quantity: float = Field(..., gt=0)
+    order_type: Literal["market", "limit"] = "market"
+    limit_price: Optional[float] = Field(None, gt=0)
+
+class PaperOrderBatch(BaseModel):
+    orders: List[PaperOrderCreate] = Field(..., min_length=1, max_length=1000)
+
+class PaperOrderResponse(BaseModel):
+    id: int
+    strategy_id: Optional[int] = None
+    symbol: str
+    side: str
+    order_type: str
+    quantity: float
+    limit_price: Optional[float] = None
+    status: str
+    filled_quantity: float
+    average_price: Optional[float] = None
+    notional: float
+    fee: float
+    slippage_bps: Optional[float] = None
+    reason: Optional[str] = None
+    depth_time: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class PaperPosition(BaseModel):
+    symbol: str
+    quantity: float
+    cash_flow: float
+    fees: float
+    orders: int
+
+class DepthLevelsResponse(BaseModel):
+    symbol: str
+    fetched_at: datetime
+    age_seconds: float
+    bids: List[List[float]]
+    asks: List[List[float]]
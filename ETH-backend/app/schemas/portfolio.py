@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import datetime
+
+class HoldingUpdate(BaseModel):
+    quantity: float = Field(..., ge=0)
+    asset_type: Literal["crypto", "stock"] = "stock"
+
+class HoldingResponse(BaseModel):
+    id: int
+    symbol: str
+    asset_type: str
+    quantity: float
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class EquityPoint(BaseModel):
+    captured_at: datetime
+    total_value: float
+
+    class Config:
+        from_attributes = True
+
+class EquityHistoryResponse(BaseModel):
+    user_id: int
+    points: List[EquityPoint]
\ No newline at end of file
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+class SymbolVolatility(BaseModel):
+    volatility: Optional[float] = None
+    annualized_volatility: Optional[float] = None
+    observations: int
+
+class VolatilityResponse(BaseModel):
+    bar_seconds: float
+    version: int
+    symbols: Dict[str, SymbolVolatility]
+
+class CorrelationResponse(BaseModel):
+    version: int
+    symbols: List[str]
+    matrix: List[List[Optional[float]]]
+
+class VaRResponse(BaseModel):
+    method: str
+    confidence: float
+    horizon_bars: int
+    exposure: float
+    value_at_risk: Optional[float] = None
+    exposures: Dict[str, float]
\ No newline at end of file
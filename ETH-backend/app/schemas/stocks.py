@@ -9,8 +9,12 @@ class StockPriceResponse(BaseModel):
     change_percent: Optional[float] = None
     volume: Optional[int] = None
     market_cap: Optional[float] = None
-    last_updated: datetime
+    name: Optional[str] = None
+    sector: Optional[str] = None
+    last_updated: Optional[datetime] = None
 
 class StockPricesResponse(BaseModel):
     stocks: List[StockPriceResponse]
-    last_updated: datetime 
\ No newline at end of file
+    last_updated: Optional[datetime] = None
+    # Requested symbols that could not be priced in time
+    missing: List[str] = [] 
\ No newline at end of file
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Literal, Optional
+from datetime import datetime
+
+class StrategyCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    kind: Literal["sma_cross", "rsi", "breakout"]
+    symbol: str
+    asset_type: Literal["crypto", "stock"] = "crypto"
+    params: Dict[str, Any] = {}
+
+class StrategyResponse(BaseModel):
+    id: int
+    name: str
+    kind: str
+    symbol: str
+    asset_type: str
+    params: Dict[str, Any]
+    is_active: bool
+    disabled_reason: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class StrategySignalResponse(BaseModel):
+    id: int
+    strategy_id: int
+    symbol: str
+    side: str
+    price: float
+    quantity: float
+    reason: Optional[str] = None
+    bar_time: datetime
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class RunnerStatusResponse(BaseModel):
+    bar_seconds: float
+    workers: int
+    active_strategies: int
+    last_bar: Optional[Dict[str, Any]] = None
@@ -0,0 +1,262 @@
+import queue
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from app.database import SessionLocal
+from app.models.alert import PriceAlert
+from app.services.crypto_service import crypto_service
+from app.services.events import event_bus
+from app.services.watchlist import watchlist
+
+ABOVE = "above"
+BELOW = "below"
+DIRECTIONS = (ABOVE, BELOW)
+
+# Alert ids are marked triggered in the database in chunks of this size
+DELIVERY_BATCH_SIZE = 1000
+
+
+class ThresholdIndex:
+    """Alert ids kept sorted by threshold in two parallel compact arrays."""
+
+    def __init__(self):
+        self.thresholds = array("d")
+        self.ids = array("q")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, threshold: float, alert_id: int):
+        position = bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(position, threshold)
+        self.ids.insert(position, alert_id)
+
+    def bulk_load(self, entries: List[Tuple[float, int]]):
+        """Replace the contents with entries, sorting once instead of inserting."""
+        entries = sorted(entries)
+        self.thresholds = array("d", (threshold for threshold, _ in entries))
+        self.ids = array("q", (alert_id for _, alert_id in entries))
+
+    def remove(self, threshold: float, alert_id: int) -> bool:
+        lo = bisect_left(self.thresholds, threshold)
+        hi = bisect_right(self.thresholds, threshold)
+        for position in range(lo, hi):
+            if self.ids[position] == alert_id:
+                del self.thresholds[position]
+                del self.ids[position]
+                return True
+        return False
+
+    def pop_range(self, lo: int, hi: int) -> List[int]:
+        """Remove and return the ids at sorted positions [lo, hi)."""
+        if hi <= lo:
+            return []
+        triggered = self.ids[lo:hi].tolist()
+        del self.thresholds[lo:hi]
+        del self.ids[lo:hi]
+        return triggered
+
+
+class AlertIndex:
+    """Per-symbol threshold indexes for "above" and "below" alerts.
+
+    On each price update only the alerts whose threshold lies between the
+    previous and the new price are touched: two binary searches per side
+    find the range, so a tick costs O(log n + k) for k triggered alerts.
+    """
+
+    def __init__(self):
+        self._above: Dict[str, ThresholdIndex] = {}
+        self._below: Dict[str, ThresholdIndex] = {}
+        self._last_price: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _side(self, direction: str) -> Dict[str, ThresholdIndex]:
+        return self._above if direction == ABOVE else self._below
+
+    def add(self, symbol: str, direction: str, threshold: float, alert_id: int):
+        with self._lock:
+            side = self._side(direction)
+            index = side.get(symbol)
+            if index is None:
+                index = side[symbol] = ThresholdIndex()
+            index.add(threshold, alert_id)
+
+    def bulk_load(self, alerts: List[Tuple[str, str, float, int]]):
+        """Replace all alerts with (symbol, direction, threshold, id) tuples."""
+        grouped: Dict[Tuple[str, str], List[Tuple[float, int]]] = {}
+        for symbol, direction, threshold, alert_id in alerts:
+            grouped.setdefault((symbol, direction), []).append((threshold, alert_id))
+        above, below = {}, {}
+        for (symbol, direction), entries in grouped.items():
+            index = ThresholdIndex()
+            index.bulk_load(entries)
+            (above if direction == ABOVE else below)[symbol] = index
+        with self._lock:
+            self._above, self._below = above, below
+
+    def remove(self, symbol: str, direction: str, threshold: float, alert_id: int) -> bool:
+        with self._lock:
+            index = self._side(direction).get(symbol)
+            return index.remove(threshold, alert_id) if index is not None else False
+
+    def count(self) -> int:
+        with self._lock:
+            return sum(len(index) for index in self._above.values()) + \
+                sum(len(index) for index in self._below.values())
+
+    def evaluate(self, symbol: str, price: float) -> List[int]:
+        """Record a new price and remove and return the alerts it triggers.
+
+        "above" alerts trigger when the price crosses up to or through the
+        threshold (old < threshold <= new), "below" alerts when it crosses
+        down (new <= threshold < old). The first price seen for a symbol
+        only sets the reference.
+        """
+        with self._lock:
+            old = self._last_price.get(symbol)
+            self._last_price[symbol] = price
+            if old is None or price == old:
+                return []
+            if price > old:
+                index = self._above.get(symbol)
+                if index is None:
+                    return []
+                return index.pop_range(bisect_right(index.thresholds, old),
+                                       bisect_right(index.thresholds, price))
+            index = self._below.get(symbol)
+            if index is None:
+                return []
+            return index.pop_range(bisect_left(index.thresholds, price),
+                                   bisect_left(index.thresholds, old))
+
+
+class AlertEngine:
+    """Evaluates alerts on every published price and delivers them off-thread.
+
+    The price path only does the index lookup and enqueues the triggered
+    ids; a delivery worker marks them triggered in the database and hands
+    each alert to the notifiers (by default an "alert" event on the bus).
+    """
+
+    def __init__(self, index: AlertIndex = None, session_factory=SessionLocal):
+        self.index = index or AlertIndex()
+        self.session_factory = session_factory
+        self.notifiers: List[Callable[[dict], None]] = [self._publish]
+        # symbol -> active alerts; symbols with alerts are pinned in the watchlist
+        self._symbols: Dict[str, int] = {}
+        self._symbols_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    def start(self):
+        """Load active alerts, subscribe to prices and start the delivery worker."""
+        if self._worker is not None:
+            return
+        self.load()
+        event_bus.subscribe("price", self.on_price)
+        self._worker = threading.Thread(target=self._deliver_loop, daemon=True, name="alert-delivery")
+        self._worker.start()
+        print(f"Alert engine started with {self.index.count()} active alerts")
+
+    def stop(self):
+        event_bus.unsubscribe("price", self.on_price)
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout=5)
+            self._worker = None
+
+    def load(self):
+        db = self.session_factory()
+        try:
+            rows = db.query(PriceAlert.symbol, PriceAlert.direction, PriceAlert.threshold, PriceAlert.id) \
+                .filter(PriceAlert.is_active == True).all()  # noqa: E712
+            self.index.bulk_load([tuple(row) for row in rows])
+        finally:
+            db.close()
+        for symbol, *_ in rows:
+            self._track(symbol, 1)
+
+    def add(self, alert: PriceAlert):
+        self.index.add(alert.symbol, alert.direction, alert.threshold, alert.id)
+        self._track(alert.symbol, 1)
+
+    def remove(self, alert: PriceAlert):
+        if self.index.remove(alert.symbol, alert.direction, alert.threshold, alert.id):
+            self._track(alert.symbol, -1)
+
+    def _track(self, symbol: str, delta: int):
+        """Pin symbol while it has active alerts, so its price keeps being refreshed."""
+        with self._symbols_lock:
+            count = self._symbols.get(symbol, 0) + delta
+            if count > 0:
+                self._symbols[symbol] = count
+            else:
+                self._symbols.pop(symbol, None)
+        if delta > 0 and count == delta:
+            watchlist.pin(symbol, self._kind(symbol), owner="alerts")
+        elif count <= 0:
+            watchlist.unpin(symbol, self._kind(symbol), owner="alerts")
+
+    @staticmethod
+    def _kind(symbol: str) -> str:
+        return "crypto" if crypto_service.is_crypto(symbol) else "stock"
+
+    def on_price(self, event: dict):
+        triggered = self.index.evaluate(event["symbol"], event["price"])
+        if triggered:
+            self._track(event["symbol"], -len(triggered))
+            self._queue.put((event["symbol"], event["price"], datetime.utcnow(), triggered))
+
+    def _deliver_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._deliver(*item)
+            except Exception as e:
+                print(f"Error delivering alerts: {str(e)}")
+
+    def _deliver(self, symbol: str, price: float, triggered_at: datetime, alert_ids: List[int]):
+        db = self.session_factory()
+        try:
+            delivered = []
+            for i in range(0, len(alert_ids), DELIVERY_BATCH_SIZE):
+                batch = alert_ids[i:i + DELIVERY_BATCH_SIZE]
+                db.query(PriceAlert).filter(PriceAlert.id.in_(batch)).update(
+                    {"is_active": False, "triggered_price": price, "triggered_at": triggered_at},
+                    synchronize_session=False
+                )
+                delivered.extend(
+                    db.query(PriceAlert.id, PriceAlert.user_id, PriceAlert.direction, PriceAlert.threshold)
+                    .filter(PriceAlert.id.in_(batch)).all()
+                )
+            db.commit()
+        finally:
+            db.close()
+
+        for alert_id, user_id, direction, threshold in delivered:
+            notification = {
+                "alert_id": alert_id,
+                "user_id": user_id,
+                "symbol": symbol,
+                "direction": direction,
+                "threshold": threshold,
+                "price": price,
+                "triggered_at": triggered_at,
+            }
+            for notify in self.notifiers:
+                try:
+                    notify(notification)
+                except Exception as e:
+                    print(f"Error in alert notifier: {str(e)}")
+
+    def _publish(self, notification: dict):
+        event_bus.publish("alert", notification)
+
+
+# Global instance
+alert_engine = AlertEngine()
\ No newline at end of file
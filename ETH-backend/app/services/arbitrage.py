@@ -0,0 +1,294 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.services.events import event_bus
+from app.services.exchanges import EXCHANGE_QUOTE_MAX_AGE_SECONDS
+from app.services.metrics import arbitrage_scan_duration
+
+load_dotenv()
+
+# Taker fee charged on every trade leg
+ARBITRAGE_FEE_RATE = float(os.getenv("ARBITRAGE_FEE_RATE", "0.001"))
+# Link the same asset on different venues, at this fractional transfer cost
+ARBITRAGE_CROSS_VENUE = os.getenv("ARBITRAGE_CROSS_VENUE", "true").lower() == "true"
+ARBITRAGE_TRANSFER_COST = float(os.getenv("ARBITRAGE_TRANSFER_COST", "0.0"))
+# Cycles returning less than this after fees are not reported
+ARBITRAGE_MIN_RETURN = float(os.getenv("ARBITRAGE_MIN_RETURN", "0.0"))
+# Longer cycles are detected but not reported
+ARBITRAGE_MAX_LEGS = int(os.getenv("ARBITRAGE_MAX_LEGS", "6"))
+# Slack for float rounding when comparing path weights
+EPSILON = 1e-12
+
+Node = Tuple[str, str]
+
+
+class CrossRateGraph:
+    """Conversion rates between (venue, asset) nodes, checked for negative cycles.
+
+    An edge u -> v converting at rate r after fees weighs -log(r), so a
+    cycle whose rates multiply to more than 1 is a negative cycle. The graph
+    keeps potentials p with w(u, v) + p[u] - p[v] >= 0 on every edge, which
+    proves there is none. Raising a weight cannot break that, so after an
+    update only the edges now below their potential difference are relaxed,
+    and the search spreads from their heads through the edges it improves.
+    Relaxing into an ancestor in the search tree closes a negative cycle;
+    its closing edge is set aside for the rest of the pass.
+    """
+
+    def __init__(self):
+        self.index: Dict[Node, int] = {}
+        self.labels: List[Node] = []
+        self.out: List[Dict[int, float]] = []
+        self.potential: List[float] = []
+        self.edges = 0
+
+    def node(self, venue: str, asset: str) -> int:
+        key = (venue, asset)
+        node = self.index.get(key)
+        if node is None:
+            node = self.index[key] = len(self.labels)
+            self.labels.append(key)
+            self.out.append({})
+            self.potential.append(0.0)
+        return node
+
+    def set_weight(self, u: int, v: int, weight: float):
+        if v not in self.out[u]:
+            self.edges += 1
+        self.out[u][v] = weight
+
+    def violated(self, u: int, v: int) -> bool:
+        return self.potential[u] + self.out[u][v] < self.potential[v] - EPSILON
+
+    def cycle_weight(self, cycle: List[int]) -> float:
+        return sum(self.out[u][cycle[(i + 1) % len(cycle)]] for i, u in enumerate(cycle))
+
+    def relax(self, seeds: Iterable[Tuple[int, int]]) -> List[List[int]]:
+        """Restore the potentials after the seed edges changed; return the negative cycles found."""
+        potential = self.potential
+        parent: Dict[int, int] = {}
+        closed = set()
+        cycles = []
+        queue = deque()
+        queued = set()
+        limit = len(self.labels)
+
+        def try_edge(u: int, v: int, weight: float):
+            candidate = potential[u] + weight
+            if candidate >= potential[v] - EPSILON or (u, v) in closed:
+                return
+            # Walk up from u; reaching v means u -> v closes a cycle
+            path, x = [u], parent.get(u)
+            while x is not None and x != v and len(path) <= limit:
+                path.append(x)
+                x = parent.get(x)
+            if x == v:
+                path.append(v)
+                cycles.append(path[::-1])
+                closed.add((u, v))
+                return
+            potential[v] = candidate
+            parent[v] = u
+            if v not in queued:
+                queued.add(v)
+                queue.append(v)
+
+        for u, v in seeds:
+            try_edge(u, v, self.out[u][v])
+        while queue:
+            u = queue.popleft()
+            queued.discard(u)
+            for v, weight in self.out[u].items():
+                try_edge(u, v, weight)
+        return cycles
+
+
+class ArbitrageScanner:
+    """Triangular and cross-venue arbitrage over the exchange registry's tickers.
+
+    Every "exchange_tickers" event updates that venue's edges: selling base
+    for quote at the bid and buying base with quote at the ask, both net of
+    ARBITRAGE_FEE_RATE, plus transfer edges between venues listing the same
+    asset. Only the edges of the update are re-checked, so a scan costs
+    what the update touched rather than a Bellman-Ford pass over the whole
+    graph. Profitable cycles are kept for the API and new ones are
+    published as "arbitrage" events.
+    """
+
+    def __init__(self, fee_rate: float = ARBITRAGE_FEE_RATE, cross_venue: bool = ARBITRAGE_CROSS_VENUE,
+                 transfer_cost: float = ARBITRAGE_TRANSFER_COST, min_return: float = ARBITRAGE_MIN_RETURN,
+                 max_legs: int = ARBITRAGE_MAX_LEGS, max_age: float = EXCHANGE_QUOTE_MAX_AGE_SECONDS):
+        self.fee_rate = fee_rate
+        self.cross_venue = cross_venue
+        self.transfer_weight = -math.log(1 - transfer_cost)
+        self.min_return = min_return
+        self.max_legs = max_legs
+        self.max_age = max_age
+        self.graph = CrossRateGraph()
+        # asset -> nodes of that asset on each venue
+        self._by_asset: Dict[str, List[int]] = {}
+        # (u, v) -> monotonic time of the quote behind the edge
+        self._updated: Dict[Tuple[int, int], float] = {}
+        # canonical node tuple -> reported cycle
+        self._cycles: Dict[Tuple[int, ...], dict] = {}
+        self._lock = threading.Lock()
+        self.scans = 0
+        self.last_scan_seconds: Optional[float] = None
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        event_bus.subscribe("exchange_tickers", self.on_tickers)
+
+    def stop(self):
+        self._running = False
+        event_bus.unsubscribe("exchange_tickers", self.on_tickers)
+
+    def on_tickers(self, event: dict):
+        self.update(event["venue"], event["tickers"])
+
+    def _node(self, venue: str, asset: str, changed: List[Tuple[int, int]]) -> int:
+        graph = self.graph
+        known = (venue, asset) in graph.index
+        node = graph.node(venue, asset)
+        if not known:
+            peers = self._by_asset.setdefault(asset, [])
+            if self.cross_venue:
+                for peer in peers:
+                    for u, v in ((node, peer), (peer, node)):
+                        graph.set_weight(u, v, self.transfer_weight)
+                        changed.append((u, v))
+            peers.append(node)
+        return node
+
+    def update(self, venue: str, tickers: Dict[str, dict]) -> List[dict]:
+        """Apply one venue's tickers keyed by pair; return the cycles that appeared."""
+        start = time.perf_counter()
+        now = time.monotonic()
+        keep = 1 - self.fee_rate
+        with self._lock:
+            changed: List[Tuple[int, int]] = []
+            for pair, ticker in tickers.items():
+                bid, ask = (ticker or {}).get("bid"), (ticker or {}).get("ask")
+                if not bid or not ask or bid <= 0 or ask <= 0 or "/" not in pair:
+                    continue
+                base, quote = pair.split("/", 1)
+                u = self._node(venue, base, changed)
+                v = self._node(venue, quote, changed)
+                self.graph.set_weight(u, v, -math.log(bid * keep))
+                self.graph.set_weight(v, u, -math.log(keep / ask))
+                changed.append((u, v))
+                changed.append((v, u))
+            for edge in changed:
+                self._updated[edge] = now
+            seeds = [(u, v) for u, v in changed if self.graph.violated(u, v)]
+            found = self.graph.relax(seeds) if seeds else []
+            appeared = self._reconcile(set(changed), found)
+            self.scans += 1
+            self.last_scan_seconds = time.perf_counter() - start
+        arbitrage_scan_duration.observe(self.last_scan_seconds)
+        for cycle in appeared:
+            event_bus.publish("arbitrage", cycle)
+        return appeared
+
+    def _reconcile(self, changed: set, found: List[List[int]]) -> List[dict]:
+        # Known cycles through updated edges are re-priced or dropped
+        for key in list(self._cycles):
+            edges = {(key[i], key[(i + 1) % len(key)]) for i in range(len(key))}
+            if edges & changed:
+                cycle = self._describe(list(key))
+                if cycle is None:
+                    del self._cycles[key]
+                else:
+                    cycle["detected_at"] = self._cycles[key]["detected_at"]
+                    self._cycles[key] = cycle
+        appeared = []
+        for nodes in found:
+            if len(nodes) > self.max_legs:
+                continue
+            key = self._canonical(nodes)
+            if key in self._cycles:
+                continue
+            cycle = self._describe(list(key))
+            if cycle is not None:
+                self._cycles[key] = cycle
+                appeared.append(cycle)
+        return appeared
+
+    @staticmethod
+    def _canonical(nodes: List[int]) -> Tuple[int, ...]:
+        start = nodes.index(min(nodes))
+        return tuple(nodes[start:] + nodes[:start])
+
+    def _describe(self, nodes: List[int]) -> Optional[dict]:
+        expected_return = math.exp(-self.graph.cycle_weight(nodes)) - 1
+        if expected_return <= self.min_return + EPSILON:
+            return None
+        labels = self.graph.labels
+        legs = []
+        for i, u in enumerate(nodes):
+            v = nodes[(i + 1) % len(nodes)]
+            (from_venue, from_asset), (to_venue, to_asset) = labels[u], labels[v]
+            if from_asset == to_asset and legs and legs[-1]["action"] == "transfer":
+                # A detour over a third venue; the direct transfer is the same cycle
+                return None
+            legs.append({
+                "action": "transfer" if from_venue != to_venue else "trade",
+                "venue": from_venue if from_venue == to_venue else f"{from_venue}->{to_venue}",
+                "from_asset": from_asset,
+                "to_asset": to_asset,
+                "rate": math.exp(-self.graph.out[u][v]),
+            })
+        if legs[0]["action"] == legs[-1]["action"] == "transfer":
+            return None
+        now = datetime.utcnow()
+        return {
+            "id": "|".join(f"{venue}:{asset}" for venue, asset in (labels[u] for u in nodes)),
+            "legs": legs,
+            "expected_return": expected_return,
+            "venues": sorted({labels[u][0] for u in nodes}),
+            "detected_at": now,
+            "updated_at": now,
+        }
+
+    def _fresh(self, key: Tuple[int, ...], now: float) -> bool:
+        """Whether every trade leg's quote is recent; transfer legs have no quote."""
+        labels = self.graph.labels
+        for i, u in enumerate(key):
+            v = key[(i + 1) % len(key)]
+            if labels[u][0] == labels[v][0] and now - self._updated.get((u, v), 0) > self.max_age:
+                return False
+        return True
+
+    def cycles(self, min_return: float = 0.0, venue: Optional[str] = None) -> List[dict]:
+        """Profitable cycles whose quotes are all fresh, best first."""
+        now = time.monotonic()
+        with self._lock:
+            cycles = [
+                cycle for key, cycle in self._cycles.items()
+                if cycle["expected_return"] >= min_return and self._fresh(key, now)
+                and (venue is None or venue in cycle["venues"])
+            ]
+        return sorted(cycles, key=lambda cycle: cycle["expected_return"], reverse=True)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "nodes": len(self.graph.labels),
+                "edges": self.graph.edges,
+                "venues": len({venue for venue, _ in self.graph.labels}),
+                "scans": self.scans,
+                "last_scan_ms": round(self.last_scan_seconds * 1000, 3) if self.last_scan_seconds is not None else None,
+                "cycles": len(self._cycles),
+            }
+
+
+# Global instance
+arbitrage_scanner = ArbitrageScanner()
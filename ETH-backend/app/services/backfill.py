@@ -0,0 +1,233 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from app.services.history import history_store, bars_from_frame, HistoryStore
+from app.services.providers import ProviderUnavailable
+from app.services.stock_service import stock_service
+
+load_dotenv()
+
+BACKFILL_CHECKPOINT_FILE = os.getenv("BACKFILL_CHECKPOINT_FILE", "data/backfill_checkpoint.json")
+# Parallel download workers; the yahoo token bucket still caps the request rate
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+# Symbols per yfinance download and calendar days per chunk
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "20"))
+BACKFILL_CHUNK_DAYS = int(os.getenv("BACKFILL_CHUNK_DAYS", "366"))
+BACKFILL_MAX_RETRIES = 5
+
+# Intraday intervals Yahoo only serves for recent dates, with smaller chunks
+INTRADAY_CHUNK_DAYS = {"1m": 7, "5m": 30, "15m": 30, "30m": 30, "1h": 365}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+class BackfillJob:
+    """Download OHLCV history for many symbols into the local history store.
+
+    The symbol x date space is split into chunks of BACKFILL_BATCH_SIZE
+    symbols by BACKFILL_CHUNK_DAYS days. Chunks are fetched in parallel
+    through the shared yahoo rate limit, written straight to the history
+    store, and recorded in a JSON checkpoint so an interrupted run resumes
+    with the chunks that are not done yet.
+    """
+
+    def __init__(self, symbols: List[str], start: datetime, end: Optional[datetime] = None,
+                 interval: str = "1d", workers: int = BACKFILL_WORKERS,
+                 batch_size: int = BACKFILL_BATCH_SIZE, chunk_days: Optional[int] = None,
+                 checkpoint_path: str = BACKFILL_CHECKPOINT_FILE, store: HistoryStore = None,
+                 service=None):
+        self.symbols = sorted({symbol.strip().upper() for symbol in symbols if symbol.strip()})
+        self.start = _naive_utc(start)
+        self.end = _naive_utc(end) if end else datetime.utcnow()
+        self.interval = interval
+        self.workers = workers
+        self.batch_size = batch_size
+        self.chunk_days = chunk_days or INTRADAY_CHUNK_DAYS.get(interval, BACKFILL_CHUNK_DAYS)
+        self.checkpoint_path = checkpoint_path
+        self.store = store or history_store
+        self.service = service or stock_service
+
+        self.done = set()
+        self.failed: Dict[str, str] = {}
+        self.bars_written = 0
+        self.total_chunks = len(self.chunks())
+        self.started_at = None
+        self.finished_at = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def chunks(self) -> List[dict]:
+        """All (symbol batch, date range) chunks, oldest dates first.
+
+        Chunk boundaries are multiples of chunk_days since the epoch rather
+        than offsets from start, so a run resumed on a later day (with a
+        later default start and end) keys its inner chunks exactly like the
+        checkpoint; only the clipped first and last chunks are fetched again.
+        """
+        chunks = []
+        step = timedelta(days=self.chunk_days)
+        boundary = _EPOCH + timedelta(days=(self.start - _EPOCH).days // self.chunk_days * self.chunk_days)
+        chunk_start = self.start
+        while chunk_start < self.end:
+            boundary += step
+            chunk_end = min(boundary, self.end)
+            for i in range(0, len(self.symbols), self.batch_size):
+                chunks.append({
+                    "symbols": self.symbols[i:i + self.batch_size],
+                    "start": chunk_start,
+                    "end": chunk_end,
+                })
+            chunk_start = chunk_end
+        return chunks
+
+    def _key(self, symbol: str, chunk: dict) -> str:
+        return f"{self.interval}:{symbol}:{chunk['start'].date()}:{chunk['end'].date()}"
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path) as f:
+                state = json.load(f)
+            self.done = set(state.get("done", []))
+        except (OSError, ValueError) as e:
+            print(f"Error reading backfill checkpoint, starting over: {str(e)}")
+
+    def _save_checkpoint(self):
+        """Write the checkpoint atomically; called with self._lock held."""
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"done": sorted(self.done), "failed": self.failed,
+                       "updated_at": datetime.utcnow().isoformat()}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _run_chunk(self, chunk: dict):
+        pending = [symbol for symbol in chunk["symbols"] if self._key(symbol, chunk) not in self.done]
+        if not pending or self._stop.is_set():
+            return
+
+        for attempt in range(BACKFILL_MAX_RETRIES):
+            try:
+                frames = self.service.fetch_history(
+                    pending, chunk["start"], chunk["end"], interval=self.interval, timeout=30
+                )
+                break
+            except Exception as e:
+                if attempt == BACKFILL_MAX_RETRIES - 1 or self._stop.is_set():
+                    with self._lock:
+                        for symbol in pending:
+                            self.failed[self._key(symbol, chunk)] = str(e)
+                        self._save_checkpoint()
+                    return
+                # Open circuit or throttled: back off and let the breaker recover
+                delay = 30 if isinstance(e, ProviderUnavailable) else 2 ** attempt
+                self._stop.wait(delay)
+
+        written = 0
+        for symbol, frame in frames.items():
+            written += self.store.write(symbol, self.interval, bars_from_frame(frame))
+
+        with self._lock:
+            self.bars_written += written
+            for symbol in pending:
+                # Symbols without data in this range (not listed yet, delisted) are done too
+                key = self._key(symbol, chunk)
+                self.done.add(key)
+                self.failed.pop(key, None)
+            self._save_checkpoint()
+
+    def run(self, progress=None) -> dict:
+        """Run until every chunk is done or failed; progress(job) is called per chunk."""
+        self.started_at = datetime.utcnow()
+        self._load_checkpoint()
+        chunks = self.chunks()
+
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backfill")
+        try:
+            futures = [executor.submit(self._run_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error in backfill chunk: {str(e)}")
+                if progress:
+                    progress(self)
+                if self._stop.is_set():
+                    break
+        except BaseException:
+            # e.g. Ctrl-C in the CLI: let in-flight chunks finish and checkpoint
+            self._stop.set()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.finished_at = datetime.utcnow()
+        return self.status()
+
+    def stop(self):
+        """Ask a running job to stop; finished chunks stay checkpointed."""
+        self._stop.set()
+
+    def status(self) -> dict:
+        with self._lock:
+            done_chunks = sum(
+                1 for chunk in self.chunks()
+                if all(self._key(symbol, chunk) in self.done for symbol in chunk["symbols"])
+            )
+            return {
+                "symbols": len(self.symbols),
+                "interval": self.interval,
+                "start": self.start.isoformat(),
+                "end": self.end.isoformat(),
+                "total_chunks": self.total_chunks,
+                "done_chunks": done_chunks,
+                "failed": len(self.failed),
+                "bars_written": self.bars_written,
+                "running": self.started_at is not None and self.finished_at is None,
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            }
+
+
+_current_job: Optional[BackfillJob] = None
+_current_thread: Optional[threading.Thread] = None
+
+
+def start_backfill(symbols: List[str], start: datetime, end: Optional[datetime] = None,
+                   interval: str = "1d") -> BackfillJob:
+    """Run a backfill in a background thread of the API process.
+
+    Only one job runs at a time; a second call while one is running
+    returns the running job.
+    """
+    global _current_job, _current_thread
+
+    if _current_thread is not None and _current_thread.is_alive():
+        return _current_job
+    _current_job = BackfillJob(symbols, start, end, interval=interval)
+    _current_thread = threading.Thread(target=_current_job.run, daemon=True, name="backfill")
+    _current_thread.start()
+    return _current_job
+
+
+def get_backfill_job() -> Optional[BackfillJob]:
+    return _current_job
+
+
+def stop_backfill():
+    if _current_job is not None:
+        _current_job.stop()
+    if _current_thread is not None:
+        _current_thread.join(timeout=5)
\ No newline at end of file
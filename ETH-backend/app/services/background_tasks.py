@@ -1,51 +1,206 @@
 import asyncio
+import gzip
+import json
+import os
 import threading
 import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+from dotenv import load_dotenv
 from app.services.crypto_service import crypto_service
 from app.services.stock_service import stock_service
+from app.services.watchlist import watchlist, BASE_REFRESH_SECONDS, MAX_REFRESH_SECONDS
+from app.services.metrics import registry, background_refresh_duration, cache_lookups_total
+from app.services.tracing import span
+from app.services.events import event_bus
+from app.services.serialization import render_model, dumps
+from app.schemas.crypto import BTCPriceResponse, CryptoPriceResponse
+from app.schemas.stocks import StockPriceResponse
+
+load_dotenv()
+
+# How often the refresher wakes up to check which symbols are due
+REFRESH_TICK_SECONDS = 5
+# Upper bound on stock symbols refreshed per tick
+REFRESH_BUDGET = 50
+# Cached quotes older than this are counted as stale
+STALE_AFTER_SECONDS = MAX_REFRESH_SECONDS + 60
+# The cache is written here periodically and at shutdown, and restored on startup
+PRICE_CACHE_SNAPSHOT_FILE = os.getenv("PRICE_CACHE_SNAPSHOT_FILE", "data/price_cache.json.gz")
+PRICE_CACHE_SNAPSHOT_SECONDS = float(os.getenv("PRICE_CACHE_SNAPSHOT_SECONDS", "60"))
+# Quotes older than this are not restored
+PRICE_CACHE_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("PRICE_CACHE_SNAPSHOT_MAX_AGE_SECONDS", "900"))
 
 # Global cache for prices
 price_cache: Dict[str, Any] = {
     "btc_price": None,
     "stock_prices": {},
+    "crypto_prices": {},
     "last_updated": None
 }
 
+# JSON bytes of each cached quote, rendered once per update: (kind, symbol) -> bytes
+rendered_cache: Dict[Tuple[str, str], bytes] = {}
+
+# Asset-neutral row per cached quote for /market/snapshot: (kind, symbol) -> row
+snapshot_rows: Dict[Tuple[str, str], dict] = {}
+
 # Background task control
 background_task_running = False
 background_thread = None
 
-def update_prices():
-    """Update all prices in the cache."""
-    global price_cache
+_last_btc_refresh = 0.0
+_last_snapshot = 0.0
+# Whether the cache was warmed from a snapshot at startup
+_restored = False
+
+def _publish_price(kind: str, symbol: str, price: float, data: dict):
+    event_bus.publish("price", {
+        "kind": kind,
+        "symbol": symbol,
+        "price": price,
+        "ts": data["last_updated"],
+        "data": data,
+    })
+
+def _crypto_snapshot_row(crypto: dict) -> dict:
+    price = crypto["price_usd"]
+    change = crypto.get("change_24h") or 0.0
+    opened = price - change
+    return {
+        "kind": "crypto",
+        "price": price,
+        "change": change,
+        "change_percent": change / opened * 100 if opened else 0.0,
+        "volume": crypto.get("volume_24h"),
+        "market_cap": crypto.get("market_cap"),
+        "last_updated": crypto["last_updated"].isoformat(),
+    }
+
+def _stock_snapshot_row(stock: dict) -> dict:
+    return {
+        "kind": "stock",
+        "price": stock["price"],
+        "change": stock.get("change"),
+        "change_percent": stock.get("change_percent"),
+        "volume": stock.get("volume"),
+        "market_cap": stock.get("market_cap"),
+        "last_updated": stock["last_updated"].isoformat(),
+    }
+
+# Rendered first so a reader never finds a quote without its bytes
+def _cache_btc_price(btc_data):
+    rendered_cache[("btc", "BTC")] = render_model(BTCPriceResponse, btc_data)
+    snapshot_rows[("crypto", "BTC")] = _crypto_snapshot_row(btc_data)
+    price_cache["btc_price"] = btc_data
+
+def _cache_stock_price(stock):
+    rendered_cache[("stock", stock["symbol"])] = render_model(StockPriceResponse, stock)
+    snapshot_rows[("stock", stock["symbol"])] = _stock_snapshot_row(stock)
+    price_cache["stock_prices"][stock["symbol"]] = stock
+
+def _cache_crypto_price(crypto):
+    rendered_cache[("crypto", crypto["symbol"])] = render_model(CryptoPriceResponse, crypto)
+    snapshot_rows[("crypto", crypto["symbol"])] = _crypto_snapshot_row(crypto)
+    price_cache["crypto_prices"][crypto["symbol"]] = crypto
+
+def store_btc_price(btc_data):
+    """Put a freshly fetched BTC quote into the cache."""
+    if btc_data.get("fallback"):
+        # The placeholder from an outage must not reach the cache, alerts, bars or strategies
+        return
+    _cache_btc_price(btc_data)
+    _publish_price("crypto", "BTC", btc_data["price_usd"], btc_data)
+
+def store_stock_prices(stock_data):
+    """Put freshly fetched stock quotes into the cache."""
+    for stock in stock_data:
+        _cache_stock_price(stock)
+        watchlist.record_price(stock["symbol"], stock["price"])
+        _publish_price("stock", stock["symbol"], stock["price"], stock)
+
+def store_crypto_prices(crypto_data):
+    """Put freshly fetched crypto quotes into the cache."""
+    for crypto in crypto_data:
+        _cache_crypto_price(crypto)
+        watchlist.record_price(crypto["symbol"], crypto["price_usd"], kind="crypto")
+        # BTC price events come from the BTC feed alone, so subscribers see one series
+        if crypto["symbol"] != "BTC":
+            _publish_price("crypto", crypto["symbol"], crypto["price_usd"], crypto)
+
+def store_late_stock_price(symbol: str, quote: Optional[dict]):
+    """Cache a stock quote that arrived after its request's deadline."""
+    if quote:
+        store_stock_prices([quote])
+
+def store_late_crypto_price(symbol: str, quote: Optional[dict]):
+    """Cache a crypto quote that arrived after its request's deadline."""
+    if quote:
+        store_crypto_prices([quote])
+
+def update_prices(force: bool = False):
+    """Update the prices that are due for a refresh in the cache.
+
+    Stock and crypto symbols come from the watchlist, which refreshes the
+    symbols clients actually request more often than idle ones. With
+    force=True every tracked symbol is refreshed.
+    """
+    global price_cache, _last_btc_refresh
     
+    start = time.perf_counter()
     try:
         # Update BTC price
-        btc_data = crypto_service.get_btc_price()
-        price_cache["btc_price"] = btc_data
+        if force or time.monotonic() - _last_btc_refresh >= BASE_REFRESH_SECONDS:
+            btc_data = crypto_service.get_btc_price()
+            store_btc_price(btc_data)
+            _last_btc_refresh = time.monotonic()
         
-        # Update popular stock prices
-        popular_stocks = ["AAPL", "TSLA", "GOOGL", "MSFT", "AMZN"]
-        stock_data = stock_service.get_multiple_stock_prices(popular_stocks)
+        # Update the stock symbols that are due
+        if force:
+            due_stocks = watchlist.tracked("stock")
+        else:
+            due_stocks = watchlist.due_symbols("stock", budget=REFRESH_BUDGET)
+        if due_stocks:
+            stock_data = stock_service.get_multiple_stock_prices(due_stocks)
+            store_stock_prices(stock_data)
         
-        for stock in stock_data:
-            price_cache["stock_prices"][stock["symbol"]] = stock
+        # Update the crypto symbols that are due, in one bulk Binance call
+        if force:
+            due_cryptos = watchlist.tracked("crypto")
+        else:
+            due_cryptos = watchlist.due_symbols("crypto", budget=REFRESH_BUDGET)
+        if due_cryptos:
+            store_crypto_prices(crypto_service.get_crypto_prices(due_cryptos))
         
-        price_cache["last_updated"] = datetime.utcnow()
-        print(f"Prices updated at {price_cache['last_updated']}")
+        # Forget symbols nobody asks for anymore
+        for kind, symbol in watchlist.evict_idle():
+            price_cache[f"{kind}_prices"].pop(symbol, None)
+            rendered_cache.pop((kind, symbol), None)
+            snapshot_rows.pop((kind, symbol), None)
+        
+        if force or due_stocks or due_cryptos:
+            price_cache["last_updated"] = datetime.utcnow()
+            print(f"Prices updated at {price_cache['last_updated']} "
+                  f"({len(due_stocks)} stocks, {len(due_cryptos)} cryptos)")
+            event_bus.publish("prices_refreshed", {"ts": price_cache["last_updated"]})
         
     except Exception as e:
         print(f"Error updating prices: {str(e)}")
+    finally:
+        background_refresh_duration.observe(time.perf_counter() - start)
 
 def background_price_updater():
-    """Background task that updates prices every 60 seconds."""
+    """Background task that refreshes due prices every few seconds."""
     global background_task_running
     
+    global _last_snapshot
+    
     while background_task_running:
         update_prices()
-        time.sleep(60)  # Wait 60 seconds
+        if time.monotonic() - _last_snapshot >= PRICE_CACHE_SNAPSHOT_SECONDS:
+            save_cache_snapshot()
+            _last_snapshot = time.monotonic()
+        time.sleep(REFRESH_TICK_SECONDS)
 
 def start_background_tasks():
     """Start the background price update task."""
@@ -57,8 +212,10 @@ def start_background_tasks():
         background_thread.start()
         print("Background price update task started")
         
-        # Initial price update
-        update_prices()
+        # Initial price update; a cache restored from a snapshot is revalidated
+        # by the background task instead, REFRESH_BUDGET symbols per tick
+        if not _restored:
+            update_prices(force=True)
 
 def stop_background_tasks():
     """Stop the background price update task."""
@@ -67,15 +224,130 @@ def stop_background_tasks():
     background_task_running = False
     if background_thread:
         background_thread.join(timeout=5)
+    save_cache_snapshot()
     print("Background price update task stopped")
 
+def _encode_quote(quote: dict) -> dict:
+    return {**quote, "last_updated": quote["last_updated"].isoformat()}
+
+def _decode_quote(quote: dict) -> dict:
+    return {**quote, "last_updated": datetime.fromisoformat(quote["last_updated"])}
+
+def save_cache_snapshot(path: str = PRICE_CACHE_SNAPSHOT_FILE):
+    """Write the cached quotes and watchlist demand to path, atomically."""
+    if not path:
+        return
+    btc_price = price_cache.get("btc_price")
+    snapshot = {
+        "saved_at": datetime.utcnow().isoformat(),
+        "btc_price": _encode_quote(btc_price) if btc_price else None,
+        "stock_prices": [_encode_quote(quote) for quote in list(price_cache["stock_prices"].values())],
+        "crypto_prices": [_encode_quote(quote) for quote in list(price_cache["crypto_prices"].values())],
+        "watchlist": watchlist.export_state(),
+    }
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wb") as f:
+            f.write(dumps(snapshot))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error writing price cache snapshot: {str(e)}")
+
+def load_cache_snapshot(path: str = PRICE_CACHE_SNAPSHOT_FILE) -> int:
+    """Warm the cache from a snapshot before serving; returns the number of quotes restored.
+
+    Restored quotes keep their original last_updated and are not published
+    as price events. Every restored symbol is due for a refresh at once, so
+    the background task revalidates them on its first ticks.
+    """
+    global _restored
+    
+    if not path or not os.path.exists(path):
+        return 0
+    try:
+        with gzip.open(path, "rb") as f:
+            snapshot = json.loads(f.read())
+    except (OSError, ValueError) as e:
+        print(f"Error reading price cache snapshot, starting cold: {str(e)}")
+        return 0
+
+    now = datetime.utcnow()
+    offline_seconds = max(0.0, (now - datetime.fromisoformat(snapshot["saved_at"])).total_seconds())
+    watchlist.restore_state(snapshot.get("watchlist", []), offline_seconds)
+
+    restored = []
+    for quotes, cache in (
+        ([snapshot["btc_price"]] if snapshot.get("btc_price") else [], _cache_btc_price),
+        (snapshot.get("stock_prices", []), _cache_stock_price),
+        (snapshot.get("crypto_prices", []), _cache_crypto_price),
+    ):
+        for quote in map(_decode_quote, quotes):
+            if (now - quote["last_updated"]).total_seconds() <= PRICE_CACHE_SNAPSHOT_MAX_AGE_SECONDS:
+                cache(quote)
+                restored.append(quote["last_updated"])
+    if restored:
+        _restored = True
+        price_cache["last_updated"] = max(restored)
+    print(f"Restored {len(restored)} cached quotes from {path} (saved {offline_seconds:.0f}s ago)")
+    return len(restored)
+
+def _quote_age(entry) -> float:
+    return (datetime.utcnow() - entry["last_updated"]).total_seconds()
+
+def _record_lookup(cache: str, entry):
+    if entry is None:
+        result = "miss"
+    elif _quote_age(entry) > STALE_AFTER_SECONDS:
+        result = "stale"
+    else:
+        result = "hit"
+    cache_lookups_total.labels(cache, result).inc()
+
 def get_cached_btc_price():
     """Get cached BTC price."""
-    return price_cache.get("btc_price")
+    with span("cache"):
+        entry = price_cache.get("btc_price")
+        _record_lookup("btc", entry)
+    return entry
 
 def get_cached_stock_price(symbol: str):
     """Get cached stock price for a symbol."""
-    return price_cache.get("stock_prices", {}).get(symbol.upper())
+    with span("cache"):
+        entry = price_cache.get("stock_prices", {}).get(symbol.upper())
+        _record_lookup("stock", entry)
+    return entry
+
+def get_rendered_btc_price() -> Optional[bytes]:
+    """Get the cached BTC price as pre-encoded JSON bytes."""
+    with span("cache"):
+        entry = price_cache.get("btc_price")
+        _record_lookup("btc", entry)
+        return rendered_cache.get(("btc", "BTC")) if entry else None
+
+def get_rendered_stock_price(symbol: str) -> Optional[bytes]:
+    """Get the cached quote for a stock symbol as pre-encoded JSON bytes."""
+    with span("cache"):
+        symbol = symbol.upper()
+        entry = price_cache.get("stock_prices", {}).get(symbol)
+        _record_lookup("stock", entry)
+        return rendered_cache.get(("stock", symbol)) if entry else None
+
+def get_rendered_crypto_price(symbol: str) -> Optional[bytes]:
+    """Get the cached quote for a cryptocurrency as pre-encoded JSON bytes."""
+    with span("cache"):
+        symbol = symbol.upper()
+        entry = price_cache.get("crypto_prices", {}).get(symbol)
+        _record_lookup("crypto", entry)
+        return rendered_cache.get(("crypto", symbol)) if entry else None
+
+def get_snapshot_row(kind: str, symbol: str) -> Optional[dict]:
+    """Get the asset-neutral snapshot row for a cached quote."""
+    row = snapshot_rows.get((kind, symbol))
+    cache_lookups_total.labels(kind, "hit" if row else "miss").inc()
+    return row
 
 def get_cached_stock_prices():
     """Get all cached stock prices."""
@@ -83,4 +355,21 @@ def get_cached_stock_prices():
 
 def get_last_updated():
     """Get when prices were last updated."""
-    return price_cache.get("last_updated") 
\ No newline at end of file
+    return price_cache.get("last_updated") 
+
+def _collect_quote_ages():
+    """Age in seconds of the freshest cached quote per symbol."""
+    ages = {}
+    btc_price = price_cache.get("btc_price")
+    if btc_price:
+        ages[("BTC",)] = _quote_age(btc_price)
+    for symbol, stock in list(price_cache.get("stock_prices", {}).items()):
+        ages[(symbol,)] = _quote_age(stock)
+    for symbol, crypto in list(price_cache.get("crypto_prices", {}).items()):
+        ages[(symbol,)] = _quote_age(crypto)
+    return ages
+
+registry.gauge(
+    "price_quote_age_seconds", "Age of the freshest cached quote per symbol", ("symbol",),
+    collect=_collect_quote_ages
+)
\ No newline at end of file
@@ -0,0 +1,312 @@
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from app.services.events import event_bus
+from app.services.history import history_store, HistoryStore, BAR_DTYPE
+from app.services.metrics import bar_late_ticks_total
+
+load_dotenv()
+
+# Supported timeframes, named like the backfill intervals
+TIMEFRAME_SECONDS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "1d": 86400}
+BAR_TIMEFRAMES = [tf.strip() for tf in os.getenv("BAR_TIMEFRAMES", "1m,5m,15m,1h,1d").split(",")
+                  if tf.strip() in TIMEFRAME_SECONDS]
+# Ticks this late still update their bar; a bar closes this long after its end
+BAR_GRACE_SECONDS = float(os.getenv("BAR_GRACE_SECONDS", "5"))
+# Closed bars kept in memory per symbol and timeframe
+BAR_HISTORY = int(os.getenv("BAR_HISTORY", "500"))
+# Closed bars of these timeframes are also written to the history store
+BAR_STORE_TIMEFRAMES = [tf.strip() for tf in os.getenv("BAR_STORE_TIMEFRAMES", "1h,1d").split(",")
+                        if tf.strip() in TIMEFRAME_SECONDS]
+BAR_STORE_FLUSH_SECONDS = float(os.getenv("BAR_STORE_FLUSH_SECONDS", "300"))
+# How often bars past their grace window are closed when no ticks arrive
+BAR_CLOSE_TICK_SECONDS = 1.0
+# Rows a ring starts with; it doubles on demand up to BAR_HISTORY
+BAR_RING_INITIAL = 16
+# How often bars of symbols that are no longer tracked are dropped
+BAR_PRUNE_SECONDS = 60
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch_seconds(moment) -> float:
+    if isinstance(moment, datetime):
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return (moment - _EPOCH).total_seconds()
+    return float(moment)
+
+
+class OpenBar:
+    """OHLC of one bar still accepting ticks; open and close follow tick time, not arrival order."""
+
+    __slots__ = ("start", "open", "high", "low", "close", "ticks", "first_ts", "last_ts")
+
+    def __init__(self, start: int, ts: float, price: float):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.ticks = 1
+        self.first_ts = self.last_ts = ts
+
+    def add(self, ts: float, price: float):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        if ts < self.first_ts:
+            self.first_ts = ts
+            self.open = price
+        if ts >= self.last_ts:
+            self.last_ts = ts
+            self.close = price
+        self.ticks += 1
+
+    def row(self) -> tuple:
+        return (self.start, self.open, self.high, self.low, self.close, np.nan)
+
+
+class BarRing:
+    """The last closed bars of one symbol and timeframe.
+
+    Storage starts small and doubles until it holds capacity bars, so a
+    symbol that closed a handful of bars costs a handful of rows.
+    """
+
+    __slots__ = ("bars", "count", "capacity")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.bars = np.empty(min(BAR_RING_INITIAL, capacity), dtype=BAR_DTYPE)
+        self.count = 0
+
+    def append(self, row: tuple):
+        size = len(self.bars)
+        if self.count == size and size < self.capacity:
+            # Not wrapped yet, so the rows are in order
+            grown = np.empty(min(2 * size, self.capacity), dtype=BAR_DTYPE)
+            grown[:size] = self.bars
+            self.bars = grown
+            size = len(grown)
+        self.bars[self.count % size] = row
+        self.count += 1
+
+    def latest(self, limit: int) -> np.ndarray:
+        """Up to limit bars, oldest first."""
+        capacity = len(self.bars)
+        n = min(limit, self.count, capacity)
+        end = self.count % capacity
+        indices = np.arange(end - n, end) % capacity
+        return self.bars[indices]
+
+
+class BarAggregator:
+    """Streaming OHLC bars at several timeframes from the price events.
+
+    Each tick updates the open bar of every timeframe in place: one dict
+    lookup per timeframe. Bars close on event time: a watermark follows the
+    newest tick timestamp and keeps advancing with the clock while no ticks
+    arrive. A bar closes BAR_GRACE_SECONDS after its end, so late or
+    out-of-order ticks inside that window still count; later ones are
+    dropped and counted. Closed bars are kept in a ring per symbol and
+    timeframe, published as "bar" events, and for BAR_STORE_TIMEFRAMES
+    written to the history store in batches.
+
+    With a symbols source, bars of symbols that are no longer tracked are
+    dropped every BAR_PRUNE_SECONDS.
+
+    Price events carry quotes rather than trades, so bars have no volume.
+    """
+
+    def __init__(self, timeframes: List[str] = None, grace_seconds: float = BAR_GRACE_SECONDS,
+                 history: int = BAR_HISTORY, store: HistoryStore = None,
+                 store_timeframes: List[str] = None, store_flush_seconds: float = BAR_STORE_FLUSH_SECONDS):
+        self.timeframes = [(tf, TIMEFRAME_SECONDS[tf]) for tf in (timeframes or BAR_TIMEFRAMES)]
+        self.grace = grace_seconds
+        self.history = history
+        self.store = store or history_store
+        self.store_timeframes = set(BAR_STORE_TIMEFRAMES if store_timeframes is None else store_timeframes)
+        self.store_flush_seconds = store_flush_seconds
+        # (symbol, timeframe, bar start) -> open bar
+        self._open: Dict[Tuple[str, str, int], OpenBar] = {}
+        # close deadline -> open bars due then; deadlines in a heap
+        self._due: Dict[float, List[Tuple[str, str, int]]] = {}
+        self._deadlines: List[float] = []
+        self._closed: Dict[Tuple[str, str], BarRing] = {}
+        self._kinds: Dict[str, str] = {}
+        self._pending_store: Dict[Tuple[str, str], List[tuple]] = defaultdict(list)
+        self._watermark = 0.0
+        self._watermark_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.symbols_source = None
+        self.late_ticks = 0
+
+    def start(self, symbols_source=None):
+        """Aggregate price events; symbols_source() returns the symbols whose bars are kept."""
+        if self._thread is not None:
+            return
+        self.symbols_source = symbols_source
+        self._stop.clear()
+        event_bus.subscribe("price", self.on_price)
+        self._thread = threading.Thread(target=self._close_loop, daemon=True, name="bar-close")
+        self._thread.start()
+
+    def stop(self):
+        event_bus.unsubscribe("price", self.on_price)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush_store()
+
+    def on_price(self, event: dict):
+        self.add_tick(event["symbol"], _epoch_seconds(event["ts"]), event["price"], event.get("kind"))
+
+    def add_tick(self, symbol: str, ts: float, price: float, kind: Optional[str] = None):
+        """Apply one price to the open bar of every timeframe."""
+        if not price:
+            return
+        with self._lock:
+            if ts > self._watermark:
+                self._watermark = ts
+                self._watermark_at = time.monotonic()
+            watermark = self._watermark
+            if kind:
+                self._kinds[symbol] = kind
+            for name, seconds in self.timeframes:
+                start = int(ts // seconds) * seconds
+                key = (symbol, name, start)
+                bar = self._open.get(key)
+                if bar is not None:
+                    bar.add(ts, price)
+                    continue
+                deadline = start + seconds + self.grace
+                if deadline <= watermark:
+                    self.late_ticks += 1
+                    bar_late_ticks_total.labels(name).inc()
+                    continue
+                self._open[key] = OpenBar(start, ts, price)
+                due = self._due.get(deadline)
+                if due is None:
+                    due = self._due[deadline] = []
+                    heapq.heappush(self._deadlines, deadline)
+                due.append(key)
+        if self._deadlines and self._deadlines[0] <= watermark:
+            self.close_due()
+
+    def watermark(self) -> float:
+        """Event time: the newest tick timestamp plus the wall time since it arrived."""
+        return self._watermark + (time.monotonic() - self._watermark_at) if self._watermark else 0.0
+
+    def close_due(self, watermark: Optional[float] = None) -> int:
+        """Close every bar whose grace window has passed; returns the number closed."""
+        closed = []
+        with self._lock:
+            watermark = self.watermark() if watermark is None else watermark
+            while self._deadlines and self._deadlines[0] <= watermark:
+                for key in self._due.pop(heapq.heappop(self._deadlines)):
+                    bar = self._open.pop(key)
+                    symbol, name, _ = key
+                    row = bar.row()
+                    ring = self._closed.get((symbol, name))
+                    if ring is None:
+                        ring = self._closed[(symbol, name)] = BarRing(self.history)
+                    ring.append(row)
+                    if name in self.store_timeframes:
+                        self._pending_store[(symbol, name)].append(row)
+                    closed.append((symbol, name, bar))
+        for symbol, name, bar in closed:
+            event_bus.publish("bar", {
+                "symbol": symbol,
+                "kind": self._kinds.get(symbol),
+                "timeframe": name,
+                "ts": datetime.utcfromtimestamp(bar.start),
+                "open": bar.open,
+                "high": bar.high,
+                "low": bar.low,
+                "close": bar.close,
+                "ticks": bar.ticks,
+            })
+        return len(closed)
+
+    def _close_loop(self):
+        last_flush = last_prune = time.monotonic()
+        while not self._stop.wait(BAR_CLOSE_TICK_SECONDS):
+            try:
+                self.close_due()
+                if time.monotonic() - last_flush >= self.store_flush_seconds:
+                    self.flush_store()
+                    last_flush = time.monotonic()
+                if self.symbols_source is not None and time.monotonic() - last_prune >= BAR_PRUNE_SECONDS:
+                    self.prune(self.symbols_source())
+                    last_prune = time.monotonic()
+            except Exception as e:
+                print(f"Error closing bars: {str(e)}")
+
+    def prune(self, tracked) -> int:
+        """Drop the closed bars of symbols not in tracked that have no open bar; returns the number dropped."""
+        tracked = set(tracked)
+        with self._lock:
+            active = {symbol for symbol, _, _ in self._open}
+            dropped = [key for key in self._closed if key[0] not in tracked and key[0] not in active]
+            for key in dropped:
+                del self._closed[key]
+            for symbol in [symbol for symbol in self._kinds if symbol not in tracked and symbol not in active]:
+                del self._kinds[symbol]
+        return len(dropped)
+
+    def flush_store(self):
+        """Write the closed bars waiting for the history store."""
+        with self._lock:
+            pending, self._pending_store = self._pending_store, defaultdict(list)
+        for (symbol, name), rows in pending.items():
+            try:
+                self.store.write(symbol, name, np.array(rows, dtype=BAR_DTYPE))
+            except Exception as e:
+                print(f"Error storing {name} bars for {symbol}: {str(e)}")
+
+    def open_bars(self, symbol: str, timeframe: str) -> np.ndarray:
+        """The bars of symbol still accepting ticks: the current one and possibly the previous."""
+        seconds = TIMEFRAME_SECONDS[timeframe]
+        with self._lock:
+            start = int(self.watermark() // seconds) * seconds
+            rows = [bar.row() for bar in (self._open.get((symbol, timeframe, candidate))
+                                          for candidate in (start - seconds, start)) if bar is not None]
+        return np.array(rows, dtype=BAR_DTYPE)
+
+    def closed_count(self, symbol: str, timeframe: str) -> int:
+        """Bars of symbol closed so far at timeframe; changes whenever the closed bars do."""
+        ring = self._closed.get((symbol, timeframe))
+        return ring.count if ring is not None else 0
+
+    def bars(self, symbol: str, timeframe: str, limit: int = BAR_HISTORY, include_open: bool = True) -> np.ndarray:
+        """Recent bars oldest first; the still open bars come last when include_open is set."""
+        with self._lock:
+            ring = self._closed.get((symbol, timeframe))
+            closed = ring.latest(limit) if ring is not None else np.empty(0, dtype=BAR_DTYPE)
+        current = self.open_bars(symbol, timeframe) if include_open else None
+        if current is None or not len(current):
+            return closed
+        return np.concatenate([closed, current])[-limit:]
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "timeframes": [name for name, _ in self.timeframes],
+                "symbols": len(self._kinds),
+                "open_bars": len(self._open),
+                "closed_series": len(self._closed),
+                "late_ticks": self.late_ticks,
+                "watermark": datetime.utcfromtimestamp(self.watermark()) if self._watermark else None,
+            }
+
+
+# Global instance
+bar_aggregator = BarAggregator()
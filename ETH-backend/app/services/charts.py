@@ -0,0 +1,128 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from app.services.bars import bar_aggregator, BarAggregator, TIMEFRAME_SECONDS
+from app.services.downsample import bucket_ohlc
+from app.services.history import history_store, HistoryStore, BAR_DTYPE, _epoch
+
+load_dotenv()
+
+# Candles returned by chart endpoints when the request does not say
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "300"))
+# Downsampled ranges kept in memory
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "256"))
+
+
+def _utc(ts: int) -> datetime:
+    return datetime.utcfromtimestamp(ts)
+
+
+class ChartCache:
+    """Downsampled candles per symbol, timeframe, range and point count.
+
+    A range is read from the history store plus the aggregator's closed
+    bars, bucketed down to max_points and kept until the store is written
+    or (for ranges reaching into the live bars) another bar closes. The
+    open bar is folded into the last candle on every read, so cached
+    charts still move with each tick.
+    """
+
+    def __init__(self, store: HistoryStore = None, aggregator: BarAggregator = None, size: int = CHART_CACHE_SIZE):
+        self.store = store or history_store
+        self.aggregator = aggregator or bar_aggregator
+        self.size = size
+        # key -> (version, candles, downsampled)
+        self._entries: "OrderedDict[tuple, Tuple[tuple, np.ndarray, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def candles(self, symbol: str, timeframe: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                limit: int = CHART_MAX_POINTS, max_points: int = CHART_MAX_POINTS) -> Tuple[np.ndarray, bool]:
+        """Bars in [start, end), or the last `limit` bars without start, at most max_points of them.
+
+        Returns (candles, whether they were downsampled).
+        """
+        start = _epoch(start) if start else None
+        end = _epoch(end) if end else None
+        key = (symbol, timeframe, start, end, None if start is not None else limit, max_points)
+        # Closing bars only matters to ranges that reach into the in-memory ones
+        oldest_live = self.aggregator.watermark() - self.aggregator.history * TIMEFRAME_SECONDS[timeframe]
+        live = end is None or end > oldest_live
+        version = (self.store.version(symbol, timeframe),
+                   self.aggregator.closed_count(symbol, timeframe) if live else None)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            closed = self._closed(symbol, timeframe, start, end, limit)
+            downsampled = len(closed) > max_points
+            entry = (version, bucket_ohlc(closed, max_points) if downsampled else closed, downsampled)
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        _, candles, downsampled = entry
+        return self._with_open(candles, downsampled, symbol, timeframe, start, end, limit), downsampled
+
+    def _closed(self, symbol: str, timeframe: str, start: Optional[int], end: Optional[int], limit: int) -> np.ndarray:
+        seconds = TIMEFRAME_SECONDS[timeframe]
+        live = self.aggregator.bars(symbol, timeframe, self.aggregator.history, include_open=False)
+        if start is not None:
+            live = live[(live["ts"] >= start) & ((live["ts"] < end) if end is not None else True)]
+        elif end is not None:
+            live = live[live["ts"] < end]
+        # Stored bars only fill in before the live ones
+        stored_end = int(live["ts"][0]) if len(live) else end
+        if start is not None:
+            stored = self.store.read(symbol, timeframe, start=_utc(start),
+                                     end=_utc(stored_end) if stored_end is not None else None)
+            return np.concatenate([stored, live]) if len(stored) else live
+        missing = limit - len(live)
+        if missing <= 0:
+            return live[-limit:]
+        # Look back a little more than the bars needed before reading everything
+        anchor = stored_end if stored_end is not None else int(self.aggregator.watermark()) or None
+        stored = np.empty(0, dtype=BAR_DTYPE)
+        if anchor is not None:
+            stored = self.store.read(symbol, timeframe, start=_utc(anchor - 2 * missing * seconds), end=_utc(anchor))
+        if len(stored) < missing:
+            stored = self.store.read(symbol, timeframe, end=_utc(stored_end) if stored_end is not None else None)
+        return np.concatenate([stored[-missing:], live]) if len(stored) else live
+
+    def _with_open(self, candles: np.ndarray, downsampled: bool, symbol: str, timeframe: str,
+                   start: Optional[int], end: Optional[int], limit: int) -> np.ndarray:
+        current = self.aggregator.open_bars(symbol, timeframe)
+        if len(candles):
+            current = current[current["ts"] > candles["ts"][-1]]
+        if start is not None:
+            current = current[current["ts"] >= start]
+        if end is not None:
+            current = current[current["ts"] < end]
+        if not len(current):
+            return candles
+        if not downsampled:
+            merged = np.concatenate([candles, current])
+            return merged if start is not None else merged[-limit:]
+        # The last candle already spans several bars; extend it rather than add a narrow one
+        candles = candles.copy()
+        candles["high"][-1] = max(candles["high"][-1], current["high"].max())
+        candles["low"][-1] = min(candles["low"][-1], current["low"].min())
+        candles["close"][-1] = current["close"][-1]
+        return candles
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Global instance
+chart_cache = ChartCache()
@@ -1,90 +1,288 @@
 import requests
 import ccxt
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 import os
 from dotenv import load_dotenv
+from app.services.providers import (
+    UpstreamProvider,
+    ProviderUnavailable,
+    hedged_call,
+    UPSTREAM_TIMEOUT_SECONDS
+)
+from app.services.scheduler import upstream_scheduler, REQUEST_DEADLINE_SECONDS
+from app.services.exchanges import exchange_registry, ExchangeRegistry
+from app.services.recorder import market_recorder
+from app.services.tracing import span
 
 load_dotenv()
 
+# Upper bound on how long a BTC price lookup may take across all providers
+BTC_PRICE_SLO_SECONDS = float(os.getenv("BTC_PRICE_SLO_SECONDS", "2.0"))
+# After a failed Binance markets load, symbols are classified from SYMBOL_MAPPING this long
+MARKETS_RETRY_SECONDS = 30
+
+# Map common symbols to Binance symbols
+SYMBOL_MAPPING = {
+    "ETH": "ETH/USDT",
+    "BTC": "BTC/USDT",
+    "ADA": "ADA/USDT",
+    "DOT": "DOT/USDT",
+    "LINK": "LINK/USDT"
+}
+
 class CryptoService:
-    def __init__(self):
-        self.binance = ccxt.binance()
+    def __init__(self, exchange=None, http=None, exchanges: ExchangeRegistry = None):
+        # Clients are injectable so benchmarks can run against local fakes
+        self.exchanges = exchanges or exchange_registry
+        # Binance is the primary venue; share the registry's pooled client and breaker
+        venue = self.exchanges.venues.get("binance")
+        self.binance = exchange or (venue.client if venue else ccxt.binance({"timeout": int(UPSTREAM_TIMEOUT_SECONDS * 1000)}))
+        self.binance_provider = venue.provider if venue else UpstreamProvider("binance")
+        self.http = http or requests.Session()
         self.coingecko_base_url = "https://api.coingecko.com/api/v3"
+        self.coingecko_provider = UpstreamProvider("coingecko")
+        self._markets_retry_at = 0.0
+    
+    def _fetch_btc_from_binance(self) -> dict:
+        upstream_scheduler.acquire("binance", timeout=self.binance_provider.timeout)
+        ticker = self.binance.fetch_ticker('BTC/USDT')
+        market_recorder.record("binance", "fetch_ticker", ticker, {"symbol": "BTC/USDT"})
+        return self.parse_btc_ticker(ticker)
+    
+    def parse_btc_ticker(self, ticker: dict, fetched_at: Optional[datetime] = None) -> dict:
+        """Build the BTC quote from a raw Binance ticker."""
+        return {
+            "price_usd": float(ticker['last']),
+            "price_btc": 1.0,
+            "change_24h": float(ticker.get('change') or 0),
+            "volume_24h": float(ticker.get('quoteVolume') or 0),
+            "last_updated": fetched_at or datetime.utcnow()
+        }
+    
+    def _fetch_btc_from_coingecko(self) -> dict:
+        upstream_scheduler.acquire("coingecko", timeout=self.coingecko_provider.timeout)
+        response = self.http.get(f"{self.coingecko_base_url}/simple/price", params={
+            "ids": "bitcoin",
+            "vs_currencies": "usd",
+            "include_24hr_change": "true",
+            "include_24hr_vol": "true"
+        }, timeout=self.coingecko_provider.timeout)
+        response.raise_for_status()
+        data = response.json()
+        market_recorder.record("coingecko", "simple_price", data, {"ids": "bitcoin"})
+        return self.parse_coingecko_price(data)
+    
+    def parse_coingecko_price(self, data: dict, fetched_at: Optional[datetime] = None) -> dict:
+        """Build the BTC quote from a raw CoinGecko /simple/price response."""
+        price = data["bitcoin"]["usd"]
+        # CoinGecko reports a percentage; change_24h is in USD like the Binance ticker's change
+        percent = data["bitcoin"].get("usd_24h_change") or 0
+        return {
+            "price_usd": price,
+            "price_btc": 1.0,
+            "change_24h": price * percent / (100 + percent) if percent > -100 else 0.0,
+            "volume_24h": data["bitcoin"].get("usd_24h_vol", 0),
+            "last_updated": fetched_at or datetime.utcnow()
+        }
     
     def get_btc_price(self) -> dict:
-        """Get current BTC price from multiple sources."""
+        """Get current BTC price from multiple sources.
+
+        Binance is asked first; if it has not answered by its p95 latency a
+        hedged request goes to CoinGecko and the first answer wins. Providers
+        with an open circuit are skipped, and the whole lookup is bounded by
+        BTC_PRICE_SLO_SECONDS. Concurrent callers share one in-flight lookup.
+        The answer is repriced from the best venue like every other coin, so
+        the BTC feed and the crypto quotes publish the same price.
+        """
         try:
-            # Try Binance first
-            ticker = self.binance.fetch_ticker('BTC/USDT')
-            price_usd = float(ticker['last'])
+            with span("upstream.btc"):
+                quote = upstream_scheduler.run("btc_price", lambda: hedged_call([
+                    (self.binance_provider, self._fetch_btc_from_binance),
+                    (self.coingecko_provider, self._fetch_btc_from_coingecko),
+                ], deadline=BTC_PRICE_SLO_SECONDS))
+            return self.with_best_venue("BTC", quote)
+        except ProviderUnavailable as e:
+            print(f"Error fetching BTC price: {str(e)}")
+            quote = self.with_best_venue("BTC", None)
+            if quote is not None:
+                return quote
             
+            # Final fallback - mock data, flagged so it is never cached or published
             return {
-                "price_usd": price_usd,
+                "price_usd": 45000.0,
                 "price_btc": 1.0,
-                "change_24h": float(ticker.get('change', 0)),
-                "volume_24h": float(ticker.get('quoteVolume', 0)),
-                "last_updated": datetime.utcnow()
+                "change_24h": 0.0,
+                "volume_24h": 0.0,
+                "last_updated": datetime.utcnow(),
+                "fallback": True
             }
+    
+    def _fetch_tickers(self, symbols: List[str]) -> Dict[str, dict]:
+        """Bulk-fetch Binance tickers for symbols, plus BTC/USDT for price_btc."""
+        markets = self.load_markets()
+        
+        pairs = {}
+        for symbol in symbols:
+            pair = SYMBOL_MAPPING.get(symbol, f"{symbol}/USDT")
+            if pair in markets:
+                pairs[symbol] = pair
+        
+        upstream_scheduler.acquire("binance")
+        tickers = self.binance_provider.call(
+            self.binance.fetch_tickers, sorted(set(pairs.values()) | {"BTC/USDT"})
+        )
+        market_recorder.record("binance", "fetch_tickers", tickers, {"symbols": list(pairs)})
+        return self.parse_tickers(list(pairs), tickers)
+    
+    def parse_tickers(self, symbols: List[str], tickers: Dict[str, dict],
+                      fetched_at: Optional[datetime] = None) -> Dict[str, dict]:
+        """Build quotes for symbols from a raw Binance fetch_tickers response."""
+        btc_usd = float(tickers["BTC/USDT"]["last"])
+        
+        results = {}
+        for symbol in symbols:
+            ticker = tickers.get(SYMBOL_MAPPING.get(symbol, f"{symbol}/USDT"))
+            if not ticker or ticker.get('last') is None:
+                continue
+            results[symbol] = {
+                "symbol": symbol,
+                "price_usd": float(ticker['last']),
+                "price_btc": float(ticker['last']) / btc_usd,
+                "change_24h": float(ticker.get('change') or 0),
+                "volume_24h": float(ticker.get('quoteVolume') or 0),
+                "last_updated": fetched_at or datetime.utcnow()
+            }
+        return results
+    
+    def get_order_book(self, symbol: str, limit: int = 100) -> Optional[dict]:
+        """Fetch the raw Binance L2 order book (ccxt format) for a coin."""
+        symbol = symbol.upper()
+        pair = SYMBOL_MAPPING.get(symbol, f"{symbol}/USDT")
+        try:
+            upstream_scheduler.acquire("binance", timeout=self.binance_provider.timeout)
+            with span("upstream.depth"):
+                book = self.binance_provider.call(self.binance.fetch_order_book, pair, limit)
+            market_recorder.record("binance", "fetch_order_book", book, {"symbol": symbol, "limit": limit})
+            return book
         except Exception as e:
-            print(f"Error fetching BTC price from Binance: {str(e)}")
-            
-            # Fallback to CoinGecko
-            try:
-                response = requests.get(f"{self.coingecko_base_url}/simple/price", params={
-                    "ids": "bitcoin",
-                    "vs_currencies": "usd",
-                    "include_24hr_change": "true",
-                    "include_24hr_vol": "true"
-                })
-                response.raise_for_status()
-                data = response.json()
-                
-                return {
-                    "price_usd": data["bitcoin"]["usd"],
-                    "price_btc": 1.0,
-                    "change_24h": data["bitcoin"].get("usd_24h_change", 0),
-                    "volume_24h": data["bitcoin"].get("usd_24h_vol", 0),
-                    "last_updated": datetime.utcnow()
-                }
-            except Exception as e2:
-                print(f"Error fetching BTC price from CoinGecko: {str(e2)}")
-                
-                # Final fallback - mock data
-                return {
-                    "price_usd": 45000.0,
-                    "price_btc": 1.0,
-                    "change_24h": 0.0,
-                    "volume_24h": 0.0,
-                    "last_updated": datetime.utcnow()
-                }
+            print(f"Error fetching {symbol} order book: {str(e)}")
+            return None
+    
+    def load_markets(self) -> dict:
+        """Binance markets, loaded on first use by one call shared with concurrent callers."""
+        markets = self.binance.markets
+        if markets:
+            return markets
+
+        def load():
+            upstream_scheduler.acquire("binance", timeout=self.binance_provider.timeout)
+            return self.binance_provider.call(self.binance.load_markets)
+
+        return upstream_scheduler.run("binance_markets", load)
+
+    def markets_loaded(self) -> bool:
+        return bool(self.binance.markets)
+
+    def is_crypto(self, symbol: str) -> bool:
+        """Whether symbol is a coin we can price (as opposed to a stock ticker).
+
+        Coins outside SYMBOL_MAPPING are looked up in the Binance markets,
+        which are loaded first if needed; without them only the mapping counts.
+        """
+        symbol = symbol.upper()
+        if symbol in SYMBOL_MAPPING:
+            return True
+        if not self.markets_loaded() and time.monotonic() < self._markets_retry_at:
+            return False
+        try:
+            markets = self.load_markets()
+        except Exception as e:
+            print(f"Error loading Binance markets: {str(e)}")
+            self._markets_retry_at = time.monotonic() + MARKETS_RETRY_SECONDS
+            return False
+        return f"{symbol}/USDT" in (markets or {})
     
     def get_crypto_price(self, symbol: str) -> Optional[dict]:
-        """Get price for a specific cryptocurrency."""
+        """Get price for a specific cryptocurrency.
+
+        Requests are merged by the upstream scheduler, so concurrent lookups
+        for different coins share one Binance fetch_tickers call. The price
+        comes from the consolidated view over all venues when it has one.
+        """
+        symbol = symbol.upper()
         try:
-            # Map common symbols to Binance symbols
-            symbol_mapping = {
-                "ETH": "ETH/USDT",
-                "BTC": "BTC/USDT",
-                "ADA": "ADA/USDT",
-                "DOT": "DOT/USDT",
-                "LINK": "LINK/USDT"
-            }
-            
-            binance_symbol = symbol_mapping.get(symbol.upper(), f"{symbol.upper()}/USDT")
-            ticker = self.binance.fetch_ticker(binance_symbol)
-            
-            return {
-                "symbol": symbol.upper(),
-                "price_usd": float(ticker['last']),
-                "price_btc": float(ticker['last']) / self.get_btc_price()["price_usd"],
-                "change_24h": float(ticker.get('change', 0)),
-                "volume_24h": float(ticker.get('quoteVolume', 0)),
-                "last_updated": datetime.utcnow()
-            }
+            quote = upstream_scheduler.fetch_batched(
+                "binance", symbol, self._fetch_tickers, timeout=BTC_PRICE_SLO_SECONDS * 2
+            )
         except Exception as e:
             print(f"Error fetching {symbol} price: {str(e)}")
-            return None
+            quote = None
+        return self.with_best_venue(symbol, quote)
+    
+    def get_crypto_prices(self, symbols: List[str]) -> List[dict]:
+        """Get prices for several cryptocurrencies in one bulk call."""
+        results = upstream_scheduler.fetch_many(
+            "binance", [symbol.upper() for symbol in symbols], self._fetch_tickers,
+            timeout=BTC_PRICE_SLO_SECONDS * 2
+        )
+        quotes = [self.with_best_venue(symbol, data) for symbol, data in results.items()]
+        return [quote for quote in quotes if quote]
+    
+    async def get_crypto_prices_async(self, symbols: List[str], timeout: float = REQUEST_DEADLINE_SECONDS,
+                                      on_late=None) -> Dict[str, Optional[dict]]:
+        """Prices keyed by symbol for request handlers, without blocking a thread.
+
+        Coins Binance has not answered for within timeout are priced from the
+        other venues if possible and None otherwise; on_late(symbol, quote)
+        receives their Binance quote when it arrives.
+        """
+        symbols = [symbol.upper() for symbol in symbols]
+
+        def late(symbol: str, quote: Optional[dict]):
+            on_late(symbol, self.with_best_venue(symbol, quote))
+
+        results = await upstream_scheduler.fetch_many_async(
+            "binance", symbols, self._fetch_tickers, timeout=timeout,
+            on_late=late if on_late is not None else None
+        )
+        return {symbol: self.with_best_venue(symbol, results.get(symbol)) for symbol in symbols}
+
+    def with_best_venue(self, symbol: str, quote: Optional[dict]) -> Optional[dict]:
+        """Price a Binance quote from the best venue in the consolidated view.
+
+        Keeps the Binance quote when no venue has a fresh quote, and builds
+        the quote from the other venues when Binance had none.
+        """
+        best = self.exchanges.best(symbol)
+        if best is None or not best["price"]:
+            return quote
+        if quote is None:
+            btc = self.exchanges.best("BTC")
+            quote = {
+                "symbol": symbol,
+                "price_btc": best["price"] / btc["price"] if btc and btc["price"] else None,
+                "change_24h": float(best["change"] or 0),
+                "volume_24h": float(best["volume"] or 0),
+                "last_updated": datetime.utcnow()
+            }
+        else:
+            # The quote may come from a batch shared with other callers
+            quote = dict(quote)
+            if symbol == "BTC":
+                quote["price_btc"] = 1.0
+            elif quote.get("price_usd"):
+                quote["price_btc"] = quote["price_btc"] * best["price"] / quote["price_usd"]
+        quote.update({
+            "price_usd": best["price"],
+            "best_bid": best["best_bid"],
+            "best_ask": best["best_ask"],
+            "bid_venue": best["bid_venue"],
+            "ask_venue": best["ask_venue"],
+        })
+        return quote
 
 # Global instance
 crypto_service = CryptoService() 
\ No newline at end of file
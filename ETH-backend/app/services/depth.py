@@ -0,0 +1,236 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from app.services.crypto_service import crypto_service
+from app.services.order_book import order_book_manager, OrderBookManager, ORDER_BOOK_STREAM
+from app.services.scheduler import upstream_scheduler
+
+load_dotenv()
+
+# How often depth is refreshed for symbols that are in use
+DEPTH_REFRESH_SECONDS = float(os.getenv("DEPTH_REFRESH_SECONDS", "2"))
+# Price levels kept per side
+DEPTH_LEVELS = int(os.getenv("DEPTH_LEVELS", "100"))
+# Symbols nobody traded for this long stop being refreshed
+DEPTH_IDLE_SECONDS = float(os.getenv("DEPTH_IDLE_SECONDS", "600"))
+# Upper bound on order book fetches per refresh cycle
+DEPTH_MAX_SYMBOLS = int(os.getenv("DEPTH_MAX_SYMBOLS", "20"))
+# A symbol whose order book could not be fetched is not retried on demand for this long
+MISSING_RETRY_SECONDS = 60
+
+
+class BookSide:
+    """Price levels of one book side, best first, with running totals.
+
+    Cumulative size and notional per level are computed once per snapshot,
+    so filling any quantity is two binary searches instead of a level walk.
+    """
+
+    __slots__ = ("sign", "prices", "sizes", "cum_sizes", "cum_notional", "_keys")
+
+    def __init__(self, levels: List[list], sign: int):
+        # sign is 1 for asks (ascending prices) and -1 for bids (descending)
+        self.sign = sign
+        levels = np.asarray([level[:2] for level in levels], dtype=np.float64).reshape(-1, 2)
+        levels = levels[(levels[:, 0] > 0) & (levels[:, 1] > 0)]
+        levels = levels[np.argsort(levels[:, 0] * sign, kind="stable")]
+        self.prices = levels[:, 0]
+        self.sizes = levels[:, 1]
+        self.cum_sizes = np.cumsum(self.sizes)
+        self.cum_notional = np.cumsum(self.prices * self.sizes)
+        self._keys = self.prices * sign
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def best(self) -> Optional[float]:
+        return float(self.prices[0]) if len(self.prices) else None
+
+    def fill(self, quantity: float, limit: Optional[float] = None) -> Tuple[float, float, Optional[float]]:
+        """Take up to quantity from the book, at or better than limit if given.
+
+        Returns (filled quantity, notional, worst price touched).
+        """
+        levels = len(self.prices)
+        if limit is not None:
+            levels = int(np.searchsorted(self._keys, limit * self.sign, side="right"))
+        if levels == 0 or quantity <= 0:
+            return 0.0, 0.0, None
+        filled = min(quantity, float(self.cum_sizes[levels - 1]))
+        # Level at which the fill completes
+        last = int(np.searchsorted(self.cum_sizes[:levels], filled, side="left"))
+        last = min(last, levels - 1)
+        size_before = float(self.cum_sizes[last - 1]) if last else 0.0
+        notional_before = float(self.cum_notional[last - 1]) if last else 0.0
+        notional = notional_before + (filled - size_before) * float(self.prices[last])
+        return filled, notional, float(self.prices[last])
+
+
+class DepthSnapshot:
+    """One L2 order book snapshot of a symbol."""
+
+    __slots__ = ("symbol", "bids", "asks", "fetched_at", "received")
+
+    def __init__(self, symbol: str, bids: List[list], asks: List[list], fetched_at: Optional[datetime] = None):
+        self.symbol = symbol
+        self.bids = BookSide(bids, -1)
+        self.asks = BookSide(asks, 1)
+        self.fetched_at = fetched_at or datetime.utcnow()
+        self.received = time.monotonic()
+
+    @classmethod
+    def from_order_book(cls, symbol: str, book: dict, fetched_at: Optional[datetime] = None) -> "DepthSnapshot":
+        """Build a snapshot from a ccxt fetch_order_book response."""
+        return cls(symbol, book.get("bids") or [], book.get("asks") or [], fetched_at)
+
+    def age(self) -> float:
+        return time.monotonic() - self.received
+
+    def mid(self) -> Optional[float]:
+        if self.bids.best is None or self.asks.best is None:
+            return None
+        return (self.bids.best + self.asks.best) / 2
+
+
+class DepthCache:
+    """Order book depth per symbol, shared by every simulated order.
+
+    With an OrderBookManager, symbols in use are maintained from the diff
+    stream and snapshots are built from the local book once per book
+    version. Symbols whose local book is not synced (yet) fall back to REST
+    snapshots: they are refreshed by one background thread every
+    DEPTH_REFRESH_SECONDS while used within DEPTH_IDLE_SECONDS; idle symbols
+    are dropped, local books included. Readers only look up cached data, so
+    order volume never turns into upstream calls.
+    The first lookup of an unseen symbol waits for a single fetch that all
+    concurrent callers share.
+    """
+
+    def __init__(self, service=None, levels: int = DEPTH_LEVELS,
+                 refresh_seconds: float = DEPTH_REFRESH_SECONDS, idle_seconds: float = DEPTH_IDLE_SECONDS,
+                 max_symbols: int = DEPTH_MAX_SYMBOLS, books: OrderBookManager = None):
+        self.service = service or crypto_service
+        self.books = books
+        # symbol -> (book version, snapshot) built from the local book
+        self._from_books: Dict[str, Tuple[int, DepthSnapshot]] = {}
+        self.levels = levels
+        self.refresh_seconds = refresh_seconds
+        self.idle_seconds = idle_seconds
+        self.max_symbols = max_symbols
+        self._books: Dict[str, DepthSnapshot] = {}
+        self._last_used: Dict[str, float] = {}
+        self._missing: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        if self.books is not None:
+            self.books.start()
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True, name="depth-refresh")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.books is not None:
+            self.books.stop()
+
+    def get(self, symbol: str) -> Optional[DepthSnapshot]:
+        """Cached depth for symbol, fetched once if it has never been seen."""
+        symbol = symbol.upper()
+        if self.books is not None and self.books.is_synced(symbol):
+            self._last_used[symbol] = time.monotonic()
+            return self._book_snapshot(symbol)
+        snapshot = self._books.get(symbol)
+        if snapshot is not None:
+            self._last_used[symbol] = time.monotonic()
+            return snapshot
+        missing_since = self._missing.get(symbol)
+        if missing_since is not None and time.monotonic() - missing_since < MISSING_RETRY_SECONDS:
+            return None
+        # Only listed coins are recorded, so arbitrary names cannot grow the maps
+        if not self.service.is_crypto(symbol):
+            return None
+        self._last_used[symbol] = time.monotonic()
+        if self.books is not None:
+            self.books.track(symbol)
+        return upstream_scheduler.run(("depth", symbol), lambda: self.refresh(symbol))
+
+    def _book_snapshot(self, symbol: str) -> Optional[DepthSnapshot]:
+        version = self.books.version(symbol)
+        cached = self._from_books.get(symbol)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        top = self.books.top(symbol, self.levels)
+        if top is None:
+            return self._books.get(symbol)
+        snapshot = DepthSnapshot(symbol, top["bids"], top["asks"])
+        # Age of the book's last update rather than of this view
+        snapshot.received -= top["age_seconds"]
+        self._from_books[symbol] = (top["version"], snapshot)
+        return snapshot
+
+    def store(self, snapshot: DepthSnapshot):
+        with self._lock:
+            self._books[snapshot.symbol] = snapshot
+            self._missing.pop(snapshot.symbol, None)
+
+    def refresh(self, symbol: str) -> Optional[DepthSnapshot]:
+        book = self.service.get_order_book(symbol, self.levels)
+        if book is None:
+            with self._lock:
+                self._missing[symbol] = time.monotonic()
+            return self._books.get(symbol)
+        snapshot = DepthSnapshot.from_order_book(symbol, book)
+        self.store(snapshot)
+        return snapshot
+
+    def symbols(self) -> List[str]:
+        return list(self._books)
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self._refresh_due()
+            except Exception as e:
+                print(f"Error refreshing order book depth: {str(e)}")
+
+    def _refresh_due(self):
+        now = time.monotonic()
+        idle = []
+        with self._lock:
+            for symbol, last_used in list(self._last_used.items()):
+                if now - last_used > self.idle_seconds:
+                    del self._last_used[symbol]
+                    self._books.pop(symbol, None)
+                    self._from_books.pop(symbol, None)
+                    self._missing.pop(symbol, None)
+                    idle.append(symbol)
+            # Stalest snapshots first; symbols synced from the stream need no polling
+            due = sorted(
+                (symbol for symbol in self._books if self.books is None or not self.books.is_synced(symbol)),
+                key=lambda symbol: self._books[symbol].received
+            )[:self.max_symbols]
+        if self.books is not None:
+            # Idle books stop streaming too
+            for symbol in idle:
+                self.books.untrack(symbol)
+        for symbol in due:
+            if self._stop.is_set():
+                return
+            self.refresh(symbol)
+
+
+# Global instance
+depth_cache = DepthCache(books=order_book_manager if ORDER_BOOK_STREAM else None)
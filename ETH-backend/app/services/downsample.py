@@ -0,0 +1,59 @@
+import numpy as np
+from app.services.history import BAR_DTYPE
+
+
+def bucket_ohlc(bars: np.ndarray, points: int) -> np.ndarray:
+    """Merge consecutive bars into `points` candles of (nearly) equal bar count.
+
+    Min/max bucketing: each candle keeps its bucket's first open, highest
+    high, lowest low and last close, so spikes survive at any zoom level.
+    """
+    if points <= 0 or len(bars) <= points:
+        return bars
+    starts = np.linspace(0, len(bars), points + 1).astype(np.int64)[:-1]
+    ends = np.append(starts[1:], len(bars)) - 1
+    merged = np.empty(points, dtype=BAR_DTYPE)
+    merged["ts"] = bars["ts"][starts]
+    merged["open"] = bars["open"][starts]
+    merged["high"] = np.fmax.reduceat(bars["high"], starts)
+    merged["low"] = np.fmin.reduceat(bars["low"], starts)
+    merged["close"] = bars["close"][ends]
+    volume = bars["volume"]
+    known = ~np.isnan(volume)
+    totals = np.add.reduceat(np.where(known, volume, 0.0), starts)
+    merged["volume"] = np.where(np.add.reduceat(known, starts) > 0, totals, np.nan)
+    return merged
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; the rest are split into
+    points - 2 buckets, and each bucket keeps the point forming the largest
+    triangle with the point kept before it and the next bucket's average.
+    Bucket averages and areas are computed on whole arrays; only the walk
+    over buckets, which depends on the previous choice, is a Python loop.
+    """
+    size = len(x)
+    if points >= size or points < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket i holds the interior points edges[i]..edges[i + 1] - 1
+    edges = np.linspace(1, size - 1, points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:size - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:size - 1], edges[:-1]) / counts
+    # The last bucket looks ahead to the final point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class EventBus:
+    """In-process publish/subscribe for market events.
+
+    Synchronous subscribers (indicators, alert engines, aggregators) are
+    called inline by publish(). Async consumers such as the SSE stream get a
+    bounded asyncio.Queue that is fed thread-safely from any thread; slow
+    consumers drop events instead of blocking the publisher.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callable[[dict], None]]] = defaultdict(list)
+        self._queues: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str, callback: Callable[[dict], None]):
+        with self._lock:
+            self._subscribers[topic].append(callback)
+
+    def unsubscribe(self, topic: str, callback: Callable[[dict], None]):
+        with self._lock:
+            if callback in self._subscribers[topic]:
+                self._subscribers[topic].remove(callback)
+
+    def subscribe_queue(self, topic: str, maxsize: int = 1000) -> asyncio.Queue:
+        """Return a queue receiving topic events; call from the event loop."""
+        queue = asyncio.Queue(maxsize=maxsize)
+        with self._lock:
+            self._queues[topic].append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe_queue(self, topic: str, queue: asyncio.Queue):
+        with self._lock:
+            self._queues[topic] = [(loop, q) for loop, q in self._queues[topic] if q is not queue]
+
+    def publish(self, topic: str, event: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers[topic])
+            queues = list(self._queues[topic])
+
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error in {topic} subscriber {getattr(callback, '__name__', callback)}: {str(e)}")
+
+        for loop, queue in queues:
+            try:
+                loop.call_soon_threadsafe(_put_nowait, queue, event)
+            except RuntimeError:
+                # Event loop already closed
+                self.unsubscribe_queue(topic, queue)
+
+
+def _put_nowait(queue: asyncio.Queue, event: dict):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass
+
+
+# Global instance
+event_bus = EventBus()
@@ -0,0 +1,255 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import ccxt
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from app.services.providers import UpstreamProvider, UPSTREAM_TIMEOUT_SECONDS
+from app.services.scheduler import upstream_scheduler
+from app.services.recorder import market_recorder
+from app.services.events import event_bus
+
+load_dotenv()
+
+# Venues polled for tickers, by ccxt id
+EXCHANGES = [name.strip().lower() for name in os.getenv("EXCHANGES", "binance,kraken,okx").split(",") if name.strip()]
+EXCHANGE_REFRESH_SECONDS = float(os.getenv("EXCHANGE_REFRESH_SECONDS", "5"))
+# HTTP connections kept open per venue
+EXCHANGE_POOL_SIZE = int(os.getenv("EXCHANGE_POOL_SIZE", "8"))
+# Venue quotes older than this are left out of the consolidated view
+EXCHANGE_QUOTE_MAX_AGE_SECONDS = float(os.getenv("EXCHANGE_QUOTE_MAX_AGE_SECONDS", "30"))
+# Quote currencies tried in order when mapping a coin to a venue's pair
+QUOTE_CURRENCIES = ("USDT", "USD")
+# Pairs of tracked coins against these are polled too, for cross rates
+EXCHANGE_CROSS_QUOTES = [q.strip().upper() for q in os.getenv("EXCHANGE_CROSS_QUOTES", "BTC,ETH").split(",") if q.strip()]
+# (requests per second, burst) for venues without a configured token bucket
+DEFAULT_VENUE_LIMITS = (5.0, 10)
+
+
+class ExchangeVenue:
+    """One ccxt client with its own circuit breaker, token bucket and HTTP pool."""
+
+    def __init__(self, name: str, client=None, pool_size: int = EXCHANGE_POOL_SIZE):
+        self.name = name
+        self.client = client or self._create_client(name, pool_size)
+        self.provider = UpstreamProvider(name)
+        if name not in upstream_scheduler.buckets:
+            rate, burst = DEFAULT_VENUE_LIMITS
+            upstream_scheduler.configure(
+                name,
+                float(os.getenv(f"{name.upper()}_RATE_PER_SECOND", rate)),
+                int(os.getenv(f"{name.upper()}_BURST", burst))
+            )
+
+    @staticmethod
+    def _create_client(name: str, pool_size: int):
+        # Rate limits are enforced by the upstream scheduler, not ccxt's sleep-based limiter
+        client = getattr(ccxt, name)({"timeout": int(UPSTREAM_TIMEOUT_SECONDS * 1000), "enableRateLimit": False})
+        client.session.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        return client
+
+    def _markets(self) -> dict:
+        markets = self.client.markets
+        if not markets:
+            upstream_scheduler.acquire(self.name, timeout=self.provider.timeout)
+            markets = self.provider.call(self.client.load_markets)
+        return markets
+
+    def pairs(self, symbols: List[str]) -> Dict[str, str]:
+        """Map coins to this venue's pairs, loading its markets on first use."""
+        markets = self._markets()
+        pairs = {}
+        for symbol in symbols:
+            for quote in QUOTE_CURRENCIES:
+                pair = f"{symbol}/{quote}"
+                if pair in markets:
+                    pairs[symbol] = pair
+                    break
+        return pairs
+
+    def cross_pairs(self, symbols: List[str]) -> List[str]:
+        """Listed pairs between the coins and EXCHANGE_CROSS_QUOTES, e.g. ETH/BTC."""
+        markets = self._markets()
+        return [
+            f"{symbol}/{quote}" for symbol in symbols for quote in EXCHANGE_CROSS_QUOTES
+            if symbol != quote and f"{symbol}/{quote}" in markets
+        ]
+
+    def fetch_tickers(self, symbols: List[str]) -> Tuple[Dict[str, str], Dict[str, dict]]:
+        """Coin to pair mapping and raw tickers keyed by pair, cross pairs included."""
+        pairs = self.pairs(symbols)
+        if not pairs:
+            return {}, {}
+        upstream_scheduler.acquire(self.name, timeout=self.provider.timeout)
+        tickers = self.provider.call(
+            self.client.fetch_tickers, sorted(set(pairs.values()) | set(self.cross_pairs(symbols)))
+        )
+        market_recorder.record("exchanges", "fetch_tickers", tickers, {"venue": self.name, "pairs": pairs})
+        return pairs, tickers
+
+
+class VenueQuote:
+    __slots__ = ("bid", "ask", "last", "change", "volume", "updated")
+
+    def __init__(self, ticker: dict):
+        self.bid = ticker.get("bid")
+        self.ask = ticker.get("ask")
+        self.last = ticker.get("last")
+        self.change = ticker.get("change")
+        self.volume = ticker.get("quoteVolume")
+        self.updated = time.monotonic()
+
+
+class ExchangeRegistry:
+    """Tickers from several venues consolidated into the best bid and ask per coin.
+
+    A background thread polls every venue concurrently each
+    EXCHANGE_REFRESH_SECONDS. Each venue's answer is applied as soon as it
+    arrives, so a slow venue only delays its own quotes; a venue whose
+    previous poll is still running or whose circuit is open is skipped.
+    Readers only look at the consolidated in-memory view.
+    """
+
+    def __init__(self, names: List[str] = None, clients: Dict[str, object] = None,
+                 refresh_seconds: float = EXCHANGE_REFRESH_SECONDS,
+                 max_age: float = EXCHANGE_QUOTE_MAX_AGE_SECONDS):
+        self.venues: Dict[str, ExchangeVenue] = {}
+        for name in names if names is not None else EXCHANGES:
+            try:
+                self.venues[name] = ExchangeVenue(name, (clients or {}).get(name))
+            except AttributeError:
+                print(f"Unknown exchange '{name}' in EXCHANGES, skipping it")
+        self.refresh_seconds = refresh_seconds
+        self.max_age = max_age
+        self.symbols_source = None
+        # coin -> venue -> latest quote
+        self._quotes: Dict[str, Dict[str, VenueQuote]] = {}
+        self._polling: set = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.venues)), thread_name_prefix="exchange-poll")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, symbols_source=None):
+        """Poll the coins returned by symbols_source() on every venue."""
+        if self._thread is not None:
+            return
+        self.symbols_source = symbols_source
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True, name="exchange-refresh")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            try:
+                symbols = sorted(set(self.symbols_source() if self.symbols_source else []) | {"BTC"})
+                self.refresh(symbols)
+            except Exception as e:
+                print(f"Error refreshing exchange tickers: {str(e)}")
+            self._stop.wait(self.refresh_seconds)
+
+    def refresh(self, symbols: List[str]):
+        """Start one poll per available venue without waiting for any of them."""
+        for venue in self.venues.values():
+            with self._lock:
+                if venue.name in self._polling or not venue.provider.available():
+                    continue
+                self._polling.add(venue.name)
+            self._executor.submit(self._poll, venue, symbols)
+
+    def _poll(self, venue: ExchangeVenue, symbols: List[str]):
+        try:
+            self.ingest(venue.name, *venue.fetch_tickers(symbols))
+        except Exception as e:
+            print(f"Error fetching tickers from {venue.name}: {str(e)}")
+        finally:
+            with self._lock:
+                self._polling.discard(venue.name)
+
+    def ingest(self, venue: str, pairs: Dict[str, str], tickers: Dict[str, dict]):
+        """Record a venue's raw tickers keyed by pair; pairs maps coins to their quote pair.
+
+        The full set, cross pairs included, is published as an
+        "exchange_tickers" event for cross-rate consumers.
+        """
+        with self._lock:
+            for symbol, pair in pairs.items():
+                ticker = tickers.get(pair)
+                if ticker:
+                    self._quotes.setdefault(symbol, {})[venue] = VenueQuote(ticker)
+        event_bus.publish("exchange_tickers", {"venue": venue, "tickers": tickers})
+
+    def _fresh(self, symbol: str) -> Dict[str, VenueQuote]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                venue: quote for venue, quote in self._quotes.get(symbol, {}).items()
+                if now - quote.updated <= self.max_age
+            }
+
+    def best(self, symbol: str) -> Optional[dict]:
+        """Consolidated best bid and ask across fresh venue quotes."""
+        quotes = self._fresh(symbol)
+        if not quotes:
+            return None
+        bids = [(quote.bid, venue) for venue, quote in quotes.items() if quote.bid]
+        asks = [(quote.ask, venue) for venue, quote in quotes.items() if quote.ask]
+        best_bid, bid_venue = max(bids) if bids else (None, None)
+        best_ask, ask_venue = min(asks) if asks else (None, None)
+        if best_bid is not None and best_ask is not None:
+            price = (best_bid + best_ask) / 2
+            venue = bid_venue if bid_venue == ask_venue else None
+        else:
+            # No two-sided market; use the most recent last trade
+            venue, quote = max(quotes.items(), key=lambda item: item[1].updated)
+            price = quote.last
+        # 24h stats from the most liquid venue
+        stats = max(quotes.values(), key=lambda quote: quote.volume or 0)
+        return {
+            "price": price,
+            "best_bid": best_bid,
+            "bid_venue": bid_venue,
+            "best_ask": best_ask,
+            "ask_venue": ask_venue,
+            "venue": venue,
+            "venues": len(quotes),
+            "change": stats.change,
+            "volume": stats.volume,
+        }
+
+    def venue_quotes(self, symbol: str) -> Dict[str, dict]:
+        now = time.monotonic()
+        return {
+            venue: {"bid": quote.bid, "ask": quote.ask, "last": quote.last, "age_seconds": round(now - quote.updated, 3)}
+            for venue, quote in self._fresh(symbol).items()
+        }
+
+    def status(self) -> List[dict]:
+        """Health of every venue."""
+        # Poll threads add symbols and venues while this runs
+        with self._lock:
+            polling = set(self._polling)
+            symbols = {name: sum(1 for quotes in self._quotes.values() if name in quotes) for name in self.venues}
+        result = []
+        for venue in self.venues.values():
+            p95 = venue.provider.latency.percentile(95)
+            result.append({
+                "name": venue.name,
+                "available": venue.provider.available(),
+                "polling": venue.name in polling,
+                "p95_latency_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "symbols": symbols[venue.name],
+            })
+        return result
+
+
+# Global instance
+exchange_registry = ExchangeRegistry()
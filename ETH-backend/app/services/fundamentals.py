@@ -0,0 +1,184 @@
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from app.services.scheduler import upstream_scheduler
+
+load_dotenv()
+
+FUNDAMENTALS_FILE = os.getenv("FUNDAMENTALS_FILE", "data/fundamentals.json.gz")
+# Company data changes slowly; entries are refreshed after this long
+FUNDAMENTALS_TTL_SECONDS = float(os.getenv("FUNDAMENTALS_TTL_SECONDS", "86400"))
+# Pause between background passes, unless an unknown symbol wakes the job earlier
+FUNDAMENTALS_REFRESH_SECONDS = float(os.getenv("FUNDAMENTALS_REFRESH_SECONDS", "5"))
+# Yahoo tokens the job leaves for price traffic; it only runs on spare budget
+FUNDAMENTALS_RESERVE_TOKENS = 2
+# A symbol whose fetch failed is skipped for this long
+FUNDAMENTALS_RETRY_SECONDS = 600
+
+# Cached field -> yfinance info keys, first present wins
+INFO_FIELDS = {
+    "name": ("shortName", "longName"),
+    "sector": ("sector",),
+    "market_cap": ("marketCap",),
+    "shares_outstanding": ("sharesOutstanding", "impliedSharesOutstanding"),
+}
+
+
+def fundamentals_from_info(info: dict) -> dict:
+    """The cached subset of a yfinance Ticker.info dict."""
+    entry = {}
+    for field, keys in INFO_FIELDS.items():
+        entry[field] = next((info[key] for key in keys if info.get(key) is not None), None)
+    return entry
+
+
+class FundamentalsCache:
+    """Company fundamentals per stock symbol (name, sector, market cap, shares).
+
+    Ticker.info is the slowest and most rate-limited yfinance call, so it is
+    kept off the price path: quotes read fundamentals from here, and a
+    background job fetches symbols that are missing or older than
+    FUNDAMENTALS_TTL_SECONDS, one at a time and only with spare yahoo
+    budget. Entries are saved to FUNDAMENTALS_FILE and outlive restarts.
+    """
+
+    def __init__(self, path: str = FUNDAMENTALS_FILE, ttl: float = FUNDAMENTALS_TTL_SECONDS,
+                 refresh_seconds: float = FUNDAMENTALS_REFRESH_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.refresh_seconds = refresh_seconds
+        self.fetch_info: Optional[Callable[[str], dict]] = None
+        self.symbols_source = None
+        # symbol -> fundamentals plus "fetched_at" (epoch seconds)
+        self._entries: Dict[str, dict] = {}
+        # Symbols quoted without fundamentals, fetched first
+        self._wanted: Dict[str, None] = {}
+        # symbol -> epoch seconds before which a failed fetch is not retried
+        self._retry_at: Dict[str, float] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, fetch_info: Callable[[str], dict], symbols_source=None):
+        """Refresh with fetch_info(symbol) for the symbols returned by symbols_source()."""
+        if self._thread is not None:
+            return
+        self.fetch_info = fetch_info
+        self.symbols_source = symbols_source
+        self.load()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True, name="fundamentals-refresh")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.save()
+
+    def get(self, symbol: str) -> Optional[dict]:
+        """Cached fundamentals of symbol; an unknown symbol is queued for the background job."""
+        entry = self._entries.get(symbol)
+        if entry is None:
+            with self._lock:
+                if symbol not in self._wanted:
+                    self._wanted[symbol] = None
+                    self._wake.set()
+        return entry
+
+    def store(self, symbol: str, info: dict, fetched_at: Optional[float] = None):
+        """Cache the fundamentals in a raw Ticker.info dict."""
+        entry = fundamentals_from_info(info)
+        entry["fetched_at"] = fetched_at if fetched_at is not None else time.time()
+        with self._lock:
+            self._entries[symbol] = entry
+            self._wanted.pop(symbol, None)
+            self._retry_at.pop(symbol, None)
+            self._dirty = True
+
+    def due(self) -> List[str]:
+        """Symbols to fetch: wanted ones first, then tracked ones past their TTL."""
+        now = time.time()
+        tracked = self.symbols_source() if self.symbols_source else []
+        with self._lock:
+            symbols = [symbol for symbol in self._wanted if self._retry_at.get(symbol, 0) <= now]
+            stale = [
+                symbol for symbol in tracked
+                if symbol not in self._wanted and self._retry_at.get(symbol, 0) <= now
+                and now - self._entries.get(symbol, {}).get("fetched_at", 0) >= self.ttl
+            ]
+        stale.sort(key=lambda symbol: self._entries.get(symbol, {}).get("fetched_at", 0))
+        return symbols + stale
+
+    def refresh_due(self) -> int:
+        """Fetch due symbols while spare yahoo budget lasts; returns the number fetched."""
+        fetched = 0
+        for symbol in self.due():
+            if self._stop.is_set() or not upstream_scheduler.acquire_spare("yahoo", FUNDAMENTALS_RESERVE_TOKENS):
+                break
+            try:
+                self.store(symbol, self.fetch_info(symbol))
+                fetched += 1
+            except Exception as e:
+                print(f"Error fetching {symbol} fundamentals: {str(e)}")
+                with self._lock:
+                    self._retry_at[symbol] = time.time() + FUNDAMENTALS_RETRY_SECONDS
+        return fetched
+
+    def _refresh_loop(self):
+        last_save = time.monotonic()
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.refresh_due()
+                if time.monotonic() - last_save >= 60:
+                    self.save()
+                    last_save = time.monotonic()
+            except Exception as e:
+                print(f"Error refreshing fundamentals: {str(e)}")
+            self._wake.wait(self.refresh_seconds)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with gzip.open(self.path, "rt") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading fundamentals cache, refetching: {str(e)}")
+            return
+        with self._lock:
+            for symbol, entry in entries.items():
+                self._entries.setdefault(symbol, entry)
+
+    def save(self):
+        """Write the cache atomically if anything changed since the last save."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with gzip.open(tmp_path, "wt") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error writing fundamentals cache: {str(e)}")
+
+
+# Global instance
+fundamentals_cache = FundamentalsCache()
@@ -0,0 +1,145 @@
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Root directory of the local OHLCV history
+HISTORY_DIR = os.getenv("HISTORY_DIR", "data/history")
+
+# One bar: epoch seconds (UTC) plus OHLCV
+BAR_DTYPE = np.dtype([
+    ("ts", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+
+def bars_from_frame(frame: pd.DataFrame) -> np.ndarray:
+    """Convert a yfinance-style OHLCV frame to a sorted bar array."""
+    frame = frame.dropna(subset=["Close"])
+    if frame.empty:
+        return np.empty(0, dtype=BAR_DTYPE)
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    bars = np.empty(len(frame), dtype=BAR_DTYPE)
+    bars["ts"] = index.to_numpy(dtype="datetime64[s]").astype("int64")
+    for field, column in (("open", "Open"), ("high", "High"), ("low", "Low"),
+                          ("close", "Close"), ("volume", "Volume")):
+        bars[field] = frame[column].to_numpy(dtype="float64", na_value=np.nan) if column in frame else np.nan
+    return np.sort(bars, order="ts")
+
+
+def _epoch(moment: datetime) -> int:
+    """Epoch seconds; naive datetimes are taken as UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def _years(ts: np.ndarray) -> np.ndarray:
+    return ts.astype("datetime64[s]").astype("datetime64[Y]").astype("int64") + 1970
+
+
+class HistoryStore:
+    """Local OHLCV storage: one .npy file of BAR_DTYPE rows per symbol,
+    resolution and calendar year, e.g. data/history/1d/AAPL/2021.npy.
+
+    Files are sorted by timestamp and rewritten atomically, so readers can
+    memory-map them while a backfill is writing.
+    """
+
+    def __init__(self, root: str = HISTORY_DIR):
+        self.root = root
+        self._locks: Dict[tuple, threading.Lock] = defaultdict(threading.Lock)
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, symbol: str, resolution: str) -> str:
+        return os.path.join(self.root, resolution, symbol.upper())
+
+    def _lock(self, symbol: str, resolution: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks[(symbol.upper(), resolution)]
+
+    def write(self, symbol: str, resolution: str, bars: np.ndarray) -> int:
+        """Merge bars into storage, replacing bars with the same timestamp.
+
+        Returns the number of bars written.
+        """
+        if len(bars) == 0:
+            return 0
+        directory = self._dir(symbol, resolution)
+        os.makedirs(directory, exist_ok=True)
+        years = _years(bars["ts"])
+
+        with self._lock(symbol, resolution):
+            for year in np.unique(years):
+                path = os.path.join(directory, f"{year}.npy")
+                chunk = bars[years == year]
+                if os.path.exists(path):
+                    chunk = np.concatenate([chunk, np.load(path)])
+                # Stable sort keeps the new bar first, so it wins the dedupe
+                chunk = chunk[np.argsort(chunk["ts"], kind="stable")]
+                _, first = np.unique(chunk["ts"], return_index=True)
+                chunk = chunk[first]
+
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, chunk)
+                os.replace(tmp_path, path)
+        return len(bars)
+
+    def version(self, symbol: str, resolution: str = "1d") -> int:
+        """Changes whenever bars of symbol are written (the directory's mtime); 0 without history."""
+        try:
+            return os.stat(self._dir(symbol, resolution)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def read(self, symbol: str, resolution: str = "1d", start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> np.ndarray:
+        """Bars for symbol with start <= ts < end, sorted by timestamp."""
+        directory = self._dir(symbol, resolution)
+        if not os.path.isdir(directory):
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        start_ts = _epoch(start) if start else None
+        end_ts = _epoch(end) if end else None
+        start_year = start.year if start else None
+        end_year = end.year if end else None
+
+        chunks = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".npy"):
+                continue
+            year = int(name[:-4])
+            if (start_year and year < start_year) or (end_year and year > end_year):
+                continue
+            chunk = np.load(os.path.join(directory, name), mmap_mode="r")
+            lo = np.searchsorted(chunk["ts"], start_ts, side="left") if start_ts is not None else 0
+            hi = np.searchsorted(chunk["ts"], end_ts, side="left") if end_ts is not None else len(chunk)
+            if hi > lo:
+                chunks.append(np.array(chunk[lo:hi]))
+        if not chunks:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.concatenate(chunks)
+
+    def symbols(self, resolution: str = "1d") -> List[str]:
+        """Symbols with stored history at resolution."""
+        directory = os.path.join(self.root, resolution)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.listdir(directory))
+
+
+# Global instance
+history_store = HistoryStore()
\ No newline at end of file
@@ -0,0 +1,318 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    """Base class for labelled metrics.
+
+    Children for a label combination are created once (under a lock) and then
+    updated without locking: increments rely on the GIL, and a rare lost
+    update under contention is acceptable for monitoring data.
+    """
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Return the child for a label combination, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def _series(self):
+        if not self.labelnames:
+            return [((), self._default)]
+        return list(self._children.items())
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for values, child in self._series():
+            lines.extend(self._expose_child(values, child))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def _expose_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {child.value}"]
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Gauge(_Metric):
+    """Gauge whose values are either set directly or computed at scrape time."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 collect: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def _series(self):
+        if self.collect is None:
+            return super()._series()
+        series = []
+        for values, value in self.collect().items():
+            child = _GaugeChild()
+            child.value = value
+            series.append((values, child))
+        return series
+
+    def _expose_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {child.value}"]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # Preallocated bucket array (last slot is +Inf), so observe() never allocates
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _expose_child(self, values, child):
+        lines = []
+        cumulative = 0
+        counts = list(child.counts)
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            labels = _format_labels(self.labelnames, values, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {child.sum}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds all metrics and renders them in the text exposition format."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+              collect=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def expose(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.expose())
+            except Exception as e:
+                print(f"Error collecting metric {metric.name}: {str(e)}")
+        return "\n".join(lines) + "\n"
+
+
+# Global registry and the platform's metrics
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+upstream_request_duration = registry.histogram(
+    "upstream_request_duration_seconds", "Upstream provider call latency", ("provider", "call")
+)
+upstream_errors_total = registry.counter(
+    "upstream_errors_total", "Failed upstream provider calls", ("provider", "call")
+)
+cache_lookups_total = registry.counter(
+    "price_cache_lookups_total", "Price cache lookups by result (hit, miss, stale)", ("cache", "result")
+)
+background_refresh_duration = registry.histogram(
+    "background_refresh_duration_seconds", "Duration of background price refresh cycles",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+strategy_bar_duration = registry.histogram(
+    "strategy_bar_duration_seconds", "Time from bar close to all strategies evaluated",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+strategy_failures_total = registry.counter(
+    "strategy_failures_total", "Strategy evaluations that failed by reason (budget, error)", ("reason",)
+)
+strategy_shards_skipped_total = registry.counter(
+    "strategy_shards_skipped_total", "Strategy shards left out of a bar by reason (deadline, crashed)", ("reason",)
+)
+order_book_resyncs_total = registry.counter(
+    "order_book_resyncs_total", "Local order book resynchronizations by cause (gap, reconnect)", ("cause",)
+)
+rate_limited_total = registry.counter(
+    "rate_limited_total", "Requests rejected by the rate limiter by route class", ("route_class",)
+)
+arbitrage_scan_duration = registry.histogram(
+    "arbitrage_scan_duration_seconds", "Time to apply one venue's tickers and check for arbitrage cycles",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+bar_late_ticks_total = registry.counter(
+    "bar_late_ticks_total", "Ticks dropped by the bar aggregator for arriving after the grace window", ("timeframe",)
+)
+
+
+_route_paths: Dict[int, str] = {}
+
+
+def route_template(scope) -> str:
+    """Full path template ("/stocks/price/{symbol}") of the route that handled scope."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    template = _route_paths.get(id(route))
+    if template is None:
+        # Depending on the FastAPI version the route may be reported without
+        # its include_router prefix; recover the prefix from the request path
+        path = scope.get("path", "")
+        template = getattr(route, "path", "unmatched")
+        regex = getattr(route, "path_regex", None)
+        if regex is not None and not regex.match(path):
+            for index, char in enumerate(path):
+                if char == "/" and regex.match(path[index:]):
+                    template = path[:index] + template
+                    break
+        _route_paths[id(route)] = template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware that records latency and status per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route_path = route_template(scope)
+            method = scope.get("method", "")
+            http_request_duration.labels(method, route_path).observe(time.perf_counter() - start)
+            http_requests_total.labels(method, route_path, str(status_holder[0])).inc()
@@ -0,0 +1,415 @@
+import json
+import os
+import queue
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import websocket
+from dotenv import load_dotenv
+from app.services.crypto_service import crypto_service, SYMBOL_MAPPING
+from app.services.metrics import order_book_resyncs_total
+
+load_dotenv()
+
+BINANCE_STREAM_URL = os.getenv("BINANCE_STREAM_URL", "wss://stream.binance.com:9443/stream")
+# Levels per side fetched when a book is (re)seeded
+ORDER_BOOK_SNAPSHOT_LEVELS = int(os.getenv("ORDER_BOOK_SNAPSHOT_LEVELS", "1000"))
+# A book without an update for this long is no longer trusted
+ORDER_BOOK_STALE_SECONDS = float(os.getenv("ORDER_BOOK_STALE_SECONDS", "30"))
+# Diffs kept per symbol while its snapshot is being fetched
+MAX_BUFFERED_DIFFS = 1000
+# Seconds between reconnect attempts of the depth stream
+RECONNECT_DELAY_SECONDS = 5
+# Maintain books from the diff stream; without it depth falls back to REST polling
+ORDER_BOOK_STREAM = os.getenv("ORDER_BOOK_STREAM", "true").lower() == "true"
+
+
+class SequenceGap(Exception):
+    """A depth diff does not continue the book's last update id."""
+
+
+class PriceLevels:
+    """One side of a local order book as two parallel sorted arrays.
+
+    Levels are sorted by ascending key with the best level last (the key is
+    the price for bids and minus the price for asks), so updates near the
+    touch, by far the most frequent, shift only a few elements and the best
+    level is an index lookup.
+    """
+
+    __slots__ = ("sign", "keys", "sizes")
+
+    def __init__(self, sign: int):
+        self.sign = sign
+        self.keys = array("d")
+        self.sizes = array("d")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def load(self, levels: Iterable[list]):
+        """Replace the contents with [price, size] levels, sorting once."""
+        entries = sorted((float(price) * self.sign, float(size)) for price, size, *_ in levels if float(size) > 0)
+        self.keys = array("d", (key for key, _ in entries))
+        self.sizes = array("d", (size for _, size in entries))
+
+    def set(self, price: float, size: float):
+        """Set the absolute size at price; size 0 removes the level."""
+        key = price * self.sign
+        position = bisect_left(self.keys, key)
+        exists = position < len(self.keys) and self.keys[position] == key
+        if size > 0:
+            if exists:
+                self.sizes[position] = size
+            else:
+                self.keys.insert(position, key)
+                self.sizes.insert(position, size)
+        elif exists:
+            del self.keys[position]
+            del self.sizes[position]
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self.keys:
+            return None
+        return self.keys[-1] * self.sign, self.sizes[-1]
+
+    def top(self, n: int) -> List[List[float]]:
+        """The n best levels as [price, size], best first."""
+        start = max(len(self.keys) - n, 0)
+        sign = self.sign
+        return [[self.keys[i] * sign, self.sizes[i]] for i in range(len(self.keys) - 1, start - 1, -1)]
+
+
+class LocalOrderBook:
+    """L2 book of one symbol, seeded from a snapshot and kept current by
+    applying incremental diffs in update id order."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = PriceLevels(1)
+        self.asks = PriceLevels(-1)
+        # None until seeded from a snapshot
+        self.last_update_id: Optional[int] = None
+        self.version = 0
+        self.updated = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def seeded(self) -> bool:
+        return self.last_update_id is not None
+
+    def seed(self, bids: Iterable[list], asks: Iterable[list], last_update_id: int):
+        self.bids.load(bids)
+        self.asks.load(asks)
+        self.last_update_id = last_update_id
+        self.version += 1
+        self.updated = time.monotonic()
+
+    def reset(self):
+        self.bids = PriceLevels(1)
+        self.asks = PriceLevels(-1)
+        self.last_update_id = None
+        self.version += 1
+
+    def apply(self, first_id: int, final_id: int, bids: Iterable[list], asks: Iterable[list]) -> bool:
+        """Apply the diff covering update ids [first_id, final_id].
+
+        Returns False for a diff that is already contained in the book and
+        raises SequenceGap when updates between the book and the diff are
+        missing.
+        """
+        if final_id <= self.last_update_id:
+            return False
+        if first_id > self.last_update_id + 1:
+            raise SequenceGap(f"{self.symbol}: book at {self.last_update_id}, diff starts at {first_id}")
+        for price, size in bids:
+            self.bids.set(float(price), float(size))
+        for price, size in asks:
+            self.asks.set(float(price), float(size))
+        self.last_update_id = final_id
+        self.version += 1
+        self.updated = time.monotonic()
+        return True
+
+
+class BinanceDepthStream:
+    """Binance diff depth streams (<pair>@depth@100ms) over one combined websocket.
+
+    Diffs are handed to on_diff(symbol, diff) on the socket thread. After a
+    reconnect on_reconnect() is called, since diffs may have been missed.
+    """
+
+    def __init__(self, url: str = BINANCE_STREAM_URL):
+        self.url = url
+        self.on_diff: Callable[[str, dict], None] = lambda symbol, diff: None
+        self.on_reconnect: Callable[[], None] = lambda: None
+        self._streams: Dict[str, str] = {}
+        self._socket = None
+        self._connected = False
+        self._next_id = 1
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stream_name(symbol: str) -> str:
+        pair = SYMBOL_MAPPING.get(symbol, f"{symbol}/USDT")
+        return pair.replace("/", "").lower() + "@depth@100ms"
+
+    def bind(self, on_diff: Callable[[str, dict], None], on_reconnect: Callable[[], None]):
+        self.on_diff = on_diff
+        self.on_reconnect = on_reconnect
+
+    def subscribe(self, symbol: str):
+        stream = self.stream_name(symbol)
+        with self._lock:
+            if stream in self._streams:
+                return
+            self._streams[stream] = symbol
+            if self._connected:
+                self._send_subscribe([stream])
+
+    def unsubscribe(self, symbol: str):
+        stream = self.stream_name(symbol)
+        with self._lock:
+            if self._streams.pop(stream, None) is None:
+                return
+            if self._connected:
+                self._send("UNSUBSCRIBE", [stream])
+
+    def _send_subscribe(self, streams: List[str]):
+        self._send("SUBSCRIBE", streams)
+
+    def _send(self, method: str, streams: List[str]):
+        self._socket.send(json.dumps({"method": method, "params": streams, "id": self._next_id}))
+        self._next_id += 1
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="depth-stream")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._socket is not None:
+            self._socket.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._socket = websocket.WebSocketApp(
+                self.url, on_open=self._on_open, on_message=self._on_message, on_close=self._on_close
+            )
+            self._socket.run_forever(ping_interval=60)
+            if self._stop.wait(RECONNECT_DELAY_SECONDS):
+                return
+            self.on_reconnect()
+
+    def _on_open(self, socket):
+        with self._lock:
+            self._connected = True
+            if self._streams:
+                self._send_subscribe(list(self._streams))
+
+    def _on_close(self, socket, status_code, message):
+        with self._lock:
+            self._connected = False
+
+    def _on_message(self, socket, message: str):
+        data = json.loads(message)
+        stream = data.get("stream")
+        if stream is None:
+            # Subscription acknowledgement
+            return
+        symbol = self._streams.get(stream)
+        if symbol is not None:
+            self.on_diff(symbol, data["data"])
+
+
+class OrderBookManager:
+    """Locally maintained L2 books for the symbols in use.
+
+    A symbol is tracked on first use: its diff stream is subscribed and one
+    REST snapshot seeds the book, until untrack() drops both again. Diffs
+    that arrive before the snapshot are buffered and replayed on top of it.
+    A diff that skips update ids puts the book back into seeding, so it
+    resynchronizes automatically. Reads (best bid/ask, top N, fill
+    snapshots) are served from memory.
+
+    Diffs use the Binance format: U and u are the first and final update id,
+    b and a the changed [price, size] levels.
+    """
+
+    def __init__(self, fetch_snapshot: Callable[[str, int], Optional[dict]] = None, stream=None,
+                 snapshot_levels: int = ORDER_BOOK_SNAPSHOT_LEVELS,
+                 stale_seconds: float = ORDER_BOOK_STALE_SECONDS):
+        self.fetch_snapshot = fetch_snapshot or crypto_service.get_order_book
+        # Anything with bind/subscribe/unsubscribe/start/stop, e.g. a local stand-in replaying diffs
+        self.stream = stream or BinanceDepthStream()
+        self.stream.bind(self.on_diff, self.resync_all)
+        self.snapshot_levels = snapshot_levels
+        self.stale_seconds = stale_seconds
+        self._books: Dict[str, LocalOrderBook] = {}
+        self._buffers: Dict[str, List[dict]] = {}
+        self._seed_queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._seeding: set = set()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(target=self._seed_loop, daemon=True, name="order-book-seed")
+        self._worker.start()
+        self.stream.start()
+
+    def stop(self):
+        self.stream.stop()
+        if self._worker is not None:
+            self._seed_queue.put(None)
+            self._worker.join(timeout=5)
+            self._worker = None
+
+    def track(self, symbol: str) -> LocalOrderBook:
+        """Start maintaining symbol's book if it is not maintained yet."""
+        symbol = symbol.upper()
+        book = self._books.get(symbol)
+        if book is not None:
+            return book
+        with self._lock:
+            book = self._books.get(symbol)
+            if book is None:
+                book = self._books[symbol] = LocalOrderBook(symbol)
+                self._buffers[symbol] = []
+                new = True
+            else:
+                new = False
+        if new:
+            self.stream.subscribe(symbol)
+            self._schedule_seed(symbol)
+        return book
+
+    def untrack(self, symbol: str):
+        """Stop maintaining symbol's book: unsubscribe its stream and drop the book."""
+        symbol = symbol.upper()
+        with self._lock:
+            book = self._books.pop(symbol, None)
+            self._buffers.pop(symbol, None)
+            self._seeding.discard(symbol)
+        if book is not None:
+            self.stream.unsubscribe(symbol)
+
+    def symbols(self) -> List[str]:
+        return list(self._books)
+
+    def _schedule_seed(self, symbol: str):
+        with self._lock:
+            if symbol in self._seeding:
+                return
+            self._seeding.add(symbol)
+        self._seed_queue.put(symbol)
+
+    def on_diff(self, symbol: str, diff: dict):
+        book = self._books.get(symbol)
+        if book is None:
+            return
+        with book.lock:
+            if not book.seeded:
+                buffer = self._buffers[symbol]
+                buffer.append(diff)
+                if len(buffer) > MAX_BUFFERED_DIFFS:
+                    del buffer[0]
+                return
+            try:
+                book.apply(diff["U"], diff["u"], diff["b"], diff["a"])
+                return
+            except SequenceGap:
+                book.reset()
+                self._buffers[symbol] = [diff]
+        order_book_resyncs_total.labels("gap").inc()
+        self._schedule_seed(symbol)
+
+    def resync_all(self):
+        """Reseed every book, e.g. after the stream reconnected."""
+        for symbol, book in list(self._books.items()):
+            with book.lock:
+                book.reset()
+                self._buffers[symbol] = []
+            order_book_resyncs_total.labels("reconnect").inc()
+            self._schedule_seed(symbol)
+
+    def _seed_loop(self):
+        while True:
+            symbol = self._seed_queue.get()
+            if symbol is None:
+                return
+            with self._lock:
+                self._seeding.discard(symbol)
+            try:
+                self.seed(symbol)
+            except Exception as e:
+                print(f"Error seeding {symbol} order book: {str(e)}")
+
+    def seed(self, symbol: str) -> bool:
+        """Load a REST snapshot into the book and replay the buffered diffs."""
+        snapshot = self.fetch_snapshot(symbol, self.snapshot_levels)
+        if not snapshot or snapshot.get("nonce") is None:
+            return False
+        book = self._books.get(symbol)
+        if book is None:
+            # Untracked while the snapshot was being fetched
+            return False
+        with book.lock:
+            book.seed(snapshot.get("bids") or [], snapshot.get("asks") or [], int(snapshot["nonce"]))
+            buffered, self._buffers[symbol] = self._buffers[symbol], []
+            try:
+                for diff in buffered:
+                    book.apply(diff["U"], diff["u"], diff["b"], diff["a"])
+                return True
+            except SequenceGap:
+                # The snapshot is older than the buffered diffs; try again
+                book.reset()
+        order_book_resyncs_total.labels("gap").inc()
+        self._schedule_seed(symbol)
+        return False
+
+    def is_synced(self, symbol: str) -> bool:
+        book = self._books.get(symbol.upper())
+        return book is not None and book.seeded and time.monotonic() - book.updated < self.stale_seconds
+
+    def version(self, symbol: str) -> Optional[int]:
+        """Changes whenever the book does; lets readers cache derived views."""
+        book = self._books.get(symbol.upper())
+        return book.version if book is not None else None
+
+    def best(self, symbol: str) -> Optional[Tuple[Optional[Tuple[float, float]], Optional[Tuple[float, float]]]]:
+        """(best bid, best ask) as (price, size) pairs, None if not synced."""
+        book = self._books.get(symbol.upper())
+        if book is None or not book.seeded:
+            return None
+        with book.lock:
+            return book.bids.best(), book.asks.best()
+
+    def top(self, symbol: str, levels: int) -> Optional[dict]:
+        """The top levels of both sides, None if not synced."""
+        book = self._books.get(symbol.upper())
+        if book is None or not book.seeded:
+            return None
+        with book.lock:
+            return {
+                "bids": book.bids.top(levels),
+                "asks": book.asks.top(levels),
+                "version": book.version,
+                "last_update_id": book.last_update_id,
+                "age_seconds": time.monotonic() - book.updated,
+            }
+
+
+# Global instance
+order_book_manager = OrderBookManager()
@@ -0,0 +1,169 @@
+import os
+import queue
+import threading
+from typing import List, Optional
+from dotenv import load_dotenv
+from app.database import SessionLocal
+from app.models.paper_order import PaperOrder
+from app.services.depth import depth_cache, DepthCache
+from app.services.events import event_bus
+
+load_dotenv()
+
+# Taker fee charged on the filled notional
+PAPER_FEE_RATE = float(os.getenv("PAPER_FEE_RATE", "0.001"))
+# Orders are rejected rather than filled against depth older than this
+PAPER_MAX_DEPTH_AGE_SECONDS = float(os.getenv("PAPER_MAX_DEPTH_AGE_SECONDS", "30"))
+# Strategy signal orders written to the database per transaction
+ORDER_BATCH_SIZE = 500
+
+
+class PaperExchange:
+    """Simulated execution against cached L2 depth.
+
+    Orders are immediate-or-cancel: a market order takes liquidity level by
+    level until it is filled or the cached book runs out, a limit order only
+    takes the levels at or better than its limit. Whatever cannot be filled
+    is cancelled and the order is reported as partially filled. Simulated
+    orders do not consume the shared book, so users don't affect each other.
+
+    Signals from the strategy runner are simulated on a separate thread and
+    stored in batches.
+    """
+
+    def __init__(self, depth: DepthCache = None, session_factory=SessionLocal,
+                 fee_rate: float = PAPER_FEE_RATE, max_depth_age: float = PAPER_MAX_DEPTH_AGE_SECONDS):
+        self.depth = depth or depth_cache
+        self.session_factory = session_factory
+        self.fee_rate = fee_rate
+        self.max_depth_age = max_depth_age
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._worker is not None:
+            return
+        self.depth.start()
+        event_bus.subscribe("strategy_signal", self.on_signal)
+        self._worker = threading.Thread(target=self._signal_loop, daemon=True, name="paper-signals")
+        self._worker.start()
+
+    def stop(self):
+        event_bus.unsubscribe("strategy_signal", self.on_signal)
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout=5)
+            self._worker = None
+        self.depth.stop()
+
+    def simulate(self, symbol: str, side: str, quantity: float, order_type: str = "market",
+                 limit_price: Optional[float] = None) -> dict:
+        """Fill one order against the cached book; no upstream calls for known symbols."""
+        symbol = symbol.upper()
+        result = {
+            "symbol": symbol,
+            "side": side,
+            "order_type": order_type,
+            "quantity": quantity,
+            "limit_price": limit_price,
+            "status": "rejected",
+            "filled_quantity": 0.0,
+            "average_price": None,
+            "notional": 0.0,
+            "fee": 0.0,
+            "slippage_bps": None,
+            "reason": None,
+            "depth_time": None,
+        }
+        snapshot = self.depth.get(symbol)
+        if snapshot is None:
+            result["reason"] = f"No order book depth for {symbol}"
+            return result
+        result["depth_time"] = snapshot.fetched_at
+        if snapshot.age() > self.max_depth_age:
+            result["reason"] = "Order book depth is stale"
+            return result
+
+        book_side = snapshot.asks if side == "buy" else snapshot.bids
+        filled, notional, _ = book_side.fill(quantity, limit_price if order_type == "limit" else None)
+        if filled <= 0:
+            result["reason"] = "No liquidity at or better than the limit price" if order_type == "limit" \
+                else "Order book side is empty"
+            return result
+
+        average_price = notional / filled
+        touch = book_side.best
+        direction = 1 if side == "buy" else -1
+        result.update({
+            "status": "filled" if filled >= quantity else "partially_filled",
+            "filled_quantity": filled,
+            "average_price": average_price,
+            "notional": notional,
+            "fee": notional * self.fee_rate,
+            # Cost of walking the book relative to the best price
+            "slippage_bps": direction * (average_price / touch - 1) * 10000,
+        })
+        if filled < quantity:
+            result["reason"] = "Book depth exhausted; remainder cancelled"
+        return result
+
+    def place(self, user_id: int, orders: List[dict], strategy_id: Optional[int] = None) -> List[PaperOrder]:
+        """Simulate orders and store them in one transaction."""
+        rows = [
+            PaperOrder(user_id=user_id, strategy_id=strategy_id, **self.simulate(
+                order["symbol"], order["side"], order["quantity"],
+                order.get("order_type", "market"), order.get("limit_price")
+            ))
+            for order in orders
+        ]
+        db = self.session_factory()
+        try:
+            db.add_all(rows)
+            db.flush()
+            ids = [row.id for row in rows]
+            db.commit()
+            # One query reloads the committed rows with their server defaults
+            rows = db.query(PaperOrder).filter(PaperOrder.id.in_(ids)).order_by(PaperOrder.id).all()
+            db.expunge_all()
+        finally:
+            db.close()
+        return rows
+
+    def on_signal(self, signal: dict):
+        self._queue.put(signal)
+
+    def _signal_loop(self):
+        while True:
+            signal = self._queue.get()
+            if signal is None:
+                return
+            batch = [signal]
+            while len(batch) < ORDER_BATCH_SIZE:
+                try:
+                    signal = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if signal is None:
+                    self._queue.put(None)
+                    break
+                batch.append(signal)
+            try:
+                self._execute_signals(batch)
+            except Exception as e:
+                print(f"Error executing strategy signals on paper: {str(e)}")
+
+    def _execute_signals(self, signals: List[dict]):
+        rows = []
+        for signal in signals:
+            fill = self.simulate(signal["symbol"], signal["side"], signal["quantity"])
+            rows.append(PaperOrder(user_id=signal["user_id"], strategy_id=signal["strategy_id"], **fill))
+        db = self.session_factory()
+        try:
+            db.add_all(rows)
+            db.commit()
+        finally:
+            db.close()
+
+
+# Global instance
+paper_exchange = PaperExchange()
@@ -0,0 +1,303 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from app.database import SessionLocal
+from app.models.holding import Holding
+from app.models.wallet import Wallet
+from app.models.equity_snapshot import EquitySnapshot
+from app.services.events import event_bus
+from app.services.watchlist import watchlist
+from app.services.background_tasks import price_cache
+
+load_dotenv()
+
+# How often every portfolio value is written to equity_snapshots
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("PORTFOLIO_SNAPSHOT_SECONDS", "300"))
+# Snapshots older than this are deleted (the equity history goes back at most a year)
+SNAPSHOT_RETENTION_DAYS = float(os.getenv("PORTFOLIO_SNAPSHOT_RETENTION_DAYS", "366"))
+# Snapshots are kept at full resolution this long, then thinned to one per user per hour
+SNAPSHOT_FULL_RESOLUTION_HOURS = float(os.getenv("PORTFOLIO_SNAPSHOT_FULL_RESOLUTION_HOURS", "48"))
+# How often old snapshots are deleted and thinned
+SNAPSHOT_PRUNE_SECONDS = float(os.getenv("PORTFOLIO_SNAPSHOT_PRUNE_SECONDS", "3600"))
+# The 24h P&L is only computed against a snapshot at most this much older than a day ago
+PNL_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("PNL_SNAPSHOT_MAX_AGE_SECONDS", "3600"))
+
+
+class PortfolioEngine:
+    """Values every portfolio at once.
+
+    Positions are kept as a sparse user x asset matrix in COO form (row,
+    column, quantity arrays). After each price refresh all portfolios are
+    revalued with one sparse matrix-vector product against the price
+    vector, and every SNAPSHOT_INTERVAL_SECONDS the values are stored as
+    equity snapshots for balance and P&L history. Every
+    SNAPSHOT_PRUNE_SECONDS snapshots past SNAPSHOT_RETENTION_DAYS are
+    deleted and those past SNAPSHOT_FULL_RESOLUTION_HOURS are thinned to
+    one per user per hour.
+
+    Wallet BTC balances count as BTC positions next to the holdings table;
+    duplicate (user, asset) entries simply add up.
+    """
+
+    def __init__(self, session_factory=SessionLocal, snapshot_interval: float = SNAPSHOT_INTERVAL_SECONDS):
+        self.session_factory = session_factory
+        self.snapshot_interval = snapshot_interval
+        # position key -> (user_id, symbol, quantity)
+        self._positions: Dict[Hashable, Tuple[int, str, float]] = {}
+        self._asset_kinds: Dict[str, str] = {}
+        self._prices: Dict[str, float] = {}
+        self._dirty = True
+        self._lock = threading.Lock()
+
+        # Matrix state, rebuilt when positions change
+        self._rows = np.empty(0, dtype=np.int64)
+        self._cols = np.empty(0, dtype=np.int64)
+        self._quantities = np.empty(0, dtype=np.float64)
+        self._user_ids = np.empty(0, dtype=np.int64)
+        self._user_rows: Dict[int, int] = {}
+        self._assets: List[str] = []
+        self._price_vector = np.empty(0, dtype=np.float64)
+
+        self.values = np.empty(0, dtype=np.float64)
+        self.valued_at: Optional[datetime] = None
+        self._last_snapshot = 0.0
+        self._last_prune = 0.0
+        # Snapshots before this have already been thinned
+        self._thinned_until: Optional[datetime] = None
+        self._started = False
+
+    def start(self):
+        """Load positions, seed prices from the cache and follow price updates."""
+        if self._started:
+            return
+        self._started = True
+        self.load()
+        btc_price = price_cache.get("btc_price")
+        if btc_price:
+            self._prices["BTC"] = btc_price["price_usd"]
+        for symbol, stock in list(price_cache.get("stock_prices", {}).items()):
+            self._prices[symbol] = stock["price"]
+        for symbol, crypto in list(price_cache.get("crypto_prices", {}).items()):
+            self._prices[symbol] = crypto["price_usd"]
+        event_bus.subscribe("price", self.on_price)
+        event_bus.subscribe("prices_refreshed", self.on_refresh)
+        self.revalue()
+
+    def stop(self):
+        event_bus.unsubscribe("price", self.on_price)
+        event_bus.unsubscribe("prices_refreshed", self.on_refresh)
+        self._started = False
+
+    def load(self):
+        db = self.session_factory()
+        try:
+            holdings = db.query(Holding.id, Holding.user_id, Holding.symbol, Holding.asset_type,
+                                Holding.quantity).all()
+            wallets = db.query(Wallet.id, Wallet.user_id, Wallet.balance_btc).all()
+        finally:
+            db.close()
+
+        with self._lock:
+            self._positions = {}
+            for holding_id, user_id, symbol, asset_type, quantity in holdings:
+                self._positions[("holding", holding_id)] = (user_id, symbol, quantity or 0.0)
+                self._asset_kinds[symbol] = asset_type
+            for wallet_id, user_id, balance_btc in wallets:
+                self._positions[("wallet", wallet_id)] = (user_id, "BTC", balance_btc or 0.0)
+            self._asset_kinds.setdefault("BTC", "crypto")
+            self._dirty = True
+        for symbol, kind in list(self._asset_kinds.items()):
+            watchlist.pin(symbol, kind)
+
+    def set_position(self, key: Hashable, user_id: int, symbol: str, quantity: float, kind: str = "crypto"):
+        """Add or update one position, e.g. ("holding", id) or ("wallet", id)."""
+        symbol = symbol.upper()
+        with self._lock:
+            self._positions[key] = (user_id, symbol, quantity)
+            new_asset = symbol not in self._asset_kinds
+            self._asset_kinds.setdefault(symbol, kind)
+            self._dirty = True
+        if new_asset:
+            # Held assets must keep being refreshed to value the portfolios
+            watchlist.pin(symbol, kind)
+
+    def remove_position(self, key: Hashable):
+        with self._lock:
+            if self._positions.pop(key, None) is not None:
+                self._dirty = True
+
+    def on_price(self, event: dict):
+        self._prices[event["symbol"]] = event["price"]
+
+    def on_refresh(self, event: dict):
+        self.revalue()
+        if time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+        if time.monotonic() - self._last_prune >= SNAPSHOT_PRUNE_SECONDS:
+            self.prune_snapshots()
+
+    def _rebuild(self):
+        """Rebuild the COO matrix from positions; called with the lock held."""
+        user_rows: Dict[int, int] = {}
+        asset_cols: Dict[str, int] = {}
+        count = len(self._positions)
+        rows = np.empty(count, dtype=np.int64)
+        cols = np.empty(count, dtype=np.int64)
+        quantities = np.empty(count, dtype=np.float64)
+        for i, (user_id, symbol, quantity) in enumerate(self._positions.values()):
+            rows[i] = user_rows.setdefault(user_id, len(user_rows))
+            cols[i] = asset_cols.setdefault(symbol, len(asset_cols))
+            quantities[i] = quantity
+        self._rows, self._cols, self._quantities = rows, cols, quantities
+        self._user_rows = user_rows
+        self._user_ids = np.fromiter(user_rows.keys(), dtype=np.int64, count=len(user_rows))
+        self._assets = list(asset_cols)
+        self._dirty = False
+
+    def _revalue_locked(self):
+        if self._dirty:
+            self._rebuild()
+        # Assets without a price yet are valued at 0
+        self._price_vector = np.fromiter(
+            (self._prices.get(symbol, 0.0) for symbol in self._assets),
+            dtype=np.float64, count=len(self._assets)
+        )
+        # Sparse matrix-vector product: sum of quantity * price per user row
+        self.values = np.bincount(
+            self._rows, weights=self._quantities * self._price_vector[self._cols],
+            minlength=len(self._user_ids)
+        )
+        self.valued_at = datetime.utcnow()
+
+    def revalue(self) -> int:
+        """Revalue every portfolio; returns the number of portfolios."""
+        with self._lock:
+            self._revalue_locked()
+            return len(self._user_ids)
+
+    def value(self, user_id: int) -> Optional[float]:
+        """Latest portfolio value for user_id, or None if they hold nothing."""
+        with self._lock:
+            if self._dirty:
+                # Positions changed since the last refresh
+                self._revalue_locked()
+            row = self._user_rows.get(user_id)
+            if row is None or row >= len(self.values):
+                return None
+            return float(self.values[row])
+
+    def exposures(self, user_id: int) -> Dict[str, float]:
+        """Current value held per asset for user_id."""
+        with self._lock:
+            if self._dirty:
+                self._revalue_locked()
+            row = self._user_rows.get(user_id)
+            if row is None:
+                return {}
+            result: Dict[str, float] = {}
+            for position in np.flatnonzero(self._rows == row):
+                col = self._cols[position]
+                symbol = self._assets[col]
+                result[symbol] = result.get(symbol, 0.0) + float(self._quantities[position] * self._price_vector[col])
+            return result
+
+    def snapshot(self) -> int:
+        """Write the current value of every portfolio to equity_snapshots."""
+        with self._lock:
+            user_ids = self._user_ids.tolist()
+            values = self.values.tolist()
+            captured_at = self.valued_at or datetime.utcnow()
+        self._last_snapshot = time.monotonic()
+        if not user_ids:
+            return 0
+
+        db = self.session_factory()
+        try:
+            db.bulk_insert_mappings(EquitySnapshot, [
+                {"user_id": user_id, "total_value": value, "captured_at": captured_at}
+                for user_id, value in zip(user_ids, values)
+            ])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error writing equity snapshots: {str(e)}")
+            return 0
+        finally:
+            db.close()
+        return len(user_ids)
+
+    def prune_snapshots(self, now: Optional[datetime] = None) -> int:
+        """Delete expired snapshots and thin old ones; returns the number of rows deleted."""
+        now = now or datetime.utcnow()
+        self._last_prune = time.monotonic()
+        retention_cutoff = now - timedelta(days=SNAPSHOT_RETENTION_DAYS)
+        thin_cutoff = now - timedelta(hours=SNAPSHOT_FULL_RESOLUTION_HOURS)
+
+        db = self.session_factory()
+        try:
+            deleted = db.query(EquitySnapshot).filter(
+                EquitySnapshot.captured_at < retention_cutoff
+            ).delete(synchronize_session=False)
+            db.commit()
+
+            # Thin one day at a time so a first run over a long history stays small
+            start = max(self._thinned_until or retention_cutoff, retention_cutoff)
+            while start < thin_cutoff:
+                end = min(start + timedelta(days=1), thin_cutoff)
+                rows = db.query(EquitySnapshot.id, EquitySnapshot.user_id, EquitySnapshot.captured_at).filter(
+                    EquitySnapshot.captured_at >= start,
+                    EquitySnapshot.captured_at < end
+                ).order_by(EquitySnapshot.captured_at).all()
+                kept = set()
+                extra = []
+                for snapshot_id, user_id, captured_at in rows:
+                    hour = (user_id, captured_at.replace(minute=0, second=0, microsecond=0))
+                    if hour in kept:
+                        extra.append(snapshot_id)
+                    else:
+                        kept.add(hour)
+                for i in range(0, len(extra), 1000):
+                    deleted += db.query(EquitySnapshot).filter(
+                        EquitySnapshot.id.in_(extra[i:i + 1000])
+                    ).delete(synchronize_session=False)
+                db.commit()
+                start = end
+            # Hours are only thinned once complete, so the partial last hour is revisited
+            self._thinned_until = thin_cutoff.replace(minute=0, second=0, microsecond=0)
+        except Exception as e:
+            db.rollback()
+            print(f"Error pruning equity snapshots: {str(e)}")
+            return 0
+        finally:
+            db.close()
+        return deleted
+
+
+def get_equity_history(db, user_id: int, since: datetime) -> List[EquitySnapshot]:
+    return db.query(EquitySnapshot).filter(
+        EquitySnapshot.user_id == user_id,
+        EquitySnapshot.captured_at >= since
+    ).order_by(EquitySnapshot.captured_at).all()
+
+
+def get_value_at(db, user_id: int, moment: datetime, max_age: Optional[timedelta] = None) -> Optional[float]:
+    """Portfolio value from the last snapshot at or before moment, None if there is none.
+
+    With max_age only snapshots taken at most max_age before moment count.
+    """
+    query = db.query(EquitySnapshot).filter(
+        EquitySnapshot.user_id == user_id,
+        EquitySnapshot.captured_at <= moment
+    )
+    if max_age is not None:
+        query = query.filter(EquitySnapshot.captured_at >= moment - max_age)
+    snapshot = query.order_by(EquitySnapshot.captured_at.desc()).first()
+    return snapshot.total_value if snapshot else None
+
+
+# Global instance
+portfolio_engine = PortfolioEngine()
\ No newline at end of file
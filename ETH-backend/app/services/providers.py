@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.services.metrics import upstream_request_duration, upstream_errors_total
+
+load_dotenv()
+
+# Upstream call configuration
+UPSTREAM_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", "3.0"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+DEFAULT_HEDGE_DELAY_SECONDS = float(os.getenv("DEFAULT_HEDGE_DELAY_SECONDS", "0.5"))
+
+
+class ProviderUnavailable(Exception):
+    """Raised when a provider is skipped or no provider answered in time."""
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker that trips after repeated failures."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may go through right now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let a single probe through
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Keeps the most recent call latencies and answers percentile queries."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100.0))
+        return ordered[index]
+
+
+class UpstreamProvider:
+    """Health state for one upstream API: explicit timeout, latency and breaker."""
+
+    def __init__(self, name: str, timeout: float = UPSTREAM_TIMEOUT_SECONDS,
+                 failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyTracker()
+
+    def available(self) -> bool:
+        return self.breaker.allow()
+
+    def hedge_delay(self) -> float:
+        """How long to wait on this provider before hedging (its p95 latency)."""
+        p95 = self.latency.percentile(95)
+        if p95 is None:
+            return DEFAULT_HEDGE_DELAY_SECONDS
+        return min(p95, self.timeout)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Run fn against this provider, recording latency and breaker state."""
+        if not self.available():
+            raise ProviderUnavailable(f"{self.name} circuit is open")
+        return self._invoke(fn, *args, **kwargs)
+
+    def _invoke(self, fn: Callable, *args, **kwargs):
+        call_name = getattr(fn, "__name__", "call")
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except ProviderUnavailable:
+            # Throttled locally, not a provider failure
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            upstream_errors_total.labels(self.name, call_name).inc()
+            raise
+        elapsed = time.perf_counter() - start
+        self.latency.record(elapsed)
+        upstream_request_duration.labels(self.name, call_name).observe(elapsed)
+        self.breaker.record_success()
+        return result
+
+
+# Shared pool for hedged requests; threads are bounded by each provider's timeout
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="upstream-hedge")
+
+
+def hedged_call(attempts: List[Tuple[UpstreamProvider, Callable]], deadline: float):
+    """Call providers in order, hedging to the next one once the current one
+    has not answered by its p95 latency. Returns the first successful result
+    or raises ProviderUnavailable when the deadline passes.
+    """
+    start = time.monotonic()
+    pending = {}
+    errors = []
+    queue = [(provider, fn) for provider, fn in attempts]
+    last_provider, last_launched = None, 0.0
+
+    while True:
+        remaining = deadline - (time.monotonic() - start)
+        if remaining <= 0:
+            break
+
+        # Launch the next available provider when nothing is in flight or the
+        # most recent attempt has exceeded its hedge delay
+        if queue and (not pending or
+                      time.monotonic() - last_launched >= last_provider.hedge_delay()):
+            provider, fn = queue.pop(0)
+            if not provider.available():
+                errors.append(f"{provider.name}: circuit open")
+                continue
+            future = _hedge_executor.submit(provider._invoke, fn)
+            last_provider, last_launched = provider, time.monotonic()
+            pending[future] = provider
+            continue
+
+        if not pending:
+            break
+
+        # Wait until something finishes or the next hedge is due
+        wait_for = remaining
+        if queue:
+            next_hedge = last_provider.hedge_delay() - (time.monotonic() - last_launched)
+            wait_for = max(0.0, min(wait_for, next_hedge))
+        done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            provider = pending.pop(future)
+            try:
+                return future.result()
+            except Exception as e:
+                errors.append(f"{provider.name}: {str(e)}")
+
+    raise ProviderUnavailable("; ".join(errors) or "no provider answered before the deadline")
@@ -0,0 +1,230 @@
+import hashlib
+import math
+import os
+import re
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from app.services.metrics import rate_limited_total
+from app.utils.auth import verify_token
+
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Limits per identity as "requests/seconds", by route class
+RATE_LIMITS = {
+    "auth": os.getenv("RATE_LIMIT_AUTH", "10/60"),
+    "write": os.getenv("RATE_LIMIT_WRITE", "60/60"),
+    "upstream": os.getenv("RATE_LIMIT_UPSTREAM", "60/60"),
+    "read": os.getenv("RATE_LIMIT_READ", "600/60"),
+}
+# Name of a shared memory block holding the counters of all workers on this host; per process if unset
+RATE_LIMIT_SHARED_MEMORY = os.getenv("RATE_LIMIT_SHARED_MEMORY")
+RATE_LIMIT_SHARED_SLOTS = int(os.getenv("RATE_LIMIT_SHARED_SLOTS", "65536"))
+# Take the client address from X-Forwarded-For (only behind a trusted proxy)
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+# Decoded bearer tokens are reused for this long
+TOKEN_CACHE_SECONDS = 60
+TOKEN_CACHE_SIZE = 10000
+
+# First match wins; everything else is "read"
+ROUTE_CLASSES: List[Tuple[str, Optional[set], re.Pattern]] = [
+    ("exempt", None, re.compile(r"^/(health|metrics|docs|redoc|openapi\.json)?$")),
+    ("auth", None, re.compile(r"^/auth/")),
+    ("write", {"POST", "PUT", "PATCH", "DELETE"}, re.compile(r"^/")),
+    # Reads that can turn into provider calls on a cache miss
+    ("upstream", None, re.compile(
+        r"^/(crypto/(price|btc-price|orderbook)|stocks/|market/snapshot|paper/depth/|user/[^/]+/balance)"
+    )),
+]
+
+
+def parse_limit(value: str) -> Tuple[int, float]:
+    """Parse "requests/seconds", e.g. "60/60"."""
+    count, _, seconds = value.partition("/")
+    return int(count), float(seconds or 60)
+
+
+def route_class(method: str, path: str) -> str:
+    for name, methods, pattern in ROUTE_CLASSES:
+        if (methods is None or method in methods) and pattern.match(path):
+            return name
+    return "read"
+
+
+def _window_state(index: int, stored_index: int, prev: int, curr: int) -> Tuple[int, int]:
+    """(previous, current) window counts as of window index."""
+    if stored_index == index:
+        return prev, curr
+    if stored_index == index - 1:
+        return curr, 0
+    return 0, 0
+
+
+def _retry_after(prev: int, curr: int, limit: int, window: float, elapsed: float) -> int:
+    if limit <= 0:
+        # A class limited to 0 requests never admits one; ask for a full window
+        return max(1, math.ceil(window))
+    if curr < limit and prev:
+        # When the previous window's weight has decayed enough
+        wait = window * (1 - (limit - curr) / prev) - elapsed
+    else:
+        # The current window becomes the previous one and must decay below the limit too
+        wait = window * (2 - limit / curr) - elapsed
+    # Whole seconds strictly past the point where the estimate drops below the limit
+    return max(1, math.floor(wait) + 1)
+
+
+class LocalCounters:
+    """Sliding-window counters of this process, a short list per identity and class.
+
+    The count over the last window is estimated from the current and the
+    previous fixed window, weighting the previous one by how much of it
+    still overlaps, so each check is a dict lookup and some arithmetic.
+    """
+
+    def __init__(self):
+        # key -> [window index, previous count, current count, forget after]
+        self._counters: Dict[str, list] = {}
+        self._swept = 0.0
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> Optional[int]:
+        """Count one request; returns seconds to wait if it is over the limit."""
+        index = int(now // window)
+        elapsed = now - index * window
+        entry = self._counters.get(key)
+        prev, curr = _window_state(index, *entry[:3]) if entry else (0, 0)
+        if prev * (1 - elapsed / window) + curr >= limit:
+            return _retry_after(prev, curr, limit, window, elapsed)
+        # Two windows later the counts no longer matter
+        self._counters[key] = [index, prev, curr + 1, (index + 2) * window]
+        if now - self._swept >= 60:
+            self._sweep(now)
+        return None
+
+    def _sweep(self, now: float):
+        """Drop idle identities; runs at most once a minute."""
+        self._swept = now
+        for key in [key for key, entry in self._counters.items() if entry[3] < now]:
+            del self._counters[key]
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class SharedCounters:
+    """The same counters in a fixed-size table in shared memory, used by every worker.
+
+    Keys hash to one of `slots` rows of (fingerprint, window index,
+    previous, current); a row taken by another key is recycled. Updates
+    are not atomic across processes, so concurrent workers can lose the
+    odd increment; the limit is approximate, not a hard quota.
+    """
+
+    COLUMNS = 4
+
+    def __init__(self, name: str, slots: int = RATE_LIMIT_SHARED_SLOTS):
+        size = slots * self.COLUMNS * 8
+        try:
+            self._block = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._block = shared_memory.SharedMemory(name=name)
+        # The block outlives any single worker; don't unlink it when this one exits
+        resource_tracker.unregister(self._block._name, "shared_memory")
+        self.slots = min(slots, self._block.size // (self.COLUMNS * 8))
+        self._table = np.ndarray((self.slots, self.COLUMNS), dtype=np.int64, buffer=self._block.buf)
+
+    @staticmethod
+    def _fingerprint(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little", signed=True)
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> Optional[int]:
+        fingerprint = self._fingerprint(key)
+        row = self._table[fingerprint % self.slots]
+        index = int(now // window)
+        elapsed = now - index * window
+        if row[0] == fingerprint:
+            prev, curr = _window_state(index, int(row[1]), int(row[2]), int(row[3]))
+        else:
+            prev, curr = 0, 0
+        if prev * (1 - elapsed / window) + curr >= limit:
+            return _retry_after(prev, curr, limit, window, elapsed)
+        row[:] = (fingerprint, index, prev, curr + 1)
+        return None
+
+
+class RateLimiter:
+    """Per-identity limits by route class: the bearer token's user, else the client address."""
+
+    def __init__(self, limits: Dict[str, str] = None, counters=None):
+        self.limits = {name: parse_limit(value) for name, value in (limits or RATE_LIMITS).items()}
+        if counters is None:
+            counters = SharedCounters(RATE_LIMIT_SHARED_MEMORY) if RATE_LIMIT_SHARED_MEMORY else LocalCounters()
+        self.counters = counters
+        # token -> (username, cached until)
+        self._tokens: Dict[str, Tuple[Optional[str], float]] = {}
+
+    def _user(self, token: str, now: float) -> Optional[str]:
+        cached = self._tokens.get(token)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        if len(self._tokens) >= TOKEN_CACHE_SIZE:
+            self._tokens.clear()
+        # Only identifies the caller for counting; routes still authenticate
+        username = verify_token(token)
+        self._tokens[token] = (username, now + TOKEN_CACHE_SECONDS)
+        return username
+
+    def identity(self, scope, now: float, users: bool = True) -> str:
+        forwarded = None
+        for name, value in scope.get("headers", ()):
+            if users and name == b"authorization" and value[:7].lower() == b"bearer ":
+                username = self._user(value[7:].decode("latin-1"), now)
+                if username is not None:
+                    return f"user:{username}"
+            elif name == b"x-forwarded-for" and RATE_LIMIT_TRUST_FORWARDED:
+                forwarded = value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return f"ip:{forwarded or (client[0] if client else 'unknown')}"
+
+    def check(self, scope) -> Tuple[str, Optional[int]]:
+        """(route class, seconds to wait or None if the request may proceed)."""
+        name = route_class(scope.get("method", "GET"), scope.get("path", ""))
+        if name == "exempt" or name not in self.limits:
+            return name, None
+        now = time.time()
+        # Login and registration are limited per address even with a token
+        identity = self.identity(scope, now, users=name != "auth")
+        limit, window = self.limits[name]
+        return name, self.counters.hit(f"{name}:{identity}", limit, window, now)
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 before routing, so rejected requests cost no DB or provider work."""
+
+    def __init__(self, app, limiter: RateLimiter = None):
+        self.app = app
+        self.limiter = limiter or RateLimiter()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        name, retry_after = self.limiter.check(scope)
+        if retry_after is None:
+            await self.app(scope, receive, send)
+            return
+
+        rate_limited_total.labels(name).inc()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": b'{"detail":"Rate limit exceeded"}'})
@@ -0,0 +1,175 @@
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Set to a file path to record every raw provider response
+MARKET_RECORD_FILE = os.getenv("MARKET_RECORD_FILE")
+# Records buffered before the compressed stream is flushed to disk
+RECORD_FLUSH_EVERY = int(os.getenv("MARKET_RECORD_FLUSH_EVERY", "50"))
+
+
+def _encode(value: Any) -> Any:
+    """Make provider payloads JSON-serialisable, keeping DataFrames restorable."""
+    if isinstance(value, pd.DataFrame):
+        columns = [list(column) if isinstance(column, tuple) else column for column in value.columns]
+        return {
+            "__dataframe__": {
+                "columns": columns,
+                "index": [str(index) for index in value.index],
+                "data": value.astype(object).where(value.notna(), None).values.tolist(),
+            }
+        }
+    if isinstance(value, dict):
+        return {str(key): _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        frame = value.get("__dataframe__")
+        if frame is not None:
+            columns = frame["columns"]
+            if columns and isinstance(columns[0], list):
+                columns = pd.MultiIndex.from_tuples([tuple(column) for column in columns])
+            restored = pd.DataFrame(frame["data"], index=pd.to_datetime(frame["index"]), columns=columns)
+            for column in restored.columns:
+                try:
+                    restored[column] = pd.to_numeric(restored[column])
+                except (TypeError, ValueError):
+                    pass
+            return restored
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+class MarketRecorder:
+    """Appends every raw provider response, with its timestamp, to a
+    gzip-compressed JSON-lines file. Each process start appends a new gzip
+    member, so recordings can be extended across restarts.
+    """
+
+    def __init__(self, path: Optional[str] = MARKET_RECORD_FILE, flush_every: int = RECORD_FLUSH_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self._file = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def record(self, provider: str, call: str, payload: Any, args: Optional[dict] = None):
+        """Append one raw response. No-op unless recording is enabled."""
+        if not self.path:
+            return
+        line = json.dumps({
+            "ts": time.time(),
+            "provider": provider,
+            "call": call,
+            "args": _encode(args or {}),
+            "payload": _encode(payload),
+        }, separators=(",", ":"), default=str)
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = gzip.open(self.path, "at", encoding="utf-8")
+                self._file.write(line + "\n")
+                self._pending += 1
+                if self._pending >= self.flush_every:
+                    self._file.flush()
+                    self._pending = 0
+            except Exception as e:
+                print(f"Error recording market data: {str(e)}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._pending = 0
+
+
+def read_recording(path: str) -> Iterator[dict]:
+    """Yield recorded responses in file order; a truncated tail is ignored."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Partially written last line
+                    break
+                record["args"] = _decode(record.get("args", {}))
+                record["payload"] = _decode(record.get("payload"))
+                yield record
+        except (EOFError, OSError):
+            # Recording was cut off mid-write (e.g. crash); keep what was read
+            return
+
+
+class MarketReplayer:
+    """Feeds a recording back through the live ingestion path.
+
+    handlers maps (provider, call) to a function taking (args, payload,
+    fetched_at) that parses the raw response and ingests the result, exactly
+    as the live fetch path does. speed=1 replays in real time, speed=100 a
+    hundred times faster, speed=0 as fast as possible.
+    """
+
+    def __init__(self, handlers: Dict[Tuple[str, str], Callable[[dict, Any, datetime], int]]):
+        self.handlers = handlers
+
+    def replay(self, path: str, speed: float = 0) -> dict:
+        records = 0
+        quotes = 0
+        skipped = 0
+        first_ts = None
+        started = time.perf_counter()
+
+        for record in read_recording(path):
+            if first_ts is None:
+                first_ts = record["ts"]
+            if speed and speed > 0:
+                due = (record["ts"] - first_ts) / speed
+                delay = due - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+            handler = self.handlers.get((record["provider"], record["call"]))
+            if handler is None:
+                skipped += 1
+                continue
+            fetched_at = datetime.utcfromtimestamp(record["ts"])
+            quotes += handler(record["args"], record["payload"], fetched_at) or 0
+            records += 1
+
+        elapsed = time.perf_counter() - started
+        return {
+            "records": records,
+            "skipped": skipped,
+            "quotes": quotes,
+            "elapsed_seconds": round(elapsed, 3),
+            "records_per_second": round(records / elapsed, 1) if elapsed > 0 else 0.0,
+            "quotes_per_second": round(quotes / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+# Global instance
+market_recorder = MarketRecorder()
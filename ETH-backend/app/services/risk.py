@@ -0,0 +1,291 @@
+import math
+import os
+import threading
+import time
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from app.services.events import event_bus
+
+load_dotenv()
+
+# Length of one return bar; prices are sampled at the first refresh after each boundary
+RISK_BAR_SECONDS = float(os.getenv("RISK_BAR_SECONDS", "300"))
+# Exponential forgetting per bar; 0.99 weights roughly the last 100 bars
+RISK_DECAY = float(os.getenv("RISK_DECAY", "0.99"))
+# Bars of returns kept for historical VaR
+RISK_HISTORY_BARS = int(os.getenv("RISK_HISTORY_BARS", "1000"))
+# Fewer common observations than this yield no statistic
+MIN_OBSERVATIONS = 10
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+class OnlineCovariance:
+    """Exponentially weighted Welford mean and co-moments for a growing
+    symbol universe.
+
+    Every statistic is kept per pair over the bars in which both symbols had
+    a return, so symbols can join late or miss a bar without biasing the
+    others. Each bar is one O(n^2) vectorised update; nothing is recomputed
+    over past bars.
+    """
+
+    def __init__(self, decay: float = RISK_DECAY, capacity: int = 64):
+        self.decay = decay
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.weights = np.zeros((capacity, capacity))   # W[i, j]: weight of bars with i and j
+        self.means = np.zeros((capacity, capacity))     # A[i, j]: mean of i over those bars
+        self.comoments = np.zeros((capacity, capacity)) # C[i, j]: co-moment of i and j
+        self.squares = np.zeros((capacity, capacity))   # S[i, j]: moment of i with itself over those bars
+        self.observations = np.zeros(capacity, dtype=np.int64)
+
+    def _ensure(self, symbol: str) -> int:
+        position = self.index.get(symbol)
+        if position is not None:
+            return position
+        position = len(self.symbols)
+        if position == len(self.observations):
+            capacity = position * 2
+            for name in ("weights", "means", "comoments", "squares"):
+                grown = np.zeros((capacity, capacity))
+                grown[:position, :position] = getattr(self, name)
+                setattr(self, name, grown)
+            observations = np.zeros(capacity, dtype=np.int64)
+            observations[:position] = self.observations
+            self.observations = observations
+        self.symbols.append(symbol)
+        self.index[symbol] = position
+        return position
+
+    def drop(self, symbols) -> int:
+        """Remove the rows and columns of symbols; returns the number removed."""
+        removed = {symbol for symbol in symbols if symbol in self.index}
+        if not removed:
+            return 0
+        keep = [position for position, symbol in enumerate(self.symbols) if symbol not in removed]
+        n = len(keep)
+        for name in ("weights", "means", "comoments", "squares"):
+            matrix = getattr(self, name)
+            matrix[:n, :n] = matrix[np.ix_(keep, keep)]
+            matrix[n:, :] = 0.0
+            matrix[:, n:] = 0.0
+        self.observations[:n] = self.observations[keep]
+        self.observations[n:] = 0
+        self.symbols = [self.symbols[position] for position in keep]
+        self.index = {symbol: position for position, symbol in enumerate(self.symbols)}
+        return len(removed)
+
+    def update(self, returns: Dict[str, float]):
+        """Add one bar of returns for the symbols that have one."""
+        for symbol in returns:
+            self._ensure(symbol)
+        n = len(self.symbols)
+        x = np.zeros(n)
+        present = np.zeros(n, dtype=bool)
+        for symbol, value in returns.items():
+            x[self.index[symbol]] = value
+            present[self.index[symbol]] = True
+
+        pair = np.outer(present, present)
+        W = self.weights[:n, :n]
+        A = self.means[:n, :n]
+        C = self.comoments[:n, :n]
+        S = self.squares[:n, :n]
+
+        # Decay the pairs that get a new observation, then add it with weight 1
+        decay = np.where(pair, self.decay, 1.0)
+        W *= decay
+        C *= decay
+        S *= decay
+        W += pair
+
+        xi = x[:, None]
+        delta = np.where(pair, xi - A, 0.0)
+        safe_weights = np.where(W > 0, W, 1.0)
+        A += delta / safe_weights
+        # Welford: (x_i - old mean_i) * (x_j - new mean_j), with means over common bars
+        C += np.where(pair, delta * (x[None, :] - A.T), 0.0)
+        S += np.where(pair, delta * (xi - A), 0.0)
+        self.observations[:n] += present
+
+    def covariance(self) -> np.ndarray:
+        n = len(self.symbols)
+        W = self.weights[:n, :n]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = self.comoments[:n, :n] / W
+        cov[W <= 0] = np.nan
+        enough = self.observations[:n] >= MIN_OBSERVATIONS
+        cov[~np.outer(enough, enough)] = np.nan
+        return cov
+
+    def correlation(self) -> np.ndarray:
+        n = len(self.symbols)
+        S = self.squares[:n, :n]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.comoments[:n, :n] / np.sqrt(S * S.T)
+        corr = np.clip(corr, -1.0, 1.0)
+        enough = self.observations[:n] >= MIN_OBSERVATIONS
+        corr[~np.outer(enough, enough)] = np.nan
+        np.fill_diagonal(corr, np.where(enough, 1.0, np.nan))
+        return corr
+
+
+class RiskEngine:
+    """Rolling return statistics for every symbol that gets prices.
+
+    Prices from the event bus are sampled into log-return bars every
+    RISK_BAR_SECONDS. Each bar updates the online covariance and bumps the
+    version; derived matrices are computed at most once per version and
+    symbol subsets are read out of the cached matrices. Symbols that
+    symbols_source() no longer returns (e.g. evicted from the watchlist) are
+    dropped when the next bar closes.
+    """
+
+    def __init__(self, bar_seconds: float = RISK_BAR_SECONDS, decay: float = RISK_DECAY,
+                 history_bars: int = RISK_HISTORY_BARS):
+        self.bar_seconds = bar_seconds
+        self.stats = OnlineCovariance(decay)
+        self.history_bars = history_bars
+        self.version = 0
+        self._latest: Dict[str, float] = {}
+        self._last_bar_prices: Dict[str, float] = {}
+        self._last_bar_time = 0.0
+        self._history: List[Dict[str, float]] = []
+        self._cache: Dict[str, Tuple[int, object]] = {}
+        self._lock = threading.Lock()
+        self.symbols_source = None
+
+    def start(self, symbols_source=None):
+        """Follow prices; symbols_source() returns the symbols whose statistics are kept."""
+        self.symbols_source = symbols_source
+        event_bus.subscribe("price", self.on_price)
+        event_bus.subscribe("prices_refreshed", self.on_refresh)
+
+    def stop(self):
+        event_bus.unsubscribe("price", self.on_price)
+        event_bus.unsubscribe("prices_refreshed", self.on_refresh)
+
+    def on_price(self, event: dict):
+        if event["price"]:
+            self._latest[event["symbol"]] = event["price"]
+
+    def on_refresh(self, event: dict):
+        if time.monotonic() - self._last_bar_time >= self.bar_seconds:
+            self.close_bar()
+
+    def close_bar(self, prices: Optional[Dict[str, float]] = None):
+        """Turn the latest prices into one bar of log returns."""
+        prices = dict(prices if prices is not None else self._latest)
+        tracked = set(self.symbols_source()) if self.symbols_source is not None else None
+        with self._lock:
+            if tracked is not None:
+                self._prune_locked(tracked)
+                prices = {symbol: price for symbol, price in prices.items() if symbol in tracked}
+            self._last_bar_time = time.monotonic()
+            returns = {
+                symbol: math.log(price / self._last_bar_prices[symbol])
+                for symbol, price in prices.items()
+                if price > 0 and self._last_bar_prices.get(symbol, 0) > 0
+            }
+            self._last_bar_prices.update(prices)
+            if not returns:
+                return
+            self.stats.update(returns)
+            self._history.append(returns)
+            if len(self._history) > self.history_bars:
+                del self._history[:len(self._history) - self.history_bars]
+            self.version += 1
+
+    def _prune_locked(self, tracked: set) -> int:
+        """Forget symbols outside tracked; called with the lock held."""
+        stale = [symbol for symbol in self.stats.symbols if symbol not in tracked]
+        stale += [symbol for symbol in self._last_bar_prices if symbol not in tracked and symbol not in self.stats.index]
+        if not stale:
+            return 0
+        self.stats.drop(stale)
+        for symbol in stale:
+            self._latest.pop(symbol, None)
+            self._last_bar_prices.pop(symbol, None)
+        stale = set(stale)
+        for bar in self._history:
+            for symbol in stale.intersection(bar):
+                del bar[symbol]
+        self.version += 1
+        return len(stale)
+
+    def _cached(self, name: str, compute):
+        """Compute name once per version; called with the lock held."""
+        entry = self._cache.get(name)
+        if entry is None or entry[0] != self.version:
+            entry = self._cache[name] = (self.version, compute())
+        return entry[1]
+
+    def _positions(self, symbols: List[str]) -> List[Optional[int]]:
+        return [self.stats.index.get(symbol) for symbol in symbols]
+
+    def _submatrix(self, matrix: np.ndarray, symbols: List[str]) -> np.ndarray:
+        positions = self._positions(symbols)
+        result = np.full((len(symbols), len(symbols)), np.nan)
+        known = [i for i, position in enumerate(positions) if position is not None]
+        if known:
+            rows = [positions[i] for i in known]
+            result[np.ix_(known, known)] = matrix[np.ix_(rows, rows)]
+        return result
+
+    def volatility(self, symbols: List[str]) -> Dict[str, dict]:
+        """Per-bar and annualized volatility of log returns."""
+        with self._lock:
+            cov = self._cached("covariance", self.stats.covariance)
+            observations = self.stats.observations
+            bars_per_year = SECONDS_PER_YEAR / self.bar_seconds
+            result = {}
+            for symbol, position in zip(symbols, self._positions(symbols)):
+                variance = cov[position, position] if position is not None else np.nan
+                bar_vol = math.sqrt(variance) if variance == variance and variance >= 0 else None
+                result[symbol] = {
+                    "volatility": bar_vol,
+                    "annualized_volatility": bar_vol * math.sqrt(bars_per_year) if bar_vol is not None else None,
+                    "observations": int(observations[position]) if position is not None else 0,
+                }
+            return result
+
+    def correlation(self, symbols: List[str]) -> np.ndarray:
+        with self._lock:
+            return self._submatrix(self._cached("correlation", self.stats.correlation), symbols)
+
+    def value_at_risk(self, exposures: Dict[str, float], confidence: float = 0.95,
+                      horizon_bars: int = 1, method: str = "parametric") -> Optional[float]:
+        """Loss (positive number, in exposure units) not exceeded with the given
+        confidence over horizon_bars, for a position of exposures[symbol]
+        currency units per symbol. None when there is not enough data.
+        """
+        symbols = [symbol for symbol, exposure in exposures.items() if exposure]
+        if not symbols:
+            return 0.0
+        weights = np.array([exposures[symbol] for symbol in symbols])
+
+        if method == "historical":
+            with self._lock:
+                history = list(self._history)
+            if len(history) < MIN_OBSERVATIONS:
+                return None
+            # Simple returns per bar; a symbol without a return in a bar counts as flat
+            matrix = np.array([[math.expm1(bar.get(symbol, 0.0)) for symbol in symbols] for bar in history])
+            pnl = matrix @ weights
+            loss = -np.quantile(pnl, 1 - confidence)
+            return float(max(loss, 0.0) * math.sqrt(horizon_bars))
+
+        with self._lock:
+            cov = self._submatrix(self._cached("covariance", self.stats.covariance), symbols)
+        if np.isnan(cov).any():
+            return None
+        variance = float(weights @ cov @ weights)
+        z = NormalDist().inv_cdf(confidence)
+        return z * math.sqrt(max(variance, 0.0) * horizon_bars)
+
+
+# Global instance
+risk_engine = RiskEngine()
\ No newline at end of file
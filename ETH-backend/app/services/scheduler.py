@@ -0,0 +1,257 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional
+from dotenv import load_dotenv
+from app.services.providers import ProviderUnavailable
+from app.services.tracing import span
+
+load_dotenv()
+
+# Requests that arrive within this window are merged into one bulk call
+BATCH_WINDOW_SECONDS = float(os.getenv("UPSTREAM_BATCH_WINDOW_SECONDS", "0.05"))
+MAX_BATCH_SIZE = int(os.getenv("UPSTREAM_MAX_BATCH_SIZE", "50"))
+# Requests wait this long for upstream fetches on a cache miss, then answer with what they have
+REQUEST_DEADLINE_SECONDS = float(os.getenv("UPSTREAM_REQUEST_DEADLINE_SECONDS", "3"))
+
+# Default (requests per second, burst) per provider, overridable with
+# <PROVIDER>_RATE_PER_SECOND and <PROVIDER>_BURST
+DEFAULT_PROVIDER_LIMITS = {
+    "binance": (10.0, 20),
+    "coingecko": (0.5, 3),
+    "yahoo": (2.0, 5),
+}
+
+
+class TokenBucket:
+    """Classic token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting at most timeout seconds. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait_for = (1 - self.tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_for = min(wait_for, remaining)
+            time.sleep(wait_for)
+
+    def try_acquire(self, reserve: float = 0) -> bool:
+        """Take one token only if `reserve` more stay in the bucket; never waits."""
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1 + reserve:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class UpstreamScheduler:
+    """Single entry point for upstream traffic.
+
+    - acquire() enforces a per-provider token bucket before every upstream call
+    - run() merges concurrent calls for the same key into one in-flight call
+    - fetch_batched() collects symbol requests arriving within a short window
+      and resolves them all with a single bulk call
+    """
+
+    def __init__(self, batch_window: float = BATCH_WINDOW_SECONDS,
+                 max_batch_size: int = MAX_BATCH_SIZE):
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+        self._batches: Dict[Hashable, Dict[str, Future]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="upstream-batch")
+
+        for provider, (rate, burst) in DEFAULT_PROVIDER_LIMITS.items():
+            env_prefix = provider.upper()
+            self.configure(
+                provider,
+                float(os.getenv(f"{env_prefix}_RATE_PER_SECOND", rate)),
+                int(os.getenv(f"{env_prefix}_BURST", burst))
+            )
+
+    def configure(self, provider: str, rate: float, burst: int):
+        """Set the token bucket for a provider."""
+        self.buckets[provider] = TokenBucket(rate, burst)
+
+    def acquire(self, provider: str, timeout: Optional[float] = 5.0):
+        """Wait for a request token for provider or raise ProviderUnavailable."""
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return
+        if not bucket.acquire(timeout):
+            raise ProviderUnavailable(f"{provider} rate limit budget exhausted")
+
+    def acquire_spare(self, provider: str, reserve: float = 1) -> bool:
+        """Take a token for background work only when the budget is idle.
+
+        Succeeds only while `reserve` tokens remain for request traffic, so
+        low-priority jobs back off whenever user-facing calls need the budget.
+        """
+        bucket = self.buckets.get(provider)
+        return bucket is None or bucket.try_acquire(reserve)
+
+    def run(self, key: Hashable, fn: Callable, timeout: Optional[float] = None):
+        """Run fn once for all concurrent callers that use the same key."""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not owner:
+            return future.result(timeout)
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def submit_batched(self, provider: str, symbol: str,
+                       bulk_fn: Callable[[List[str]], Dict[str, dict]]) -> Future:
+        """Queue symbol for the next bulk call of bulk_fn and return its future.
+
+        bulk_fn receives the list of symbols and returns a dict keyed by symbol;
+        symbols missing from the dict resolve to None.
+        """
+        batch_key = (provider, bulk_fn)
+        inflight_key = (provider, bulk_fn, symbol)
+        flush_now = None
+
+        with self._lock:
+            future = self._inflight.get(inflight_key)
+            if future is not None:
+                return future
+
+            future = Future()
+            self._inflight[inflight_key] = future
+
+            batch = self._batches.get(batch_key)
+            if batch is None:
+                batch = self._batches[batch_key] = {}
+                timer = threading.Timer(self.batch_window, self._flush, args=(batch_key, batch))
+                timer.daemon = True
+                timer.start()
+            batch[symbol] = future
+
+            if len(batch) >= self.max_batch_size:
+                flush_now = self._batches.pop(batch_key)
+
+        if flush_now is not None:
+            self._executor.submit(self._run_batch, batch_key, flush_now)
+        return future
+
+    def fetch_batched(self, provider: str, symbol: str,
+                      bulk_fn: Callable[[List[str]], Dict[str, dict]],
+                      timeout: Optional[float] = None) -> Optional[dict]:
+        """Blocking form of submit_batched()."""
+        with span(f"upstream.{provider}"):
+            return self.submit_batched(provider, symbol, bulk_fn).result(timeout)
+
+    def fetch_many(self, provider: str, symbols: List[str],
+                   bulk_fn: Callable[[List[str]], Dict[str, dict]],
+                   timeout: Optional[float] = None) -> Dict[str, Optional[dict]]:
+        """Fetch several symbols through the batcher and wait for all of them."""
+        futures = {symbol: self.submit_batched(provider, symbol, bulk_fn) for symbol in symbols}
+        results = {}
+        with span(f"upstream.{provider}"):
+            for symbol, future in futures.items():
+                try:
+                    results[symbol] = future.result(timeout)
+                except Exception as e:
+                    print(f"Error fetching {symbol} from {provider}: {str(e)}")
+                    results[symbol] = None
+        return results
+
+    async def fetch_many_async(self, provider: str, symbols: List[str],
+                               bulk_fn: Callable[[List[str]], Dict[str, dict]],
+                               timeout: Optional[float] = REQUEST_DEADLINE_SECONDS,
+                               on_late: Optional[Callable[[str, Optional[dict]], None]] = None
+                               ) -> Dict[str, Optional[dict]]:
+        """Async form of fetch_many(): waits on the event loop instead of a thread.
+
+        Symbols still in flight after timeout are left out of the result.
+        Their fetch keeps running for whoever else shares it, and on_late,
+        if given, receives each of them from the batch thread when it lands.
+        """
+        futures = {symbol: self.submit_batched(provider, symbol, bulk_fn) for symbol in symbols}
+        if not futures:
+            return {}
+        waiters = {symbol: asyncio.wrap_future(future) for symbol, future in futures.items()}
+        with span(f"upstream.{provider}"):
+            done, _ = await asyncio.wait(waiters.values(), timeout=timeout)
+
+        results = {}
+        for symbol, waiter in waiters.items():
+            if waiter not in done:
+                if on_late is not None:
+                    futures[symbol].add_done_callback(
+                        lambda future, symbol=symbol: on_late(symbol, None if future.exception() else future.result())
+                    )
+                # Retrieve a late failure so it is not reported as unhandled
+                waiter.add_done_callback(lambda waiter: waiter.cancelled() or waiter.exception())
+                continue
+            try:
+                results[symbol] = waiter.result()
+            except Exception as e:
+                print(f"Error fetching {symbol} from {provider}: {str(e)}")
+                results[symbol] = None
+        return results
+
+    def _flush(self, batch_key: Hashable, batch: Dict[str, Future]):
+        with self._lock:
+            # The batch may already have been flushed because it filled up
+            if self._batches.get(batch_key) is not batch:
+                return
+            del self._batches[batch_key]
+        self._executor.submit(self._run_batch, batch_key, batch)
+
+    def _run_batch(self, batch_key: Hashable, batch: Dict[str, Future]):
+        provider, bulk_fn = batch_key
+        try:
+            results = bulk_fn(list(batch))
+            for symbol, future in batch.items():
+                future.set_result(results.get(symbol))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                for symbol in batch:
+                    self._inflight.pop((provider, bulk_fn, symbol), None)
+
+
+# Global instance
+upstream_scheduler = UpstreamScheduler()
@@ -0,0 +1,34 @@
+import json
+from typing import Any, Iterable, Type
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a JSON-compatible value to bytes, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def render_model(model: Type[BaseModel], data: dict) -> bytes:
+    """Validate data against a response schema once and return its JSON bytes.
+
+    The output matches what FastAPI would send for the same response_model.
+    """
+    return dumps(model(**data).model_dump(mode="json"))
+
+
+def join_array(fragments: Iterable[bytes]) -> bytes:
+    """Assemble a JSON array from pre-encoded element fragments."""
+    return b"[" + b",".join(fragments) + b"]"
+
+
+class RawJSONResponse(Response):
+    """Response for JSON bodies that were already encoded."""
+    media_type = "application/json"
\ No newline at end of file
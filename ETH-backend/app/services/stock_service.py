@@ -1,60 +1,170 @@
 import yfinance as yf
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 import pandas as pd
+from app.services.fundamentals import fundamentals_cache
+from app.services.providers import UpstreamProvider
+from app.services.scheduler import upstream_scheduler, REQUEST_DEADLINE_SECONDS
+from app.services.recorder import market_recorder
+from app.services.watchlist import watchlist
 
 class StockService:
-    def __init__(self):
-        pass
-    
+    def __init__(self, client=None):
+        # yfinance module by default; benchmarks inject a local fake
+        self.yahoo = client or yf
+        self.yahoo_provider = UpstreamProvider("yahoo")
+
+    def _quote_from_history(self, symbol: str, hist: pd.DataFrame,
+                            fetched_at: Optional[datetime] = None) -> Optional[dict]:
+        """Build a quote dict from a price history frame and cached fundamentals."""
+        if hist.empty:
+            return None
+
+        current_price = hist['Close'].iloc[-1]
+
+        # Calculate 24h change
+        if len(hist) >= 2:
+            prev_price = hist['Close'].iloc[-2]
+            change = current_price - prev_price
+            change_percent = (change / prev_price) * 100
+        else:
+            change = 0
+            change_percent = 0
+
+        volume = hist['Volume'].iloc[-1] if 'Volume' in hist else 0
+        # Market cap follows the price when the share count is known
+        fundamentals = fundamentals_cache.get(symbol.upper()) or {}
+        if fundamentals.get("shares_outstanding"):
+            market_cap = fundamentals["shares_outstanding"] * current_price
+        else:
+            market_cap = fundamentals.get("market_cap") or 0
+
+        return {
+            "symbol": symbol.upper(),
+            "price": float(current_price),
+            "change": float(change),
+            "change_percent": float(change_percent),
+            "volume": int(volume) if pd.notna(volume) else 0,
+            "market_cap": float(market_cap),
+            "name": fundamentals.get("name"),
+            "sector": fundamentals.get("sector"),
+            "last_updated": fetched_at or datetime.utcnow()
+        }
+
+    def _fetch_info(self, symbol: str) -> dict:
+        return self.yahoo.Ticker(symbol).info
+
+    def fetch_info(self, symbol: str) -> dict:
+        """Ticker.info of one symbol, for the fundamentals cache.
+
+        The caller holds a yahoo token (see FundamentalsCache.refresh_due).
+        """
+        info = self.yahoo_provider.call(self._fetch_info, symbol)
+        market_recorder.record("yahoo", "info", info, {"symbol": symbol})
+        return info
+
+    def _fetch_quotes(self, symbols: List[str]) -> Dict[str, dict]:
+        """Bulk-fetch quotes for symbols with a single yfinance download.
+
+        Only OHLCV is fetched here; volume comes from the latest bar and
+        market cap from the fundamentals cache.
+        """
+        upstream_scheduler.acquire("yahoo")
+        data = self.yahoo_provider.call(
+            self.yahoo.download, symbols, period="1d", group_by="ticker",
+            progress=False, threads=False, auto_adjust=False,
+            timeout=self.yahoo_provider.timeout
+        )
+        market_recorder.record("yahoo", "quotes", {"download": data}, {"symbols": symbols})
+        return self.parse_quotes(symbols, data)
+
+    def _history_for(self, data: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        """Extract one symbol's rows from a yfinance download frame."""
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                return pd.DataFrame()
+            hist = data[symbol]
+        else:
+            hist = data
+        return hist.dropna(subset=['Close'])
+
+    def parse_quotes(self, symbols: List[str], data: pd.DataFrame, infos: Optional[Dict[str, dict]] = None,
+                     fetched_at: Optional[datetime] = None) -> Dict[str, dict]:
+        """Build quotes from a raw yfinance download frame.
+
+        infos (recordings made before fundamentals were cached separately
+        carry them) seed the fundamentals cache.
+        """
+        for symbol, info in (infos or {}).items():
+            fundamentals_cache.store(symbol, info)
+        results = {}
+        for symbol in symbols:
+            try:
+                quote = self._quote_from_history(symbol, self._history_for(data, symbol), fetched_at)
+                if quote:
+                    results[symbol] = quote
+            except Exception as e:
+                print(f"Error parsing {symbol} stock price: {str(e)}")
+        return results
+
+    def fetch_history(self, symbols: List[str], start: datetime, end: datetime,
+                      interval: str = "1d", timeout: Optional[float] = None) -> Dict[str, pd.DataFrame]:
+        """Download OHLCV history for several symbols in one yfinance call.
+
+        Waits for a yahoo token without a deadline, so long-running jobs can
+        share the provider budget with live traffic.
+        """
+        upstream_scheduler.acquire("yahoo", timeout=None)
+        data = self.yahoo_provider.call(
+            self.yahoo.download, symbols, start=start, end=end, interval=interval,
+            group_by="ticker", progress=False, threads=False, auto_adjust=False,
+            timeout=timeout or self.yahoo_provider.timeout
+        )
+
+        results = {}
+        for symbol in symbols:
+            hist = self._history_for(data, symbol)
+            if not hist.empty:
+                results[symbol] = hist
+        return results
+
     def get_stock_price(self, symbol: str) -> Optional[dict]:
-        """Get current stock price for a given symbol."""
+        """Get current stock price for a given symbol.
+
+        Goes through the upstream scheduler, so concurrent requests for the
+        same or different tickers are merged into one bulk call.
+        """
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            # Get current price
-            hist = ticker.history(period="1d")
-            if hist.empty:
-                return None
-            
-            current_price = hist['Close'].iloc[-1]
-            
-            # Calculate 24h change
-            if len(hist) >= 2:
-                prev_price = hist['Close'].iloc[-2]
-                change = current_price - prev_price
-                change_percent = (change / prev_price) * 100
-            else:
-                change = 0
-                change_percent = 0
-            
-            return {
-                "symbol": symbol.upper(),
-                "price": float(current_price),
-                "change": float(change),
-                "change_percent": float(change_percent),
-                "volume": int(info.get('volume', 0)),
-                "market_cap": float(info.get('marketCap', 0)),
-                "last_updated": datetime.utcnow()
-            }
+            return upstream_scheduler.fetch_batched("yahoo", symbol.upper(), self._fetch_quotes)
         except Exception as e:
             print(f"Error fetching {symbol} stock price: {str(e)}")
             return None
-    
+
     def get_multiple_stock_prices(self, symbols: List[str]) -> List[dict]:
         """Get prices for multiple stock symbols."""
-        results = []
-        for symbol in symbols:
-            price_data = self.get_stock_price(symbol)
-            if price_data:
-                results.append(price_data)
-        return results
-    
+        results = upstream_scheduler.fetch_many(
+            "yahoo", [symbol.upper() for symbol in symbols], self._fetch_quotes
+        )
+        return [price_data for price_data in results.values() if price_data]
+
+    async def get_stock_prices_async(self, symbols: List[str], timeout: float = REQUEST_DEADLINE_SECONDS,
+                                     on_late=None) -> Dict[str, Optional[dict]]:
+        """Prices keyed by symbol for request handlers, without blocking a thread.
+
+        Misses of one request share a bulk download, and concurrent requests
+        share the in-flight fetch of a symbol. Symbols not priced within
+        timeout are None; on_late(symbol, quote) receives them when they land.
+        """
+        symbols = [symbol.upper() for symbol in symbols]
+        results = await upstream_scheduler.fetch_many_async(
+            "yahoo", symbols, self._fetch_quotes, timeout=timeout, on_late=on_late
+        )
+        return {symbol: results.get(symbol) for symbol in symbols}
+
     def get_popular_stocks(self) -> List[dict]:
         """Get prices for popular stocks."""
-        popular_symbols = ["AAPL", "TSLA", "GOOGL", "MSFT", "AMZN", "META", "NVDA", "NFLX"]
+        popular_symbols = watchlist.popular("stock", limit=8)
         return self.get_multiple_stock_prices(popular_symbols)
 
 # Global instance
-stock_service = StockService() 
\ No newline at end of file
+stock_service = StockService()
\ No newline at end of file
@@ -0,0 +1,429 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from app.database import SessionLocal
+from app.models.strategy import Strategy
+from app.models.strategy_signal import StrategySignal
+from app.services.events import event_bus
+from app.services.metrics import strategy_bar_duration, strategy_failures_total, strategy_shards_skipped_total
+from app.services.strategy_worker import evaluate_shard, init_worker, normalize_params
+from app.services.watchlist import watchlist
+
+load_dotenv()
+
+# Candle length; bars close on wall-clock multiples of this
+STRATEGY_BAR_SECONDS = float(os.getenv("STRATEGY_BAR_SECONDS", "60"))
+# Closes kept per symbol, which bounds every strategy lookback
+STRATEGY_WINDOW = int(os.getenv("STRATEGY_WINDOW", "256"))
+STRATEGY_WORKERS = int(os.getenv("STRATEGY_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+# CPU time one strategy may use per bar, and wall time a shard may take
+STRATEGY_BUDGET_MS = float(os.getenv("STRATEGY_BUDGET_MS", "5"))
+STRATEGY_DEADLINE_MS = float(os.getenv("STRATEGY_DEADLINE_MS", "250"))
+# Consecutive over-budget or failing bars before a strategy is disabled; only
+# failures the worker attributes to one strategy count
+STRATEGY_MAX_STRIKES = 3
+# Shards per worker; more shards balance better, fewer pickle less
+SHARDS_PER_WORKER = 4
+# Signals written to the database per transaction
+SIGNAL_BATCH_SIZE = 500
+
+
+class ClosesMatrix:
+    """Last STRATEGY_WINDOW closes of every strategy symbol, one row per symbol,
+    in a shared memory block the worker processes read without copying.
+
+    Rows are appended as symbols appear and never move. When the block is
+    full it is replaced by one twice the size under a new name; workers
+    notice the new name and reattach. The block is only created by open()
+    (or first use), so importing the module allocates nothing.
+    """
+
+    def __init__(self, window: int = STRATEGY_WINDOW, capacity: int = 64):
+        self.window = window
+        self.capacity = capacity
+        self.rows: Dict[str, int] = {}
+        self._block: Optional[shared_memory.SharedMemory] = None
+        self.closes: Optional[np.ndarray] = None
+
+    def open(self):
+        if self._block is None:
+            capacity = self.capacity
+            while capacity < len(self.rows):
+                capacity *= 2
+            self.closes = self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        block = shared_memory.SharedMemory(create=True, size=capacity * self.window * 8)
+        closes = np.ndarray((capacity, self.window), dtype=np.float64, buffer=block.buf)
+        closes.fill(np.nan)
+        if self._block is not None:
+            closes[:len(self.rows)] = self.closes[:len(self.rows)]
+            self._release()
+        self._block = block
+        return closes
+
+    def _release(self):
+        self.closes = None
+        self._block.close()
+        self._block.unlink()
+
+    @property
+    def name(self) -> str:
+        self.open()
+        return self._block.name
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        self.open()
+        return self.closes.shape
+
+    def row(self, symbol: str) -> int:
+        position = self.rows.get(symbol)
+        if position is None:
+            self.open()
+            position = len(self.rows)
+            if position == self.closes.shape[0]:
+                self.closes = self._allocate(position * 2)
+            self.rows[symbol] = position
+        return position
+
+    def append(self, prices: Dict[str, float]):
+        """Shift every row one bar left and store the new closes.
+
+        Symbols without a price this bar repeat their previous close.
+        """
+        self.open()
+        n = len(self.rows)
+        closes = self.closes[:n]
+        closes[:, :-1] = closes[:, 1:]
+        for symbol, price in prices.items():
+            position = self.rows.get(symbol)
+            if position is not None and price and price > 0:
+                closes[position, -1] = price
+
+    def close(self):
+        if self._block is not None:
+            self._release()
+            self._block = None
+
+
+class StrategyRunner:
+    """Evaluates every active strategy on each candle close.
+
+    Closes live in a shared ClosesMatrix; strategies are split into shards
+    that a process pool evaluates in parallel against the latest bar. Each
+    strategy has a CPU time budget enforced inside the worker, and each
+    shard a wall-clock deadline, so a slow or crashing strategy only costs
+    its own shard. Strategies that keep exceeding the budget or raising are
+    disabled. A shard that misses the deadline or loses its worker says
+    nothing about any one strategy (the host is loaded, or one process
+    died), so it is only counted and skipped for that bar. Signals go to an
+    execution queue drained by a separate thread that stores them and
+    publishes "strategy_signal" events.
+    """
+
+    def __init__(self, session_factory=SessionLocal, bar_seconds: float = STRATEGY_BAR_SECONDS,
+                 window: int = STRATEGY_WINDOW, workers: int = STRATEGY_WORKERS,
+                 budget_ms: float = STRATEGY_BUDGET_MS, deadline_ms: float = STRATEGY_DEADLINE_MS):
+        self.session_factory = session_factory
+        self.bar_seconds = bar_seconds
+        self.window = window
+        self.workers = workers
+        self.budget_seconds = budget_ms / 1000
+        self.deadline_seconds = deadline_ms / 1000
+        self.matrix = ClosesMatrix(window)
+        # strategy id -> (user_id, symbol, kind, params)
+        self._strategies: Dict[int, Tuple[int, str, str, dict]] = {}
+        self._strikes: Dict[int, int] = {}
+        self._shards: Optional[List[List[tuple]]] = None
+        self._latest: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.signals: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self.notifiers: List[Callable[[dict], None]] = [self._publish]
+        self.last_bar: Optional[dict] = None
+        self._stop = threading.Event()
+        self._clock: Optional[threading.Thread] = None
+        self._executor: Optional[threading.Thread] = None
+
+    # Lifecycle
+
+    def start(self):
+        """Load active strategies, start the pool and close bars on the clock."""
+        if self._clock is not None:
+            return
+        self._stop.clear()
+        self.matrix.open()
+        self.load()
+        self._ensure_pool()
+        event_bus.subscribe("price", self.on_price)
+        self._executor = threading.Thread(target=self._execution_loop, daemon=True, name="strategy-signals")
+        self._executor.start()
+        self._clock = threading.Thread(target=self._clock_loop, daemon=True, name="strategy-clock")
+        self._clock.start()
+        print(f"Strategy runner started with {len(self._strategies)} active strategies "
+              f"on {self.workers} workers")
+
+    def stop(self):
+        event_bus.unsubscribe("price", self.on_price)
+        self._stop.set()
+        if self._clock is not None:
+            self._clock.join(timeout=5)
+            self._clock = None
+        if self._executor is not None:
+            self.signals.put(None)
+            self._executor.join(timeout=5)
+            self._executor = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self.matrix.close()
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            # spawn: forking a process that runs web server threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+            )
+            # Start the workers and attach them to the closes now, not on the first bar
+            name, shape = self.matrix.name, self.matrix.shape
+            for future in [self._pool.submit(evaluate_shard, name, shape, [], self.budget_seconds)
+                           for _ in range(self.workers)]:
+                future.result()
+
+    # Strategy set
+
+    def load(self):
+        db = self.session_factory()
+        try:
+            rows = db.query(Strategy.id, Strategy.user_id, Strategy.symbol, Strategy.asset_type,
+                            Strategy.kind, Strategy.params) \
+                .filter(Strategy.is_active == True).all()  # noqa: E712
+        finally:
+            db.close()
+
+        strategies, kinds = {}, {}
+        for strategy_id, user_id, symbol, asset_type, kind, params in rows:
+            try:
+                params = normalize_params(kind, params, self.window)
+            except ValueError as e:
+                print(f"Skipping strategy {strategy_id}: {str(e)}")
+                continue
+            strategies[strategy_id] = (user_id, symbol, kind, params)
+            kinds[symbol] = asset_type
+        with self._lock:
+            self._strategies = strategies
+            for symbol in kinds:
+                self.matrix.row(symbol)
+            self._shards = None
+        for symbol, kind in kinds.items():
+            watchlist.pin(symbol, kind)
+
+    def add(self, strategy: Strategy):
+        params = normalize_params(strategy.kind, strategy.params, self.window)
+        with self._lock:
+            self._strategies[strategy.id] = (strategy.user_id, strategy.symbol, strategy.kind, params)
+            self.matrix.row(strategy.symbol)
+            self._shards = None
+        # Strategy symbols must keep being refreshed to produce bars
+        watchlist.pin(strategy.symbol, strategy.asset_type)
+
+    def remove(self, strategy_id: int):
+        with self._lock:
+            if self._strategies.pop(strategy_id, None) is not None:
+                self._strikes.pop(strategy_id, None)
+                self._shards = None
+
+    def count(self) -> int:
+        return len(self._strategies)
+
+    def _build_shards(self) -> List[List[tuple]]:
+        """Split strategies into shards of worker tasks; called with the lock held."""
+        shard_count = max(1, min(self.workers * SHARDS_PER_WORKER, len(self._strategies)))
+        shards: List[List[tuple]] = [[] for _ in range(shard_count)]
+        for i, (strategy_id, (_, symbol, kind, params)) in enumerate(self._strategies.items()):
+            shards[i % shard_count].append((strategy_id, kind, self.matrix.rows[symbol], params))
+        return shards
+
+    # Bars
+
+    def on_price(self, event: dict):
+        if event["price"]:
+            self._latest[event["symbol"]] = event["price"]
+
+    def _clock_loop(self):
+        while not self._stop.is_set():
+            now = time.time()
+            boundary = (now // self.bar_seconds + 1) * self.bar_seconds
+            if self._stop.wait(boundary - now):
+                return
+            try:
+                self.close_bar(bar_time=datetime.utcfromtimestamp(boundary))
+            except Exception as e:
+                print(f"Error closing strategy bar: {str(e)}")
+
+    def close_bar(self, prices: Optional[Dict[str, float]] = None,
+                  bar_time: Optional[datetime] = None) -> dict:
+        """Append one bar of closes and evaluate every active strategy on it."""
+        started = time.perf_counter()
+        bar_time = bar_time or datetime.utcnow()
+        with self._lock:
+            self.matrix.append(dict(prices if prices is not None else self._latest))
+            if self._shards is None:
+                self._shards = self._build_shards()
+            shards = self._shards
+            strategies = self._strategies
+            name, shape = self.matrix.name, self.matrix.shape
+        self._ensure_pool()
+
+        futures = {
+            self._pool.submit(evaluate_shard, name, shape, tasks, self.budget_seconds): tasks
+            for tasks in shards if tasks
+        }
+        signal_count, late, crashed = 0, 0, 0
+        failed: Dict[int, str] = {}
+        succeeded = set()
+        try:
+            for future in as_completed(futures, timeout=self.deadline_seconds):
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    # A worker died; release the broken pool and rebuild it for the next bar
+                    if self._pool is not None:
+                        self._pool.shutdown(wait=False, cancel_futures=True)
+                        self._pool = None
+                    crashed += len(futures[future])
+                    strategy_shards_skipped_total.labels("crashed").inc()
+                    continue
+                for strategy_id in result["over_budget"]:
+                    failed[strategy_id] = f"exceeded the {self.budget_seconds * 1000:g} ms CPU budget"
+                for strategy_id, error in result["errors"]:
+                    failed[strategy_id] = f"error: {error}"
+                succeeded.update(task[0] for task in futures[future])
+                for strategy_id, side, price, reason in result["signals"]:
+                    entry = strategies.get(strategy_id)
+                    if entry is None:
+                        continue
+                    user_id, symbol, _, params = entry
+                    self.signals.put({
+                        "strategy_id": strategy_id,
+                        "user_id": user_id,
+                        "symbol": symbol,
+                        "side": side,
+                        "price": price,
+                        "quantity": params["quantity"],
+                        "reason": reason,
+                        "bar_time": bar_time,
+                    })
+                    signal_count += 1
+        except FuturesTimeout:
+            # Late shards keep running; their results are dropped for this bar
+            for future, tasks in futures.items():
+                if not future.done():
+                    late += len(tasks)
+                    strategy_shards_skipped_total.labels("deadline").inc()
+
+        self._record_outcomes(succeeded, failed)
+        duration = time.perf_counter() - started
+        strategy_bar_duration.observe(duration)
+        self.last_bar = {
+            "bar_time": bar_time,
+            "strategies": len(strategies),
+            "shards": len(futures),
+            "signals": signal_count,
+            "failed": len(failed),
+            "late": late,
+            "crashed": crashed,
+            "duration_ms": round(duration * 1000, 3),
+        }
+        return self.last_bar
+
+    def _record_outcomes(self, succeeded: set, failed: Dict[int, str]):
+        """Count strikes for failed strategies and disable repeat offenders."""
+        disabled = {}
+        with self._lock:
+            for strategy_id in succeeded.difference(failed):
+                self._strikes.pop(strategy_id, None)
+            for strategy_id, reason in failed.items():
+                strategy_failures_total.labels("budget" if "budget" in reason else "error").inc()
+                strikes = self._strikes[strategy_id] = self._strikes.get(strategy_id, 0) + 1
+                if strikes >= STRATEGY_MAX_STRIKES and strategy_id in self._strategies:
+                    del self._strategies[strategy_id]
+                    del self._strikes[strategy_id]
+                    self._shards = None
+                    disabled[strategy_id] = reason
+        if disabled:
+            self._disable(disabled)
+
+    def _disable(self, disabled: Dict[int, str]):
+        db = self.session_factory()
+        try:
+            for strategy_id, reason in disabled.items():
+                db.query(Strategy).filter(Strategy.id == strategy_id).update(
+                    {"is_active": False, "disabled_reason": f"Disabled after {STRATEGY_MAX_STRIKES} bars: {reason}"},
+                    synchronize_session=False
+                )
+            db.commit()
+        except Exception as e:
+            print(f"Error disabling strategies: {str(e)}")
+        finally:
+            db.close()
+
+    # Execution queue
+
+    def _execution_loop(self):
+        while True:
+            item = self.signals.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < SIGNAL_BATCH_SIZE:
+                try:
+                    item = self.signals.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.signals.put(None)
+                    break
+                batch.append(item)
+            try:
+                self._execute(batch)
+            except Exception as e:
+                print(f"Error executing strategy signals: {str(e)}")
+
+    def _execute(self, batch: List[dict]):
+        db = self.session_factory()
+        try:
+            rows = [StrategySignal(**signal) for signal in batch]
+            db.add_all(rows)
+            db.flush()
+            for signal, row in zip(batch, rows):
+                signal["signal_id"] = row.id
+            db.commit()
+        finally:
+            db.close()
+
+        for signal in batch:
+            for notify in self.notifiers:
+                try:
+                    notify(signal)
+                except Exception as e:
+                    print(f"Error in strategy signal notifier: {str(e)}")
+
+    def _publish(self, signal: dict):
+        event_bus.publish("strategy_signal", signal)
+
+
+# Global instance
+strategy_runner = StrategyRunner()
@@ -0,0 +1,176 @@
+# Strategy evaluation inside the strategy process pool. Kept free of database
+# and web imports so spawned workers start quickly.
+import signal
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# kind -> default parameters; every integer parameter is a lookback in bars
+STRATEGY_KINDS: Dict[str, dict] = {
+    "sma_cross": {"fast": 10, "slow": 30, "quantity": 1.0},
+    "rsi": {"period": 14, "lower": 30.0, "upper": 70.0, "quantity": 1.0},
+    "breakout": {"lookback": 20, "quantity": 1.0},
+}
+
+
+def normalize_params(kind: str, params: Optional[dict], window: int) -> dict:
+    """Merge params over the kind's defaults and validate them; raises ValueError."""
+    if kind not in STRATEGY_KINDS:
+        raise ValueError(f"Unknown strategy kind '{kind}', expected one of {', '.join(STRATEGY_KINDS)}")
+    defaults = STRATEGY_KINDS[kind]
+    params = params or {}
+    unknown = [key for key in params if key not in defaults]
+    if unknown:
+        raise ValueError(f"Unknown parameters for {kind}: {', '.join(unknown)}")
+
+    result = {}
+    for key, default in defaults.items():
+        value = params.get(key, default)
+        try:
+            value = type(default)(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Parameter '{key}' must be a number")
+        if value <= 0:
+            raise ValueError(f"Parameter '{key}' must be positive")
+        result[key] = value
+
+    if kind == "sma_cross" and result["fast"] >= result["slow"]:
+        raise ValueError("fast must be smaller than slow")
+    if kind == "rsi" and not result["lower"] < result["upper"] < 100:
+        raise ValueError("RSI thresholds must satisfy lower < upper < 100")
+    if required_bars(kind, result) > window:
+        raise ValueError(f"Lookback too long, at most {window} bars are kept")
+    return result
+
+
+def required_bars(kind: str, params: dict) -> int:
+    """Closes needed to evaluate the current and the previous bar."""
+    if kind == "sma_cross":
+        return params["slow"] + 1
+    if kind == "rsi":
+        return params["period"] + 2
+    return params["lookback"] + 2
+
+
+def _sma_cross(closes: np.ndarray, params: dict) -> Optional[Tuple[str, str]]:
+    fast, slow = params["fast"], params["slow"]
+    previous, current = closes[-slow - 1:-1], closes[-slow:]
+    fast_prev, slow_prev = previous[-fast:].mean(), previous.mean()
+    fast_now, slow_now = current[-fast:].mean(), current.mean()
+    if fast_prev <= slow_prev and fast_now > slow_now:
+        return "buy", f"SMA{fast} crossed above SMA{slow}"
+    if fast_prev >= slow_prev and fast_now < slow_now:
+        return "sell", f"SMA{fast} crossed below SMA{slow}"
+    return None
+
+
+def _rsi_value(closes: np.ndarray) -> float:
+    diffs = np.diff(closes)
+    gains = diffs[diffs > 0].sum()
+    losses = -diffs[diffs < 0].sum()
+    if losses == 0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + gains / losses)
+
+
+def _rsi(closes: np.ndarray, params: dict) -> Optional[Tuple[str, str]]:
+    period = params["period"]
+    previous = _rsi_value(closes[-period - 2:-1])
+    current = _rsi_value(closes[-period - 1:])
+    if previous < params["lower"] <= current:
+        return "buy", f"RSI{period} crossed up through {params['lower']:g}"
+    if previous > params["upper"] >= current:
+        return "sell", f"RSI{period} crossed down through {params['upper']:g}"
+    return None
+
+
+def _breakout(closes: np.ndarray, params: dict) -> Optional[Tuple[str, str]]:
+    lookback = params["lookback"]
+    high, low = closes[-lookback - 1:-1].max(), closes[-lookback - 1:-1].min()
+    previous_high, previous_low = closes[-lookback - 2:-2].max(), closes[-lookback - 2:-2].min()
+    if closes[-1] > high and closes[-2] <= previous_high:
+        return "buy", f"Close broke above the {lookback}-bar high"
+    if closes[-1] < low and closes[-2] >= previous_low:
+        return "sell", f"Close broke below the {lookback}-bar low"
+    return None
+
+
+EVALUATORS = {"sma_cross": _sma_cross, "rsi": _rsi, "breakout": _breakout}
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def _on_budget_exceeded(signum, frame):
+    raise BudgetExceeded()
+
+
+# Per-worker attachment to the runner's shared closes, by block name
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, np.ndarray]] = {}
+
+
+def init_worker():
+    """Process pool initializer: enforce budgets with a CPU time timer where available."""
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGPROF, _on_budget_exceeded)
+    # Ctrl-C is handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _closes_matrix(name: str, shape: Tuple[int, int]) -> np.ndarray:
+    entry = _attached.get(name)
+    if entry is None:
+        # The runner replaced its block when it grew; drop stale attachments
+        for old_name, (old_block, _) in list(_attached.items()):
+            old_block.close()
+            del _attached[old_name]
+        block = shared_memory.SharedMemory(name=name)
+        entry = _attached[name] = (block, np.ndarray(shape, dtype=np.float64, buffer=block.buf))
+    return entry[1]
+
+
+def evaluate_shard(name: str, shape: Tuple[int, int], tasks: List[tuple], budget_seconds: float) -> dict:
+    """Evaluate (strategy_id, kind, row, params) tasks against the latest bar.
+
+    A strategy that uses more than budget_seconds of CPU is interrupted and
+    reported in "over_budget"; exceptions are reported in "errors". Neither
+    affects the other strategies of the shard.
+    """
+    closes_matrix = _closes_matrix(name, shape)
+    timer = hasattr(signal, "setitimer")
+    signals, over_budget, errors = [], [], []
+    started = time.process_time()
+
+    for strategy_id, kind, row, params in tasks:
+        closes = closes_matrix[row, -required_bars(kind, params):]
+        if np.isnan(closes).any():
+            # Not enough history for this symbol yet
+            continue
+        spent = time.process_time()
+        try:
+            if timer:
+                signal.setitimer(signal.ITIMER_PROF, budget_seconds)
+            try:
+                result = EVALUATORS[kind](closes, params)
+            finally:
+                if timer:
+                    signal.setitimer(signal.ITIMER_PROF, 0)
+        except BudgetExceeded:
+            over_budget.append(strategy_id)
+            continue
+        except Exception as e:
+            errors.append((strategy_id, str(e)))
+            continue
+        if not timer and time.process_time() - spent > budget_seconds:
+            over_budget.append(strategy_id)
+        if result is not None:
+            signals.append((strategy_id, result[0], float(closes[-1]), result[1]))
+
+    return {
+        "signals": signals,
+        "over_budget": over_budget,
+        "errors": errors,
+        "cpu_seconds": time.process_time() - started,
+    }
\ No newline at end of file
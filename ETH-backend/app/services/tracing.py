@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import event
+from app.services.metrics import route_template
+
+load_dotenv()
+
+# Fraction of requests whose full trace is written to the trace log
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_LOG_FILE = os.getenv("TRACE_LOG_FILE", "traces.log")
+TRACE_LOG_MAX_BYTES = int(os.getenv("TRACE_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_LOG_BACKUPS = int(os.getenv("TRACE_LOG_BACKUPS", "5"))
+
+
+class Trace:
+    """Named spans recorded while handling one request."""
+
+    __slots__ = ("start", "spans")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: List[Tuple[str, float, float]] = []
+
+    def add(self, name: str, started: float, duration: float):
+        self.spans.append((name, started - self.start, duration))
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value; repeated spans are summed per name."""
+        totals = {}
+        counts = {}
+        for name, _, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+            counts[name] = counts.get(name, 0) + 1
+        parts = []
+        for name, duration in totals.items():
+            part = f"{name};dur={duration * 1000:.2f}"
+            if counts[name] > 1:
+                part += f';desc="{counts[name]}x"'
+            parts.append(part)
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as a named span of the current request, if any.
+
+    The trace lives in a contextvar, so spans recorded in sync routes (run in
+    the threadpool with a copy of the context) and async routes both land on
+    the request's trace. Outside a request this is a no-op.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, started, time.perf_counter() - started)
+
+
+def install_sqlalchemy_hooks(engine):
+    """Record every SQL statement executed on engine as a "db" span."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("trace_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["trace_query_start"].pop()
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add("db", started, time.perf_counter() - started)
+
+
+_trace_logger = None
+
+
+def _get_trace_logger():
+    global _trace_logger
+    if _trace_logger is None:
+        logger = logging.getLogger("cryptobot.traces")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        handler = RotatingFileHandler(
+            TRACE_LOG_FILE, maxBytes=TRACE_LOG_MAX_BYTES, backupCount=TRACE_LOG_BACKUPS
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        _trace_logger = logger
+    return _trace_logger
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a trace per request, returns the span
+    breakdown in a Server-Timing header and logs a sample of full traces.
+    """
+
+    def __init__(self, app, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _current_trace.set(trace)
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+                total = time.perf_counter() - trace.start
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing(total).encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            if self.sample_rate and random.random() < self.sample_rate:
+                self._log(scope, trace, status_holder[0])
+
+    def _log(self, scope, trace: Trace, status: int):
+        try:
+            _get_trace_logger().info(json.dumps({
+                "ts": time.time(),
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "query": scope.get("query_string", b"").decode(errors="replace"),
+                "route": route_template(scope),
+                "status": status,
+                "duration_ms": round((time.perf_counter() - trace.start) * 1000, 3),
+                "spans": [
+                    {"name": name, "offset_ms": round(offset * 1000, 3),
+                     "duration_ms": round(duration * 1000, 3)}
+                    for name, offset, duration in trace.spans
+                ],
+            }))
+        except Exception as e:
+            print(f"Error writing trace log: {str(e)}")
@@ -0,0 +1,214 @@
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Refresh scheduling configuration
+BASE_REFRESH_SECONDS = float(os.getenv("WATCHLIST_BASE_REFRESH_SECONDS", "60"))
+MIN_REFRESH_SECONDS = float(os.getenv("WATCHLIST_MIN_REFRESH_SECONDS", "10"))
+MAX_REFRESH_SECONDS = float(os.getenv("WATCHLIST_MAX_REFRESH_SECONDS", "300"))
+IDLE_EVICT_SECONDS = float(os.getenv("WATCHLIST_IDLE_EVICT_SECONDS", "1800"))
+MAX_TRACKED_SYMBOLS = int(os.getenv("WATCHLIST_MAX_SYMBOLS", "500"))
+
+# Time constant for the request-rate moving average
+RATE_HALF_LIFE_SECONDS = 300.0
+# Per-update move (in percent) that counts as "normal" volatility
+REFERENCE_VOLATILITY_PCT = 0.5
+
+# Symbols that are always tracked, shared by the refresher and /stocks/popular
+DEFAULT_STOCKS = ["AAPL", "TSLA", "GOOGL", "MSFT", "AMZN", "META", "NVDA", "NFLX"]
+
+
+class TrackedSymbol:
+    """Demand and volatility state for one symbol."""
+
+    def __init__(self, symbol: str, kind: str, pinned: bool = False):
+        self.symbol = symbol
+        self.kind = kind
+        # Owners that need the symbol tracked regardless of demand
+        self.pins = {"default"} if pinned else set()
+        self.request_rate = 0.0  # requests per second, exponentially decayed
+        self.last_requested: Optional[float] = None
+        self.last_refreshed = 0.0
+        self.last_price: Optional[float] = None
+        self.volatility_pct = 0.0  # EWMA of absolute per-update moves in percent
+
+    @property
+    def pinned(self) -> bool:
+        return bool(self.pins)
+
+    def decayed_rate(self, now: float) -> float:
+        if self.last_requested is None:
+            return 0.0
+        elapsed = now - self.last_requested
+        return self.request_rate * math.exp(-elapsed * math.log(2) / RATE_HALF_LIFE_SECONDS)
+
+    def refresh_interval(self, now: float) -> float:
+        """Seconds between refreshes: shorter for hot or volatile symbols."""
+        requests_per_minute = self.decayed_rate(now) * 60
+        if requests_per_minute < 0.01:
+            return MAX_REFRESH_SECONDS
+        demand_factor = 1 + math.log1p(requests_per_minute)
+        volatility_factor = 1 + self.volatility_pct / REFERENCE_VOLATILITY_PCT
+        interval = BASE_REFRESH_SECONDS / (demand_factor * volatility_factor)
+        return max(MIN_REFRESH_SECONDS, min(MAX_REFRESH_SECONDS, interval))
+
+
+class SymbolRegistry:
+    """Tracked-symbol registry that learns which symbols clients watch.
+
+    Routes call record_request() for every symbol a client asks for; the
+    background refresher asks due_symbols() what to refresh next and reports
+    prices back through record_price().
+    """
+
+    def __init__(self, seeds: Dict[str, List[str]] = None):
+        self._symbols: Dict[tuple, TrackedSymbol] = {}
+        self._lock = threading.Lock()
+        for kind, symbols in (seeds or {}).items():
+            for symbol in symbols:
+                self._symbols[(kind, symbol)] = TrackedSymbol(symbol, kind, pinned=True)
+
+    def record_request(self, symbol: str, kind: str = "stock"):
+        """Register client demand for a symbol, adding it if it is new."""
+        symbol = symbol.upper()
+        now = time.monotonic()
+        rate_increment = math.log(2) / RATE_HALF_LIFE_SECONDS
+        with self._lock:
+            entry = self._symbols.get((kind, symbol))
+            if entry is None:
+                if len(self._symbols) >= MAX_TRACKED_SYMBOLS:
+                    self._evict_locked(now, force=True)
+                entry = self._symbols[(kind, symbol)] = TrackedSymbol(symbol, kind)
+            entry.request_rate = entry.decayed_rate(now) + rate_increment
+            entry.last_requested = now
+
+    def pin(self, symbol: str, kind: str = "stock", owner: str = "default"):
+        """Always track symbol regardless of demand, e.g. because portfolios hold it.
+
+        Pins are kept per owner; the symbol stays pinned until every owner unpins it.
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            entry = self._symbols.get((kind, symbol))
+            if entry is None:
+                entry = self._symbols[(kind, symbol)] = TrackedSymbol(symbol, kind)
+            entry.pins.add(owner)
+
+    def unpin(self, symbol: str, kind: str = "stock", owner: str = "default"):
+        """Drop owner's pin; an unpinned symbol is evicted once nobody requests it."""
+        with self._lock:
+            entry = self._symbols.get((kind, symbol.upper()))
+            if entry is not None:
+                entry.pins.discard(owner)
+
+    def record_price(self, symbol: str, price: float, kind: str = "stock"):
+        """Record a refreshed price and update the symbol's volatility estimate."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._symbols.get((kind, symbol.upper()))
+            if entry is None:
+                return
+            if entry.last_price and price:
+                move_pct = abs(price - entry.last_price) / entry.last_price * 100
+                entry.volatility_pct = 0.8 * entry.volatility_pct + 0.2 * move_pct
+            entry.last_price = price
+            entry.last_refreshed = now
+
+    def due_symbols(self, kind: str = "stock", budget: int = 50) -> List[str]:
+        """Symbols whose refresh interval has elapsed, most overdue first."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for entry in self._symbols.values():
+                if entry.kind != kind:
+                    continue
+                overdue = (now - entry.last_refreshed) / entry.refresh_interval(now)
+                if overdue >= 1:
+                    due.append((overdue, entry.symbol))
+        due.sort(reverse=True)
+        return [symbol for _, symbol in due[:budget]]
+
+    def popular(self, kind: str = "stock", limit: int = 8) -> List[str]:
+        """Most requested symbols, topped up with the pinned defaults."""
+        now = time.monotonic()
+        with self._lock:
+            entries = [entry for entry in self._symbols.values() if entry.kind == kind]
+        entries.sort(key=lambda entry: (entry.decayed_rate(now), entry.pinned), reverse=True)
+        return [entry.symbol for entry in entries[:limit]]
+
+    def tracked(self, kind: str = "stock") -> List[str]:
+        with self._lock:
+            return [entry.symbol for entry in self._symbols.values() if entry.kind == kind]
+
+    def export_state(self) -> List[dict]:
+        """Demand and volatility per symbol, with times relative to now, for a cache snapshot."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "kind": entry.kind,
+                    "symbol": entry.symbol,
+                    "pinned": entry.pinned,
+                    "request_rate": entry.decayed_rate(now),
+                    "idle_seconds": None if entry.last_requested is None else now - entry.last_requested,
+                    "last_price": entry.last_price,
+                    "volatility_pct": entry.volatility_pct,
+                }
+                for entry in self._symbols.values()
+            ]
+
+    def restore_state(self, entries: List[dict], offline_seconds: float = 0.0):
+        """Re-track symbols from export_state(); all of them are due for a refresh right away."""
+        now = time.monotonic()
+        with self._lock:
+            for state in entries:
+                key = (state["kind"], state["symbol"])
+                entry = self._symbols.get(key)
+                if entry is None:
+                    if len(self._symbols) >= MAX_TRACKED_SYMBOLS:
+                        continue
+                    entry = self._symbols[key] = TrackedSymbol(state["symbol"], state["kind"])
+                if state["idle_seconds"] is not None and entry.last_requested is None:
+                    # Time spent offline counts as idle, so demand decays across the restart
+                    entry.last_requested = now - state["idle_seconds"] - offline_seconds
+                    entry.request_rate = state["request_rate"]
+                if state["pinned"] and not entry.pinned:
+                    # Owners pin their symbols again when they start; until then
+                    # the symbol counts as just requested so it is not evicted
+                    entry.last_requested = now
+                entry.last_price = entry.last_price or state["last_price"]
+                entry.volatility_pct = entry.volatility_pct or state["volatility_pct"]
+
+    def evict_idle(self) -> List[Tuple[str, str]]:
+        """Drop symbols nobody has requested for IDLE_EVICT_SECONDS.
+
+        Returns the evicted (kind, symbol) pairs.
+        """
+        with self._lock:
+            return self._evict_locked(time.monotonic())
+
+    def _evict_locked(self, now: float, force: bool = False) -> List[Tuple[str, str]]:
+        evicted = [
+            key for key, entry in self._symbols.items()
+            if not entry.pinned and (
+                entry.last_requested is None or now - entry.last_requested > IDLE_EVICT_SECONDS
+            )
+        ]
+        if force and not evicted:
+            # Registry is full: make room by dropping the least requested symbol
+            candidates = [(entry.decayed_rate(now), key) for key, entry in self._symbols.items()
+                          if not entry.pinned]
+            if candidates:
+                evicted = [min(candidates)[1]]
+        for key in evicted:
+            del self._symbols[key]
+        return evicted
+
+
+# Global instance
+watchlist = SymbolRegistry(seeds={"stock": DEFAULT_STOCKS})
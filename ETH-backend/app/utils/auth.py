@@ -7,6 +7,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
+from app.services.tracing import span
 import os
 from dotenv import load_dotenv
 
@@ -64,14 +65,15 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token = credentials.credentials
-    username = verify_token(token)
-    if username is None:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
+    with span("auth"):
+        token = credentials.credentials
+        username = verify_token(token)
+        if username is None:
+            raise credentials_exception
+        
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            raise credentials_exception
     
     return user
 
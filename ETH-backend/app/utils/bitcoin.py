@@ -5,6 +5,7 @@ from bitcoinlib.keys import HDKey
 import os
 from cryptography.fernet import Fernet
 from base64 import b64encode, b64decode
+from app.services.address_index import address_index
 
 class BitcoinWalletManager:
     def __init__(self):
@@ -40,6 +41,7 @@ class BitcoinWalletManager:
                 "balance_btc": 0.0,
                 "balance_usd": 0.0
             }
+            address_index.watch(wallet_info["wallet_address"])
             
             return wallet_info
             
@@ -48,6 +50,10 @@ class BitcoinWalletManager:
     
     def get_wallet_balance(self, wallet_address: str) -> float:
         """Get the balance of a Bitcoin wallet address."""
+        # Platform addresses are answered from the local UTXO index once it has caught up
+        balance = address_index.balance(wallet_address)
+        if balance is not None:
+            return balance
         try:
             # Use bitcoinlib to get balance
             wallet = Wallet(wallet_address)
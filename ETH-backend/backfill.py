@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Historical Backfill Script for CryptoBot Pro Backend
+Downloads OHLCV history for many symbols into the local history store.
+Progress is checkpointed, so re-running the same command after an
+interruption resumes where it stopped.
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+# Load environment variables
+load_dotenv()
+
+def load_symbols(args):
+    symbols = []
+    if args.symbols:
+        symbols.extend(args.symbols.split(","))
+    if args.symbols_file:
+        with open(args.symbols_file) as f:
+            symbols.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    return symbols
+
+def main():
+    from app.services.backfill import (
+        BackfillJob,
+        BACKFILL_WORKERS,
+        BACKFILL_BATCH_SIZE,
+        BACKFILL_CHECKPOINT_FILE
+    )
+
+    parser = argparse.ArgumentParser(description="Backfill historical OHLCV data")
+    parser.add_argument("--symbols", help="Comma-separated symbols, e.g. AAPL,MSFT,TSLA")
+    parser.add_argument("--symbols-file", help="File with one symbol per line")
+    parser.add_argument("--years", type=float, default=10, help="History length when --start is not given")
+    parser.add_argument("--start", help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="End date (YYYY-MM-DD), defaults to today")
+    parser.add_argument("--interval", default="1d", help="Bar interval (1d, 1h, 1m, ...)")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS, help="Parallel downloads")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="Symbols per download")
+    parser.add_argument("--checkpoint", default=BACKFILL_CHECKPOINT_FILE, help="Checkpoint file")
+    args = parser.parse_args()
+
+    symbols = load_symbols(args)
+    if not symbols:
+        print("❌ No symbols given (use --symbols or --symbols-file)")
+        sys.exit(1)
+
+    end = datetime.strptime(args.end, "%Y-%m-%d") if args.end else datetime.utcnow()
+    start = datetime.strptime(args.start, "%Y-%m-%d") if args.start else end - timedelta(days=365 * args.years)
+
+    job = BackfillJob(symbols, start, end, interval=args.interval, workers=args.workers,
+                      batch_size=args.batch_size, checkpoint_path=args.checkpoint)
+
+    print(f"🚀 Backfilling {len(job.symbols)} symbols ({args.interval}) "
+          f"from {start.date()} to {end.date()}...")
+
+    def progress(job):
+        status = job.status()
+        print(f"📊 {status['done_chunks']}/{status['total_chunks']} chunks, "
+              f"{status['bars_written']} bars written, {status['failed']} failed", end="\r")
+
+    try:
+        status = job.run(progress=progress)
+    except KeyboardInterrupt:
+        job.stop()
+        print("\n⚠️  Interrupted, progress saved to checkpoint. Re-run to resume.")
+        sys.exit(130)
+
+    print()
+    if status["failed"]:
+        print(f"⚠️  {status['failed']} symbol chunks failed, re-run to retry them")
+    else:
+        print(f"✅ Backfill complete: {status['bars_written']} bars written")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the platform address UTXO index.
+
+Mines a fake chain paying and spending platform addresses, lets the index
+catch up from scratch as after downtime, then checks every balance against
+the chain and times balance lookups. A short reorganisation at the end
+exercises the undo path.
+
+Usage:
+    python -m benchmarks.bench_address_index --addresses 10000 --blocks 2000 --txs-per-block 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeBlockFeed  # noqa: E402
+from app.services.address_index import AddressIndex  # noqa: E402
+
+
+def check(index: AddressIndex, feed: FakeBlockFeed, addresses: list) -> int:
+    truth = feed.truth()
+    return sum(1 for address in addresses if round(index.balance(address) * 1e8) != truth.get(address, 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark address index catch-up and balance lookups")
+    parser.add_argument("--addresses", type=int, default=10000, help="Platform addresses watched")
+    parser.add_argument("--blocks", type=int, default=2000, help="Blocks missed while down")
+    parser.add_argument("--txs-per-block", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=100, help="Blocks fetched per round trip")
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--reorg-depth", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    addresses = [f"bcrt1qplatform{i:08d}" for i in range(args.addresses)]
+    feed = FakeBlockFeed(addresses, args.txs_per_block, seed=args.seed)
+    feed.mine(args.blocks)
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = AddressIndex(feed, checkpoint_path=os.path.join(directory, "index.json.gz"),
+                             batch_size=args.batch_size)
+        for address in addresses:
+            index.watch(address)
+
+        start = time.perf_counter()
+        applied = index.sync()
+        catch_up = time.perf_counter() - start
+        mismatches = check(index, feed, addresses)
+
+        latencies = []
+        for i in range(args.lookups):
+            address = addresses[i % len(addresses)]
+            start = time.perf_counter()
+            index.balance(address)
+            latencies.append(time.perf_counter() - start)
+
+        feed.reorg(args.reorg_depth)
+        feed.mine(2)
+        index.sync()
+        reorg_mismatches = check(index, feed, addresses)
+        checkpoint_kb = os.path.getsize(index.checkpoint_path) / 1024
+
+    transactions = applied * (args.txs_per_block + 1)
+    print(f"caught up {applied} blocks ({transactions} transactions) in {catch_up:.2f} s: "
+          f"{applied / catch_up:.0f} blocks/s, {transactions / catch_up:.0f} tx/s")
+    print(f"tracked UTXOs: {len(index._utxos)}, checkpoint: {checkpoint_kb:.0f} KiB")
+    print(f"balances differing from the chain: {mismatches}, after a {args.reorg_depth}-block reorg: {reorg_mismatches}")
+    print(f"balance lookup: p50 {np.percentile(latencies, 50) * 1e6:.2f} us, "
+          f"p99 {np.percentile(latencies, 99) * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the price alert index.
+
+Loads N active alerts spread over S symbols, replays random-walk price
+ticks and reports the per-tick evaluation latency of the threshold index
+next to a naive scan over every alert of the symbol.
+
+Usage:
+    python -m benchmarks.bench_alerts --alerts 1000000 --symbols 100 --ticks 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.alerts import AlertIndex, ABOVE, BELOW  # noqa: E402
+
+
+def percentile_ms(samples: list, pct: float) -> float:
+    return round(float(np.percentile(samples, pct)) * 1000, 4)
+
+
+def build_alerts(count: int, symbols: list, base_prices: dict, rng: random.Random) -> list:
+    alerts = []
+    for alert_id in range(1, count + 1):
+        symbol = symbols[alert_id % len(symbols)]
+        base = base_prices[symbol]
+        # Thresholds within +/-20% of the starting price
+        alerts.append((symbol, ABOVE if alert_id % 2 else BELOW,
+                       base * rng.uniform(0.8, 1.2), alert_id))
+    return alerts
+
+
+def naive_scan(arrays: dict, symbol: str, old: float, new: float) -> int:
+    """Vectorised full scan of one symbol's alerts, the approach the index replaces."""
+    direction, thresholds, active = arrays[symbol]
+    if new > old:
+        hit = active & (direction == 1) & (thresholds > old) & (thresholds <= new)
+    else:
+        hit = active & (direction == 0) & (thresholds >= new) & (thresholds < old)
+    active &= ~hit
+    return int(hit.sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark price alert evaluation")
+    parser.add_argument("--alerts", type=int, default=1_000_000, help="Active alerts")
+    parser.add_argument("--symbols", type=int, default=100, help="Distinct symbols")
+    parser.add_argument("--ticks", type=int, default=20_000, help="Price updates to evaluate")
+    parser.add_argument("--volatility", type=float, default=0.001, help="Per-tick relative price move")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    symbols = [f"SYM{i:04d}" for i in range(args.symbols)]
+    base_prices = {symbol: rng.uniform(10, 1000) for symbol in symbols}
+    alerts = build_alerts(args.alerts, symbols, base_prices, rng)
+
+    index = AlertIndex()
+    start = time.perf_counter()
+    index.bulk_load(alerts)
+    load_seconds = time.perf_counter() - start
+
+    arrays = {}
+    for symbol in symbols:
+        rows = [alert for alert in alerts if alert[0] == symbol]
+        arrays[symbol] = (np.array([1 if row[1] == ABOVE else 0 for row in rows], dtype=np.int8),
+                          np.array([row[2] for row in rows]), np.ones(len(rows), dtype=bool))
+
+    prices = dict(base_prices)
+    ticks = []
+    for _ in range(args.ticks):
+        symbol = rng.choice(symbols)
+        old = prices[symbol]
+        prices[symbol] = old * (1 + rng.gauss(0, args.volatility))
+        ticks.append((symbol, old, prices[symbol]))
+
+    # Seed the reference prices so the first tick per symbol is evaluated too
+    for symbol in symbols:
+        index.evaluate(symbol, base_prices[symbol])
+
+    index_latencies, triggered = [], 0
+    for symbol, _, price in ticks:
+        start = time.perf_counter()
+        triggered += len(index.evaluate(symbol, price))
+        index_latencies.append(time.perf_counter() - start)
+
+    scan_latencies, scan_triggered = [], 0
+    for symbol, old, price in ticks:
+        start = time.perf_counter()
+        scan_triggered += naive_scan(arrays, symbol, old, price)
+        scan_latencies.append(time.perf_counter() - start)
+
+    print(f"alerts: {args.alerts}, symbols: {args.symbols}, ticks: {args.ticks}")
+    print(f"index bulk load: {load_seconds:.2f}s")
+    print(f"triggered: index {triggered}, naive scan {scan_triggered}")
+    print(f"{'method':<14}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'ticks/s':>12}")
+    for name, samples in (("sorted index", index_latencies), ("naive scan", scan_latencies)):
+        print(f"{name:<14}{percentile_ms(samples, 50):>10}{percentile_ms(samples, 99):>10}"
+              f"{round(max(samples) * 1000, 4):>10}{round(len(samples) / sum(samples)):>12}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
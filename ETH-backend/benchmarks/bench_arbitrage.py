@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the incremental arbitrage scanner.
+
+Builds a cross-rate graph of synthetic assets quoted against USDT, BTC and
+ETH on several venues, then feeds per-venue ticker updates with small noise.
+Every --inject-every updates one cross rate is pushed far enough off to
+open a triangle; the report shows how many of those were detected and the
+scan time per update against the exchange refresh interval.
+
+Usage:
+    python -m benchmarks.bench_arbitrage --assets 500 --venues 3 --updates 300 --inject-every 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.arbitrage import ArbitrageScanner  # noqa: E402
+from app.services.exchanges import EXCHANGE_REFRESH_SECONDS  # noqa: E402
+
+CROSS_QUOTES = ("BTC", "ETH")
+
+
+def make_tickers(prices: dict, rng: random.Random, noise: float, spread: float) -> dict:
+    """Tickers keyed by pair around consistent prices, with independent noise per pair."""
+    tickers = {}
+    for asset, price in prices.items():
+        quotes = [("USDT", price)] + [(q, price / prices[q]) for q in CROSS_QUOTES if q != asset]
+        for quote, rate in quotes:
+            rate *= 1 + rng.uniform(-noise, noise)
+            tickers[f"{asset}/{quote}"] = {"bid": rate * (1 - spread), "ask": rate * (1 + spread)}
+    return tickers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental negative-cycle detection on cross rates")
+    parser.add_argument("--assets", type=int, default=500, help="Assets quoted on every venue")
+    parser.add_argument("--venues", type=int, default=3)
+    parser.add_argument("--updates", type=int, default=300, help="Venue ticker updates applied")
+    parser.add_argument("--inject-every", type=int, default=10, help="Open a triangle every N updates")
+    parser.add_argument("--noise", type=float, default=0.0002, help="Relative noise per pair and update")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    prices = {f"A{i:04d}": 10 ** rng.uniform(-3, 4) for i in range(args.assets)}
+    prices.update({"BTC": 45000.0, "ETH": 2500.0})
+    venues = [f"venue{i}" for i in range(args.venues)]
+    scanner = ArbitrageScanner(fee_rate=0.001)
+
+    start = time.perf_counter()
+    for venue in venues:
+        scanner.update(venue, make_tickers(prices, rng, args.noise, 0.0001))
+    build_seconds = time.perf_counter() - start
+
+    latencies, injected, detected = [], 0, 0
+    for i in range(args.updates):
+        venue = venues[i % len(venues)]
+        tickers = make_tickers(prices, rng, args.noise, 0.0001)
+        inject = args.inject_every and i % args.inject_every == 0
+        if inject:
+            asset = rng.choice([a for a in prices if a not in CROSS_QUOTES])
+            rate = prices[asset] / prices["BTC"] * 1.01
+            tickers[f"{asset}/BTC"] = {"bid": rate, "ask": rate * 1.0001}
+            injected += 1
+        start = time.perf_counter()
+        appeared = scanner.update(venue, tickers)
+        latencies.append(time.perf_counter() - start)
+        if inject and any(f"{venue}:{asset}" in cycle["id"] for cycle in appeared):
+            detected += 1
+
+    status = scanner.status()
+    print(f"graph: {status['nodes']} nodes, {status['edges']} edges over {args.venues} venues")
+    print(f"initial build and scan: {build_seconds * 1000:.1f} ms")
+    print(f"injected triangles: {injected}, detected on the update that opened them: {detected}")
+    print(f"cycles currently open: {len(scanner.cycles())}")
+    p50, p99 = (float(np.percentile(latencies, pct)) * 1000 for pct in (50, 99))
+    print(f"scan per venue update: p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {max(latencies) * 1000:.2f} ms")
+    print(f"refresh interval: {EXCHANGE_REFRESH_SECONDS * 1000:.0f} ms "
+          f"({max(latencies) / EXCHANGE_REFRESH_SECONDS * 100:.2f}% used by the slowest scan)")
+
+
+if __name__ == "__main__":
+    main()
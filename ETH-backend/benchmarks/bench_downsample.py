@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark for server-side chart downsampling.
+
+Writes a long range of synthetic one-minute bars into a temporary history
+store, then requests it through the chart cache at a fixed point budget.
+Reports the downsampling time for a cold and a cached request, the JSON
+payload size against the raw range, and checks that every candle keeps
+its bucket's extremes. LTTB is timed on the close series for comparison.
+
+Usage:
+    python -m benchmarks.bench_downsample --days 365 --max-points 300
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.bars import BarAggregator  # noqa: E402
+from app.services.charts import ChartCache  # noqa: E402
+from app.services.downsample import lttb  # noqa: E402
+from app.services.history import HistoryStore, BAR_DTYPE  # noqa: E402
+from app.services.serialization import dumps  # noqa: E402
+
+
+def synthetic_bars(days: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n = days * 1440
+    close = 40000 * np.exp(np.cumsum(rng.normal(0, 0.0008, n)))
+    bars = np.empty(n, dtype=BAR_DTYPE)
+    bars["ts"] = 1_672_531_200 + 60 * np.arange(n)
+    bars["open"] = np.append(close[0], close[:-1])
+    bars["close"] = close
+    wiggle = np.abs(rng.normal(0, 0.0005, n)) * close
+    bars["high"] = np.maximum(bars["open"], close) + wiggle
+    bars["low"] = np.minimum(bars["open"], close) - wiggle
+    bars["volume"] = rng.uniform(1, 10, n)
+    return bars
+
+
+def payload(candles: np.ndarray) -> bytes:
+    return dumps({field: candles[field].tolist() for field in BAR_DTYPE.names})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chart downsampling of long bar ranges")
+    parser.add_argument("--days", type=int, default=365, help="Days of one-minute bars")
+    parser.add_argument("--max-points", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    bars = synthetic_bars(args.days, args.seed)
+    with tempfile.TemporaryDirectory() as root:
+        store = HistoryStore(root)
+        store.write("BTC", "1m", bars)
+        cache = ChartCache(store=store, aggregator=BarAggregator(store=store, store_timeframes=[]))
+        start, end = datetime.utcfromtimestamp(int(bars["ts"][0])), datetime.utcfromtimestamp(int(bars["ts"][-1]) + 60)
+
+        began = time.perf_counter()
+        candles, downsampled = cache.candles("BTC", "1m", start=start, end=end, max_points=args.max_points)
+        cold = time.perf_counter() - began
+        began = time.perf_counter()
+        cache.candles("BTC", "1m", start=start, end=end, max_points=args.max_points)
+        warm = time.perf_counter() - began
+
+    # Every candle must span its bucket's extremes
+    bounds = np.searchsorted(bars["ts"], candles["ts"])
+    bounds = np.append(bounds, len(bars))
+    wrong = sum(
+        1 for i in range(len(candles))
+        if candles["high"][i] != bars["high"][bounds[i]:bounds[i + 1]].max()
+        or candles["low"][i] != bars["low"][bounds[i]:bounds[i + 1]].min()
+    )
+
+    began = time.perf_counter()
+    kept = lttb(bars["ts"].astype(np.float64), bars["close"], args.max_points)
+    lttb_seconds = time.perf_counter() - began
+
+    print(f"range: {len(bars):,} one-minute bars ({args.days} days), raw JSON {len(payload(bars)) / 1e6:.1f} MB")
+    print(f"chart: {len(candles)} candles (downsampled: {downsampled}), JSON {len(payload(candles)) / 1e3:.1f} kB")
+    print(f"cold request (read + bucket): {cold * 1000:.1f} ms, cached: {warm * 1000:.2f} ms")
+    print(f"candles missing their bucket's high or low: {wrong}")
+    print(f"LTTB on closes: {len(kept)} points in {lttb_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
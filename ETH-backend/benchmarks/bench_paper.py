@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark for paper-trading fills.
+
+Fills a burst of simulated market and limit orders from several threads
+against depth cached from the fake exchange and reports fill latency,
+throughput and how many upstream order book calls the burst caused.
+
+Usage:
+    python -m benchmarks.bench_paper --orders 100000 --threads 8 --coins 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeExchange, LatencyProfile, CRYPTO_BASE_PRICES  # noqa: E402
+from app.services.crypto_service import CryptoService  # noqa: E402
+from app.services.depth import DepthCache  # noqa: E402
+from app.services.paper_trading import PaperExchange  # noqa: E402
+
+
+def percentile_us(samples: list, pct: float) -> float:
+    return round(float(np.percentile(samples, pct)) * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulated order fills")
+    parser.add_argument("--orders", type=int, default=100_000, help="Simulated orders in the burst")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent order threads")
+    parser.add_argument("--coins", type=int, default=5, help="Distinct coins traded")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    profile = LatencyProfile(latency_ms=20, jitter_ms=5, seed=args.seed)
+    exchange = FakeExchange(profile, args.seed)
+    depth = DepthCache(service=CryptoService(exchange=exchange))
+    paper = PaperExchange(depth=depth)
+    coins = list(CRYPTO_BASE_PRICES)[:args.coins]
+
+    # Warm the cache: one fetch per coin, as the first order per symbol would do
+    for coin in coins:
+        depth.get(coin)
+    calls_before = profile.calls
+
+    per_thread = args.orders // args.threads
+    latencies = [[] for _ in range(args.threads)]
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker(index: int):
+        rng = random.Random(args.seed + index)
+        local = {}
+        for _ in range(per_thread):
+            coin = rng.choice(coins)
+            side = rng.choice(("buy", "sell"))
+            quantity = rng.uniform(0.1, 50)
+            start = time.perf_counter()
+            if rng.random() < 0.3:
+                mid = depth.get(coin).mid()
+                limit = mid * (1.0003 if side == "buy" else 0.9997)
+                result = paper.simulate(coin, side, quantity, "limit", limit)
+            else:
+                result = paper.simulate(coin, side, quantity)
+            latencies[index].append(time.perf_counter() - start)
+            local[result["status"]] = local.get(result["status"], 0) + 1
+        with lock:
+            for status, count in local.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    samples = [sample for thread_samples in latencies for sample in thread_samples]
+    print(f"orders: {len(samples)}, threads: {args.threads}, coins: {len(coins)}")
+    print(f"statuses: {statuses}")
+    print(f"upstream calls during burst: {profile.calls - calls_before}")
+    print(f"throughput: {round(len(samples) / elapsed)} orders/s")
+    print(f"{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+    print(f"{percentile_us(samples, 50):>10}{percentile_us(samples, 99):>10}"
+          f"{round(max(samples) * 1e6, 2):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the strategy runner.
+
+Registers N strategies of every kind spread over S symbols, warms the
+closes window with random-walk bars and then reports the latency from bar
+close until every strategy has been evaluated by the process pool, under
+the production shard deadline unless --deadline-ms says otherwise. Shards
+that miss it are reported as late; their strategies get no strike.
+
+Usage:
+    python -m benchmarks.bench_strategies --strategies 10000 --symbols 200 --bars 50 --workers 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.strategies import StrategyRunner, STRATEGY_DEADLINE_MS  # noqa: E402
+from app.services.strategy_worker import STRATEGY_KINDS  # noqa: E402
+
+
+def percentile_ms(samples: list, pct: float) -> float:
+    return round(float(np.percentile(samples, pct)) * 1000, 3)
+
+
+def random_params(kind: str, rng: random.Random) -> dict:
+    if kind == "sma_cross":
+        fast = rng.randint(3, 20)
+        return {"fast": fast, "slow": rng.randint(fast + 5, 100)}
+    if kind == "rsi":
+        return {"period": rng.randint(7, 30), "lower": rng.uniform(20, 35), "upper": rng.uniform(65, 80)}
+    return {"lookback": rng.randint(10, 100)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark strategy evaluation per bar")
+    parser.add_argument("--strategies", type=int, default=10_000, help="Active strategies")
+    parser.add_argument("--symbols", type=int, default=200, help="Distinct symbols")
+    parser.add_argument("--bars", type=int, default=50, help="Timed bars after warm-up")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes")
+    parser.add_argument("--deadline-ms", type=float, default=STRATEGY_DEADLINE_MS, help="Shard deadline per bar")
+    parser.add_argument("--volatility", type=float, default=0.005, help="Per-bar relative price move")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    symbols = [f"SYM{i:04d}" for i in range(args.symbols)]
+    prices = {symbol: rng.uniform(10, 1000) for symbol in symbols}
+    kinds = list(STRATEGY_KINDS)
+
+    runner = StrategyRunner(workers=args.workers, deadline_ms=args.deadline_ms)
+    for strategy_id in range(1, args.strategies + 1):
+        kind = kinds[strategy_id % len(kinds)]
+        runner.add(SimpleNamespace(
+            id=strategy_id, user_id=strategy_id % 1000, kind=kind, symbol=symbols[strategy_id % len(symbols)],
+            asset_type="stock", params=random_params(kind, rng)
+        ))
+
+    def next_bar():
+        for symbol in symbols:
+            prices[symbol] *= 1 + rng.gauss(0, args.volatility)
+        return dict(prices)
+
+    try:
+        start = time.perf_counter()
+        runner._ensure_pool()
+        pool_seconds = time.perf_counter() - start
+        for _ in range(runner.window):
+            runner.matrix.append(next_bar())
+
+        latencies, signals, failed, late, late_bars = [], 0, 0, 0, 0
+        for _ in range(args.bars):
+            result = runner.close_bar(next_bar())
+            latencies.append(result["duration_ms"] / 1000)
+            signals += result["signals"]
+            failed += result["failed"]
+            late += result["late"] + result["crashed"]
+            late_bars += 1 if result["late"] or result["crashed"] else 0
+    finally:
+        runner.stop()
+
+    print(f"strategies: {args.strategies}, symbols: {args.symbols}, bars: {args.bars}, workers: {args.workers}")
+    print(f"pool start: {pool_seconds:.2f}s")
+    print(f"deadline: {args.deadline_ms:g} ms, bars with skipped shards: {late_bars}, strategies skipped: {late}")
+    print(f"signals: {signals}, failed (budget or error): {failed}, disabled: {args.strategies - runner.count()}")
+    print(f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    print(f"{percentile_ms(latencies, 50):>10}{percentile_ms(latencies, 95):>10}"
+          f"{percentile_ms(latencies, 99):>10}{round(max(latencies) * 1000, 3):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,489 @@
+"""
+Deterministic local stand-ins for Binance (ccxt), CoinGecko, Yahoo Finance
+(yfinance), bitcoinlib and a bitcoind block feed, with configurable latency
+and error injection.
+"""
+
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+CRYPTO_BASE_PRICES = {
+    "BTC": 45000.0, "ETH": 2500.0, "ADA": 0.45, "DOT": 6.5, "LINK": 14.0,
+    "SOL": 95.0, "XRP": 0.55, "DOGE": 0.08, "LTC": 70.0, "BNB": 310.0,
+}
+
+STOCK_BASE_PRICES = {
+    "AAPL": 190.0, "TSLA": 240.0, "GOOGL": 140.0, "MSFT": 370.0, "AMZN": 150.0,
+    "META": 350.0, "NVDA": 480.0, "NFLX": 490.0, "AMD": 120.0, "INTC": 45.0,
+    "ORCL": 105.0, "IBM": 160.0, "UBER": 60.0, "SHOP": 75.0, "PLTR": 17.0,
+}
+
+
+class FakeProviderError(Exception):
+    """Injected upstream failure."""
+
+
+class LatencyProfile:
+    """Simulated network behaviour shared by the fakes of one provider."""
+
+    def __init__(self, latency_ms: float = 20.0, jitter_ms: float = 5.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def wait(self, name: str):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms))
+            fail = self._rng.random() < self.error_rate
+        time.sleep(delay / 1000.0)
+        if fail:
+            raise FakeProviderError(f"injected failure in {name}")
+
+
+class PriceWalk:
+    """Deterministic price path per symbol driven by a call counter."""
+
+    def __init__(self, base_prices: Dict[str, float], seed: int = 0):
+        self.base_prices = base_prices
+        self.seed = seed
+        self._steps: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def base(self, symbol: str) -> float:
+        if symbol in self.base_prices:
+            return self.base_prices[symbol]
+        # Unknown symbols still get a stable price
+        return 10.0 + (sum(ord(c) for c in symbol) * 7919 + self.seed) % 500
+
+    def next(self, symbol: str) -> float:
+        with self._lock:
+            step = self._steps.get(symbol, 0) + 1
+            self._steps[symbol] = step
+        phase = (sum(ord(c) for c in symbol) + self.seed) % 97
+        return self.base(symbol) * (1 + 0.01 * math.sin((step + phase) / 7.0))
+
+
+class FakeExchange:
+    """Subset of the ccxt exchange API used by the services."""
+
+    def __init__(self, profile: LatencyProfile, seed: int = 0, quote: str = "USDT"):
+        self.profile = profile
+        self.quote = quote
+        self.walk = PriceWalk(CRYPTO_BASE_PRICES, seed)
+        self.markets = {f"{coin}/{quote}": {"symbol": f"{coin}/{quote}", "base": coin, "quote": quote}
+                        for coin in CRYPTO_BASE_PRICES}
+        # Cross pairs against BTC and ETH
+        for cross in ("BTC", "ETH"):
+            self.markets.update({
+                f"{coin}/{cross}": {"symbol": f"{coin}/{cross}", "base": coin, "quote": cross}
+                for coin in CRYPTO_BASE_PRICES if coin != cross
+            })
+
+    def load_markets(self, reload: bool = False) -> dict:
+        return self.markets
+
+    def _ticker(self, symbol: str) -> dict:
+        if symbol not in self.markets:
+            raise FakeProviderError(f"unknown market {symbol}")
+        coin, quote = symbol.split("/")
+        last = self.walk.next(coin)
+        open_price = self.walk.base(coin)
+        if quote != self.quote:
+            last /= self.walk.base(quote)
+            open_price /= self.walk.base(quote)
+        return {
+            "symbol": symbol,
+            "timestamp": int(time.time() * 1000),
+            "last": last,
+            "bid": last * 0.9999,
+            "ask": last * 1.0001,
+            "open": open_price,
+            "change": last - open_price,
+            "percentage": (last - open_price) / open_price * 100,
+            "quoteVolume": open_price * 1000,
+        }
+
+    def fetch_ticker(self, symbol: str) -> dict:
+        self.profile.wait("fetch_ticker")
+        return self._ticker(symbol)
+
+    def fetch_tickers(self, symbols: Optional[List[str]] = None) -> dict:
+        self.profile.wait("fetch_tickers")
+        return {symbol: self._ticker(symbol) for symbol in (symbols or list(self.markets))}
+
+    def fetch_order_book(self, symbol: str, limit: Optional[int] = None) -> dict:
+        self.profile.wait("fetch_order_book")
+        if symbol not in self.markets:
+            raise FakeProviderError(f"unknown market {symbol}")
+        last = self.walk.next(symbol.split("/")[0])
+        levels = limit or 100
+        # 1 bp apart, sizes growing away from the touch
+        return {
+            "symbol": symbol,
+            "timestamp": int(time.time() * 1000),
+            "bids": [[last * (1 - 0.0001 * (i + 1)), 1.0 + 0.5 * i] for i in range(levels)],
+            "asks": [[last * (1 + 0.0001 * (i + 1)), 1.0 + 0.5 * i] for i in range(levels)],
+            "nonce": None,
+        }
+
+
+
+class FakeDepthFeed:
+    """Binance-style diff depth feed over a simulated book per coin.
+
+    The feed keeps the true book, so snapshots (with the last update id as
+    ccxt's nonce) and diffs are consistent. drop_rate silently drops diffs
+    to exercise gap detection and resync.
+    """
+
+    def __init__(self, levels: int = 200, tick: float = 0.0001, drop_rate: float = 0.0, seed: int = 0):
+        self.levels = levels
+        self.tick = tick
+        self.drop_rate = drop_rate
+        self.walk = PriceWalk(CRYPTO_BASE_PRICES, seed)
+        self._rng = random.Random(seed)
+        # coin -> (bids {price: size}, asks {price: size}, price grid per offset)
+        self._books: Dict[str, tuple] = {}
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.emitted = 0
+        self.dropped = 0
+
+    def _book(self, coin: str) -> tuple:
+        book = self._books.get(coin)
+        if book is None:
+            mid = self.walk.base(coin)
+            bid_prices = [mid * (1 - self.tick * i) for i in range(1, self.levels + 1)]
+            ask_prices = [mid * (1 + self.tick * i) for i in range(1, self.levels + 1)]
+            book = self._books[coin] = (
+                {price: 1.0 + 0.5 * i for i, price in enumerate(bid_prices)},
+                {price: 1.0 + 0.5 * i for i, price in enumerate(ask_prices)},
+                bid_prices, ask_prices,
+            )
+            self._ids[coin] = self._rng.randint(1_000_000, 9_000_000)
+        return book
+
+    def step(self, coin: str, changes: int = 4) -> Optional[dict]:
+        """Change a few levels near the touch; returns the diff or None if dropped."""
+        with self._lock:
+            bids, asks, bid_prices, ask_prices = self._book(coin)
+            diff_bids, diff_asks = [], []
+            for _ in range(changes):
+                is_bid = self._rng.random() < 0.5
+                # Mostly near the touch
+                offset = min(int(self._rng.expovariate(0.2)), self.levels - 1)
+                price = (bid_prices if is_bid else ask_prices)[offset]
+                size = 0.0 if self._rng.random() < 0.2 else round(self._rng.uniform(0.1, 20.0), 4)
+                side = bids if is_bid else asks
+                if size > 0:
+                    side[price] = size
+                else:
+                    side.pop(price, None)
+                (diff_bids if is_bid else diff_asks).append([price, size])
+            first = self._ids[coin] + 1
+            self._ids[coin] += changes
+            if self._rng.random() < self.drop_rate:
+                self.dropped += 1
+                return None
+            self.emitted += 1
+            return {"e": "depthUpdate", "s": f"{coin}USDT", "U": first, "u": self._ids[coin],
+                    "b": diff_bids, "a": diff_asks}
+
+    def fetch_snapshot(self, coin: str, limit: int = 1000) -> dict:
+        """REST snapshot in ccxt fetch_order_book format."""
+        with self._lock:
+            bids, asks, _, _ = self._book(coin)
+            return {
+                "bids": sorted(([price, size] for price, size in bids.items()), reverse=True)[:limit],
+                "asks": sorted([price, size] for price, size in asks.items())[:limit],
+                "nonce": self._ids[coin],
+            }
+
+    def truth(self, coin: str, levels: int) -> dict:
+        snapshot = self.fetch_snapshot(coin, levels)
+        snapshot["last_update_id"] = snapshot.pop("nonce")
+        return snapshot
+
+
+class FakeDepthStream:
+    """Local stand-in for BinanceDepthStream replaying a FakeDepthFeed."""
+
+    def __init__(self, feed: FakeDepthFeed, interval_ms: float = 1.0):
+        self.feed = feed
+        self.interval_ms = interval_ms
+        self.symbols: List[str] = []
+        self.on_diff = lambda symbol, diff: None
+        self.on_reconnect = lambda: None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def bind(self, on_diff, on_reconnect):
+        self.on_diff = on_diff
+        self.on_reconnect = on_reconnect
+
+    def subscribe(self, symbol: str):
+        if symbol not in self.symbols:
+            self.symbols.append(symbol)
+
+    def unsubscribe(self, symbol: str):
+        if symbol in self.symbols:
+            self.symbols.remove(symbol)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="fake-depth-stream")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_ms / 1000.0):
+            for symbol in list(self.symbols):
+                diff = self.feed.step(symbol)
+                if diff is not None:
+                    self.on_diff(symbol, diff)
+
+
+class _FakeResponse:
+    def __init__(self, payload: dict):
+        self._payload = payload
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self) -> dict:
+        return self._payload
+
+
+class FakeHTTP:
+    """requests.Session stand-in answering CoinGecko's /simple/price."""
+
+    def __init__(self, profile: LatencyProfile, seed: int = 0):
+        self.profile = profile
+        self.walk = PriceWalk({"bitcoin": CRYPTO_BASE_PRICES["BTC"]}, seed)
+
+    def get(self, url: str, params: dict = None, timeout: float = None) -> _FakeResponse:
+        self.profile.wait("coingecko")
+        return _FakeResponse({"bitcoin": {
+            "usd": self.walk.next("bitcoin"),
+            "usd_24h_change": 0.5,
+            "usd_24h_vol": 2.5e10,
+        }})
+
+
+class _FakeTicker:
+    def __init__(self, yahoo: "FakeYahoo", symbol: str):
+        self.yahoo = yahoo
+        self.symbol = symbol.upper()
+
+    @property
+    def info(self) -> dict:
+        self.yahoo.profile.wait("info")
+        base = self.yahoo.walk.base(self.symbol)
+        return {
+            "symbol": self.symbol,
+            "shortName": f"{self.symbol} Inc.",
+            "sector": "Technology",
+            "volume": 1_000_000,
+            "marketCap": base * 1e9,
+            "sharesOutstanding": 1e9,
+        }
+
+    def history(self, period: str = "1d", interval: str = "1d", start=None, end=None) -> pd.DataFrame:
+        self.yahoo.profile.wait("history")
+        return self.yahoo._frame(self.symbol, start=start, end=end, interval=interval)
+
+
+class FakeYahoo:
+    """Subset of the yfinance module API used by the services."""
+
+    def __init__(self, profile: LatencyProfile, seed: int = 0):
+        self.profile = profile
+        self.walk = PriceWalk(STOCK_BASE_PRICES, seed)
+
+    def Ticker(self, symbol: str) -> _FakeTicker:
+        return _FakeTicker(self, symbol)
+
+    def _frame(self, symbol: str, start=None, end=None, interval: str = "1d") -> pd.DataFrame:
+        if start is None:
+            # A single "today" bar, like period="1d"
+            close = self.walk.next(symbol)
+            index = pd.DatetimeIndex([datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)])
+            return pd.DataFrame({
+                "Open": [close * 0.995], "High": [close * 1.01], "Low": [close * 0.99],
+                "Close": [close], "Adj Close": [close], "Volume": [1_000_000],
+            }, index=index)
+
+        step = timedelta(minutes=1) if interval == "1m" else timedelta(days=1)
+        start = pd.Timestamp(start).to_pydatetime()
+        end = pd.Timestamp(end).to_pydatetime() if end is not None else datetime.utcnow()
+        count = max(0, int((end - start) / step))
+        index = pd.DatetimeIndex([start + step * i for i in range(count)])
+        base = self.walk.base(symbol)
+        closes = [base * (1 + 0.05 * math.sin(i / 50.0)) for i in range(count)]
+        return pd.DataFrame({
+            "Open": closes, "High": [c * 1.01 for c in closes], "Low": [c * 0.99 for c in closes],
+            "Close": closes, "Adj Close": closes, "Volume": [1_000_000] * count,
+        }, index=index)
+
+    def download(self, tickers, period: str = "1d", group_by: str = "column", start=None,
+                 end=None, interval: str = "1d", **kwargs) -> pd.DataFrame:
+        self.profile.wait("download")
+        symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+        frames = {symbol: self._frame(symbol, start=start, end=end, interval=interval) for symbol in symbols}
+        if group_by == "ticker":
+            return pd.concat(frames, axis=1)
+        return pd.concat(frames, axis=1).swaplevel(axis=1)
+
+
+class FakeBitcoinManager:
+    """BitcoinWalletManager stand-in that never touches bitcoinlib."""
+
+    def __init__(self, profile: LatencyProfile):
+        self.profile = profile
+
+    def create_wallet(self, user_id: int, wallet_name: str = "Default Wallet") -> dict:
+        self.profile.wait("create_wallet")
+        return {
+            "wallet_name": wallet_name,
+            "wallet_address": f"bc1qfake{user_id:08d}{abs(hash(wallet_name)) % 10000:04d}",
+            "private_key_encrypted": "fake-encrypted-key",
+            "balance_btc": 0.0,
+            "balance_usd": 0.0,
+        }
+
+    def get_wallet_balance(self, wallet_address: str) -> float:
+        self.profile.wait("get_wallet_balance")
+        return (sum(ord(c) for c in wallet_address) % 1000) / 1000.0
+
+
+class FakeBlockFeed:
+    """Chain of getblock (verbosity 2) style blocks paying and spending platform addresses.
+
+    Blocks are generated on demand and cached, so the chain is stable for a
+    seed; every transaction either pays an address or spends one of its
+    outputs, and truth() gives the expected balances in satoshis.
+    reorg(depth) replaces the last blocks with a different branch.
+    """
+
+    def __init__(self, addresses: List[str], txs_per_block: int = 50, platform_share: float = 0.2,
+                 profile: Optional[LatencyProfile] = None, seed: int = 0):
+        self.addresses = addresses
+        self._platform = set(addresses)
+        self.txs_per_block = txs_per_block
+        self.platform_share = platform_share
+        self.profile = profile
+        self.seed = seed
+        self.tip = -1
+        self._branch = 0
+        self._blocks: List[dict] = []
+        # per block: unspent platform outputs after it, (txid, vout) -> (address, satoshis)
+        self._unspent: List[Dict[tuple, tuple]] = []
+
+    def _block(self, height: int) -> dict:
+        rng = random.Random(f"{self.seed}:{self._branch}:{height}")
+        unspent = dict(self._unspent[height - 1]) if height else {}
+        txs = [{"txid": f"cb{self._branch}-{height}", "vin": [{"coinbase": "00"}],
+                "vout": [{"value": 3.125, "n": 0, "scriptPubKey": {"address": "miner"}}]}]
+        for i in range(self.txs_per_block):
+            txid = f"tx{self._branch}-{height}-{i}"
+            vin = [{"txid": f"external-{height}-{i}", "vout": 0}]
+            outputs = [(f"external-{rng.randrange(10 ** 6)}", rng.randrange(10 ** 4, 10 ** 7))]
+            if rng.random() < self.platform_share:
+                if unspent and rng.random() < 0.3:
+                    outpoint = rng.choice(list(unspent))
+                    unspent.pop(outpoint)
+                    vin = [{"txid": outpoint[0], "vout": outpoint[1]}]
+                else:
+                    outputs.append((rng.choice(self.addresses), rng.randrange(10 ** 4, 10 ** 8)))
+            vout = []
+            for n, (address, satoshis) in enumerate(outputs):
+                vout.append({"value": satoshis / 1e8, "n": n, "scriptPubKey": {"address": address}})
+                if address in self._platform:
+                    unspent[(txid, n)] = (address, satoshis)
+            txs.append({"txid": txid, "vin": vin, "vout": vout})
+        self._unspent.append(unspent)
+        return {
+            "hash": f"block{self._branch}-{height}",
+            "height": height,
+            "previousblockhash": self._blocks[height - 1]["hash"] if height else None,
+            "tx": txs,
+        }
+
+    def mine(self, count: int = 1):
+        for _ in range(count):
+            self.tip += 1
+            self._blocks.append(self._block(self.tip))
+
+    def reorg(self, depth: int):
+        """Replace the last depth blocks with a new branch of the same length."""
+        del self._blocks[self.tip - depth + 1:]
+        del self._unspent[self.tip - depth + 1:]
+        self._branch += 1
+        self.tip -= depth
+        self.mine(depth)
+
+    def height(self) -> int:
+        if self.profile:
+            self.profile.wait("getblockcount")
+        return self.tip
+
+    def blocks(self, start: int, end: int) -> List[dict]:
+        if self.profile:
+            self.profile.wait("getblock")
+        return self._blocks[start:end + 1]
+
+    def truth(self) -> Dict[str, int]:
+        balances: Dict[str, int] = {}
+        for address, satoshis in (self._unspent[self.tip].values() if self.tip >= 0 else []):
+            balances[address] = balances.get(address, 0) + satoshis
+        return balances
+
+
+def install_fakes(latency_ms: float = 20.0, jitter_ms: float = 5.0,
+                  error_rate: float = 0.0, seed: int = 0) -> dict:
+    """Point the service singletons and routes at local fakes.
+
+    Must be called after the app has been imported; returns the fakes so
+    callers can inspect call counts.
+    """
+    from app.services.crypto_service import crypto_service
+    from app.services.exchanges import exchange_registry
+    from app.services.stock_service import stock_service
+    from app.routes import user as user_routes, dashboard as dashboard_routes
+    import app.utils.bitcoin as bitcoin_module
+
+    fakes = {
+        "binance": FakeExchange(LatencyProfile(latency_ms, jitter_ms, error_rate, seed), seed),
+        "coingecko": FakeHTTP(LatencyProfile(latency_ms * 2, jitter_ms, error_rate, seed + 1), seed),
+        "yahoo": FakeYahoo(LatencyProfile(latency_ms * 3, jitter_ms, error_rate, seed + 2), seed),
+        "bitcoin": FakeBitcoinManager(LatencyProfile(latency_ms, jitter_ms, error_rate, seed + 3)),
+    }
+
+    crypto_service.binance = fakes["binance"]
+    # Every configured exchange venue gets its own fake with the same profile
+    for i, venue in enumerate(exchange_registry.venues.values()):
+        venue.client = fakes["binance"] if venue.name == "binance" else \
+            FakeExchange(LatencyProfile(latency_ms, jitter_ms, error_rate, seed + 10 + i), seed + i)
+    crypto_service.http = fakes["coingecko"]
+    stock_service.yahoo = fakes["yahoo"]
+    bitcoin_module.bitcoin_manager = fakes["bitcoin"]
+    user_routes.bitcoin_manager = fakes["bitcoin"]
+    dashboard_routes.bitcoin_manager = fakes["bitcoin"]
+    return fakes
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the CryptoBot Pro backend.
+
+Runs the real ASGI app in-process against local fake providers, seeds users
+and JWT tokens, drives a weighted mix of endpoints with concurrent workers
+and writes RPS, p50/p95/p99 latency and error rate per endpoint to JSON.
+
+Usage:
+    python -m benchmarks.load_test --duration 30 --concurrency 50 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+# Configure an isolated environment before the app is imported
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("TRACE_SAMPLE_RATE", "0")
+# All load comes from one client; per-identity limits would turn most of it into 429s
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+if "WALLET_ENCRYPTION_KEY" not in os.environ:
+    from cryptography.fernet import Fernet
+    os.environ["WALLET_ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import install_fakes, STOCK_BASE_PRICES  # noqa: E402
+
+# (name, method, path template, weight, needs auth)
+DEFAULT_SCENARIO = [
+    ("health", "GET", "/health", 1, False),
+    ("btc_price", "GET", "/crypto/btc-price", 20, False),
+    ("crypto_price", "GET", "/crypto/price/{coin}", 10, False),
+    ("stock_prices", "GET", "/stocks/prices?tickers={tickers}", 20, False),
+    ("stock_price", "GET", "/stocks/price/{ticker}", 15, False),
+    ("stock_popular", "GET", "/stocks/popular", 5, False),
+    ("market_snapshot", "GET", "/market/snapshot?symbols=BTC,{coin},{tickers}&fields=price,change_percent", 10, False),
+    ("user_balance", "GET", "/user/{user_id}/balance", 10, True),
+    ("dashboard_stats", "GET", "/dashboard/stats", 5, True),
+    ("last_update", "GET", "/dashboard/last-update", 5, False),
+]
+
+
+class ASGIClient:
+    """Minimal in-process HTTP client for an ASGI app (no sockets)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, url: str, headers: dict = None, body: bytes = b""):
+        parts = urlsplit(url)
+        raw_headers = [(b"host", b"loadtest")]
+        for key, value in (headers or {}).items():
+            raw_headers.append((key.lower().encode(), value.encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": parts.query.encode(),
+            "root_path": "",
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("loadtest", 80),
+        }
+        done = asyncio.Event()
+        request_sent = False
+        status = [0]
+        chunks = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    done.set()
+
+        await self.app(scope, receive, send)
+        done.set()
+        return status[0], b"".join(chunks)
+
+
+def seed_users(count: int) -> list:
+    """Create users with wallets directly in the database and mint tokens."""
+    from app.database import SessionLocal
+    from app.models import User, Wallet
+    from app.utils.auth import get_password_hash, create_access_token
+    from datetime import timedelta
+
+    db = SessionLocal()
+    users = []
+    try:
+        password_hash = get_password_hash("loadtest")
+        for index in range(count):
+            user = User(username=f"loadtest{index}", email=f"loadtest{index}@example.com",
+                        hashed_password=password_hash)
+            db.add(user)
+            db.flush()
+            db.add(Wallet(user_id=user.id, wallet_name="Default Wallet",
+                          wallet_address=f"bc1qloadtest{user.id:08d}",
+                          private_key_encrypted="fake-encrypted-key"))
+            token = create_access_token({"sub": user.username}, expires_delta=timedelta(hours=2))
+            users.append((user.id, token))
+        db.commit()
+    finally:
+        db.close()
+    return users
+
+
+def percentile(ordered: list, pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples: dict, elapsed: float) -> dict:
+    report = {}
+    for name, (latencies, errors) in sorted(samples.items()):
+        ordered = sorted(latencies)
+        count = len(ordered)
+        report[name] = {
+            "requests": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "rps": round(count / elapsed, 2),
+            "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+            "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+        }
+    return report
+
+
+async def run_load(app, users: list, duration: float, concurrency: int,
+                   scenario: list, seed: int) -> dict:
+    client = ASGIClient(app)
+    rng = random.Random(seed)
+    stocks = list(STOCK_BASE_PRICES)
+    coins = ["ETH", "ADA", "DOT", "LINK", "SOL"]
+    weights = [entry[3] for entry in scenario]
+    samples = {entry[0]: ([], 0) for entry in scenario}
+    deadline = time.perf_counter() + duration
+
+    def build(entry):
+        name, method, template, _, needs_auth = entry
+        user_id, token = rng.choice(users) if users else (0, "")
+        path = template.format(
+            coin=rng.choice(coins),
+            ticker=rng.choice(stocks),
+            tickers=",".join(rng.sample(stocks, 5)),
+            user_id=user_id,
+        )
+        headers = {"Authorization": f"Bearer {token}"} if needs_auth else {}
+        return name, method, path, headers
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            name, method, path, headers = build(rng.choices(scenario, weights)[0])
+            start = time.perf_counter()
+            try:
+                status, _ = await client.request(method, path, headers)
+                failed = status >= 400
+            except Exception:
+                failed = True
+            latencies, errors = samples[name]
+            latencies.append(time.perf_counter() - start)
+            if failed:
+                samples[name] = (latencies, errors + 1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    report = summarize(samples, elapsed)
+    total_requests = sum(entry["requests"] for entry in report.values())
+    total_errors = sum(entry["errors"] for entry in report.values())
+    report["_total"] = {
+        "requests": total_requests,
+        "errors": total_errors,
+        "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+        "rps": round(total_requests / elapsed, 2),
+    }
+    return report
+
+
+async def main_async(args) -> dict:
+    from app.main import app
+
+    fakes = install_fakes(args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    users = seed_users(args.users)
+
+    # Run the app's own startup/shutdown so background refresh uses the fakes
+    async with app.router.lifespan_context(app):
+        if args.warmup > 0:
+            await run_load(app, users, args.warmup, args.concurrency, DEFAULT_SCENARIO, args.seed)
+        report = await run_load(app, users, args.duration, args.concurrency,
+                                DEFAULT_SCENARIO, args.seed)
+
+    report["_config"] = {
+        "duration_s": args.duration,
+        "concurrency": args.concurrency,
+        "users": args.users,
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "error_rate": args.error_rate,
+        "seed": args.seed,
+        "upstream_calls": {name: fake.profile.calls for name, fake in fakes.items()},
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test against local fake providers")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured run length in seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured warmup in seconds")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent client workers")
+    parser.add_argument("--users", type=int, default=50, help="Seeded users with tokens")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fake provider base latency")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Fake provider latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Injected provider error rate")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible runs")
+    parser.add_argument("--output", default="load_test_results.json", help="JSON report path")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    print(f"{'endpoint':<18}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>10}")
+    for name, entry in report.items():
+        if name.startswith("_"):
+            continue
+        print(f"{name:<18}{entry['rps']:>10}{entry['p50_ms']:>10}{entry['p95_ms']:>10}"
+              f"{entry['p99_ms']:>10}{entry['error_rate']:>10}")
+    print(f"Total: {report['_total']['rps']} req/s, error rate {report['_total']['error_rate']}")
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
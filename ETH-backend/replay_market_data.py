@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Market Data Replay Script for CryptoBot Pro Backend
+Feeds a recording made with MARKET_RECORD_FILE back through the same
+parsing, cache and event path the live price refresher uses, with the
+alert, bar, portfolio, risk and strategy engines subscribed.
+"""
+
+import os
+import sys
+import argparse
+import asyncio
+from dotenv import load_dotenv
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+# Load environment variables
+load_dotenv()
+
+# Never re-record while replaying
+os.environ.pop("MARKET_RECORD_FILE", None)
+
+def build_handlers():
+    """Map recorded (provider, call) pairs to parse-and-ingest functions."""
+    from app.services.crypto_service import crypto_service
+    from app.services.stock_service import stock_service
+    from app.services.background_tasks import store_btc_price, store_stock_prices, store_crypto_prices
+    from app.services.depth import depth_cache, DepthSnapshot
+    from app.services.exchanges import exchange_registry
+    from app.services.fundamentals import fundamentals_cache
+
+    def btc_ticker(args, payload, fetched_at):
+        store_btc_price(crypto_service.parse_btc_ticker(payload, fetched_at))
+        return 1
+
+    def coingecko_price(args, payload, fetched_at):
+        store_btc_price(crypto_service.parse_coingecko_price(payload, fetched_at))
+        return 1
+
+    def crypto_tickers(args, payload, fetched_at):
+        quotes = crypto_service.parse_tickers(args["symbols"], payload, fetched_at)
+        store_crypto_prices(list(quotes.values()))
+        return len(quotes)
+
+    def stock_quotes(args, payload, fetched_at):
+        quotes = stock_service.parse_quotes(args["symbols"], payload["download"], payload.get("info"), fetched_at)
+        store_stock_prices(list(quotes.values()))
+        return len(quotes)
+
+    def stock_info(args, payload, fetched_at):
+        fundamentals_cache.store(args["symbol"], payload)
+        return 1
+
+    def order_book(args, payload, fetched_at):
+        depth_cache.store(DepthSnapshot.from_order_book(args["symbol"], payload, fetched_at))
+        return 1
+
+    def exchange_tickers(args, payload, fetched_at):
+        exchange_registry.ingest(args["venue"], args["pairs"], payload)
+        return len(args["pairs"])
+
+    return {
+        ("binance", "fetch_ticker"): btc_ticker,
+        ("coingecko", "simple_price"): coingecko_price,
+        ("binance", "fetch_tickers"): crypto_tickers,
+        ("yahoo", "quotes"): stock_quotes,
+        ("yahoo", "info"): stock_info,
+        ("binance", "fetch_order_book"): order_book,
+        ("exchanges", "fetch_tickers"): exchange_tickers,
+    }
+
+def start_subscribers():
+    """Start the engines that consume price events, as the app lifespan does.
+
+    Services that poll upstreams themselves (price refresher, exchange
+    pollers, fundamentals, address index, paper depth) stay off: the
+    recording is the only source of market data.
+    """
+    from app.database import engine, Base
+    from app.models import User, Wallet, PriceAlert, Holding, EquitySnapshot, Strategy, StrategySignal, PaperOrder
+    from app.services.alerts import alert_engine
+    from app.services.arbitrage import arbitrage_scanner
+    from app.services.bars import bar_aggregator
+    from app.services.portfolio import portfolio_engine
+    from app.services.risk import risk_engine
+    from app.services.strategies import strategy_runner
+    from app.services.watchlist import watchlist
+
+    Base.metadata.create_all(bind=engine)
+    alert_engine.start()
+    arbitrage_scanner.start()
+    bar_aggregator.start(lambda: watchlist.tracked("stock") + watchlist.tracked("crypto"))
+    portfolio_engine.start()
+    risk_engine.start(lambda: watchlist.tracked("stock") + watchlist.tracked("crypto"))
+    strategy_runner.start()
+    return [strategy_runner, risk_engine, portfolio_engine, bar_aggregator, arbitrage_scanner, alert_engine]
+
+async def replay(path, speed):
+    from app.services.recorder import MarketReplayer
+
+    subscribers = start_subscribers()
+    try:
+        # Run in a worker thread so event loop subscribers (SSE queues) keep draining
+        replayer = MarketReplayer(build_handlers())
+        return await asyncio.to_thread(replayer.replay, path, speed)
+    finally:
+        for subscriber in subscribers:
+            subscriber.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded market data through the ingestion path")
+    parser.add_argument("recording", help="Recording written with MARKET_RECORD_FILE")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="Replay speed: 1 = real time, 100 = 100x, 0 = as fast as possible")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.recording):
+        print(f"❌ Recording not found: {args.recording}")
+        sys.exit(1)
+
+    speed_label = "as fast as possible" if args.speed <= 0 else f"{args.speed:g}x"
+    print(f"🚀 Replaying {args.recording} ({speed_label})...")
+
+    stats = asyncio.run(replay(args.recording, args.speed))
+
+    print(f"✅ Replayed {stats['records']} responses ({stats['quotes']} quotes) "
+          f"in {stats['elapsed_seconds']}s")
+    print(f"📊 {stats['records_per_second']} responses/s, {stats['quotes_per_second']} quotes/s")
+    if stats["skipped"]:
+        print(f"⚠️  Skipped {stats['skipped']} responses with no handler")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file